@@ -0,0 +1,62 @@
+# benchmarks/no_guess_bench.py
+"""
+No-guess generation latency per preset.
+
+Generates boards from the centre click with one NoGuessGenerator per
+worker count and reports mean / median / max latency and the number of
+candidates checked per accepted board. The first board per generator is
+generated untimed so worker start-up is not counted.
+
+    python benchmarks/no_guess_bench.py --presets easy,medium,hard --boards 20 --workers 1,4
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minesweeper.core.game import DIFFICULTIES
+from minesweeper.core.no_guess import NoGuessGenerator
+
+
+def parse_configs(value):
+    """Preset names or RxC/M, comma-separated"""
+    configs = []
+    for item in value.split(','):
+        item = item.strip().lower()
+        if item in DIFFICULTIES:
+            configs.append((item, DIFFICULTIES[item]))
+        else:
+            size, mines = item.split('/')
+            rows, cols = size.split('x')
+            configs.append((item, (int(rows), int(cols), int(mines))))
+    return configs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark no-guess board generation.")
+    parser.add_argument('--presets', type=parse_configs, default=parse_configs('easy,medium,hard'),
+                        help="preset names or RxC/M, e.g. easy,hard,24x30/180")
+    parser.add_argument('--boards', type=int, default=20)
+    parser.add_argument('--workers', default='1,4', help="comma-separated worker counts")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'preset':>12} {'workers':>7} {'mean ms':>9} {'median ms':>9} {'max ms':>9} "
+          f"{'candidates':>10} {'failures':>8}")
+    for workers in (int(w) for w in args.workers.split(',')):
+        with NoGuessGenerator(workers=workers, seed=args.seed) as generator:
+            for name, (rows, cols, mines) in args.presets:
+                click = (rows // 2, cols // 2)
+                generator.generate(rows, cols, mines, click)
+                generator.records.clear()
+                for _ in range(args.boards):
+                    generator.generate(rows, cols, mines, click)
+                stats = generator.stats()[f"{rows}x{cols}/{mines}"]
+                print(f"{name:>12} {workers:>7} {stats['mean_ms']:9.1f} {stats['median_ms']:9.1f} "
+                      f"{stats['max_ms']:9.1f} {stats['mean_candidates']:10.1f} {stats['failures']:8d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# benchmarks/session_bench.py
+"""
+Memory per session and moves per second with many concurrent engine games.
+
+Opens --sessions games through the protocol engine, clicks once in each
+(so every game has its mines placed), then plays --moves random clicks
+and flags spread over all of them, replacing each game that ends with a
+new one. Run for the full Engine (Game objects), the CompactEngine with
+every session in memory, and the CompactEngine holding at most
+--resident sessions in memory and spilling the least recently used ones,
+so most moves rehydrate a session from disk.
+
+Memory is measured with tracemalloc after the first clicks (the Python
+heap taken by the games, not the process size).
+
+    python benchmarks/session_bench.py --preset hard --sessions 10000 --moves 50000 --resident 1000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minesweeper.core.game import DIFFICULTIES
+from minesweeper.engine.protocol import Engine
+from minesweeper.engine.sessions import CompactEngine, SessionHost
+
+
+def make_engine(kind, sessions, resident):
+    if kind == 'full':
+        return Engine(max_games=sessions)
+    if kind == 'compact':
+        return CompactEngine(max_games=sessions, host=SessionHost(max_resident=sessions))
+    return CompactEngine(max_games=sessions, host=SessionHost(max_resident=resident))
+
+
+def run(kind, preset, sessions, moves, resident, seed):
+    rng = random.Random(seed)
+    rows, cols, _ = DIFFICULTIES[preset]
+    engine = make_engine(kind, sessions, resident)
+
+    def start():
+        game_id = engine.handle({'op': 'new', 'preset': preset, 'seed': rng.getrandbits(32)})['game']
+        engine.handle({'op': 'click', 'game': game_id, 'r': rows // 2, 'c': cols // 2})
+        return game_id
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    games = [start() for _ in range(sessions)]
+    setup = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    finished = 0
+    started = time.perf_counter()
+    for _ in range(moves):
+        slot = rng.randrange(sessions)
+        op = 'flag' if rng.random() < 0.1 else 'click'
+        answer = engine.handle({'op': op, 'game': games[slot], 'r': rng.randrange(rows), 'c': rng.randrange(cols)})
+        if answer['status'] != 'playing':
+            engine.handle({'op': 'close', 'game': games[slot]})
+            games[slot] = start()
+            finished += 1
+    elapsed = time.perf_counter() - started
+    host = engine.games if kind != 'full' else None
+    spilled = f"{host.spilled_total}/{host.loaded_total}" if host is not None else '-'
+    engine.shutdown()
+    return memory / sessions, sessions / setup, moves / elapsed, finished, spilled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark hosting many engine sessions.")
+    parser.add_argument('--preset', choices=sorted(DIFFICULTIES), default='hard')
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--moves', type=int, default=50000)
+    parser.add_argument('--resident', type=int, default=1000,
+                        help="sessions in memory for the spilling run")
+    parser.add_argument('--engines', default='full,compact,spill', help="comma-separated: full, compact, spill")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{args.sessions} sessions on {args.preset}, {args.moves} moves")
+    print(f"{'engine':>8} {'bytes/session':>13} {'new/s':>9} {'moves/s':>9} {'ended':>7} {'spilled/loaded':>15}")
+    for kind in args.engines.split(','):
+        per_session, created, rate, finished, spilled = run(
+            kind, args.preset, args.sessions, args.moves, args.resident, args.seed)
+        print(f"{kind:>8} {per_session:13.0f} {created:9.0f} {rate:9.0f} {finished:7d} {spilled:>15}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+# benchmarks/solver_bench.py
+"""
+Deduction-loop benchmark: set-based Solver vs. BitsetSolver.
+
+Both solvers play the same seeded hard boards by deduction only (stopping
+at the first guess); the time spent in update() + deduce() is compared per
+move, and the time to build the solver per board. Both must reach the same
+result on every board.
+
+    python benchmarks/solver_bench.py --games 300 --preset hard
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from minesweeper.core.bitsolver import BitsetSolver
+from minesweeper.core.game import DIFFICULTIES, Game
+from minesweeper.core.solver import Solver
+
+
+def play(solver_class, rows, cols, mines, seed):
+    """Play one board by deduction only
+
+    Returns (won, revealed cells, moves, seconds building the solver,
+    seconds in update() + deduce()).
+    """
+    game = Game(rows, cols, mines, rng=random.Random(seed))
+    # Through Game.click, which keeps the count of safe cells left that decides a win
+    changed = game.click(rows // 2, cols // 2)
+    start = time.perf_counter()
+    solver = solver_class(game.board)
+    setup = time.perf_counter() - start
+    moves = 0
+    elapsed = 0.0
+    while not game.won and not game.lost:
+        start = time.perf_counter()
+        solver.update(changed)
+        safe, _ = solver.deduce()
+        elapsed += time.perf_counter() - start
+        moves += 1
+        if not safe:
+            break
+        changed = []
+        for cell in sorted(safe):
+            changed += game.click(*cell)
+    revealed = game.board.revealed_count
+    return game.won, revealed, moves, setup, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver deduction loop with and without bitsets.")
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--preset', choices=sorted(DIFFICULTIES), default='hard')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeats', type=int, default=3, help="runs per board; the fastest is kept")
+    args = parser.parse_args(argv)
+
+    rows, cols, mines = DIFFICULTIES[args.preset]
+    solvers = (('sets', Solver), ('bitsets', BitsetSolver))
+    outcomes = {name: [] for name, _ in solvers}
+    setup = {name: 0.0 for name, _ in solvers}
+    deduction = {name: 0.0 for name, _ in solvers}
+    moves = 0
+    for game_index in range(args.games):
+        seed = args.seed + game_index
+        # Interleave the solvers and keep the best of several runs to damp timer noise
+        best = {}
+        for _ in range(args.repeats):
+            for name, solver_class in solvers:
+                result = play(solver_class, rows, cols, mines, seed)
+                if name not in best:
+                    best[name] = list(result)
+                else:
+                    best[name][3] = min(best[name][3], result[3])
+                    best[name][4] = min(best[name][4], result[4])
+        for name, _ in solvers:
+            won, revealed, board_moves, board_setup, board_time = best[name]
+            outcomes[name].append((won, revealed))
+            setup[name] += board_setup
+            deduction[name] += board_time
+        moves += best['sets'][2]
+
+    for name, _ in solvers:
+        wins = sum(won for won, _ in outcomes[name])
+        print(f"{name:8s} {args.games} games, {wins} won by deduction: "
+              f"{deduction[name] * 1000 / moves:.3f} ms/move deducing, "
+              f"{setup[name] * 1000 / args.games:.3f} ms/board setting up")
+
+    if outcomes['sets'] != outcomes['bitsets']:
+        print("MISMATCH: the two solvers disagree on at least one board")
+        return 1
+    print(f"deduction speed-up: {deduction['sets'] / deduction['bitsets']:.2f}x, "
+          f"setup speed-up: {setup['sets'] / setup['bitsets']:.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
 # minesweeper/main.py
+from minesweeper import log
 from minesweeper.ui.main_app import MinesweeperApp
 
 def main():
+    log.configure()
     app = MinesweeperApp()
     app.run()
 
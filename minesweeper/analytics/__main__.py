@@ -0,0 +1,149 @@
+# minesweeper/analytics/__main__.py
+"""
+Headless analytics runner.
+
+    python -m minesweeper.analytics --preset hard --samples 100000 --seed 1 \\
+        --workers 8 --format json,npz,pdf --output-dir reports/
+
+Never imports tkinter, so it can run on machines without a display.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from minesweeper import log
+from minesweeper.core.game import DIFFICULTIES
+from minesweeper.core.simulation import DEFAULT_STRATEGIES, STRATEGIES
+from minesweeper.analytics.analyzer import ANALYTICS_MODES, AnalyticsRunner
+from minesweeper.analytics.exporter import (EXPORT_FORMATS, RECORD_FORMATS, BoardRecordWriter,
+                                           build_output_path, export_results, summarize)
+
+OUTPUT_FORMATS = EXPORT_FORMATS + ('pdf',)
+
+
+def parse_formats(value):
+    formats = [fmt.strip().lower() for fmt in value.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in OUTPUT_FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(
+            f"formats must be a comma-separated list of: {', '.join(OUTPUT_FORMATS)}")
+    return formats
+
+
+def parse_strategies(value):
+    strategies = [name.strip().lower() for name in value.split(',') if name.strip()]
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown or not strategies:
+        raise argparse.ArgumentTypeError(
+            f"strategies must be a comma-separated list of: {', '.join(STRATEGIES)}")
+    return strategies
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m minesweeper.analytics",
+        description="Run Minesweeper board analytics without the GUI.")
+    parser.add_argument('--preset', choices=sorted(DIFFICULTIES),
+                        help="use a built-in difficulty instead of --rows/--cols/--mines")
+    parser.add_argument('--rows', type=int)
+    parser.add_argument('--cols', type=int)
+    parser.add_argument('--mines', type=int)
+    parser.add_argument('--samples', type=int, default=100, help="number of boards to simulate")
+    parser.add_argument('--mode', choices=ANALYTICS_MODES, default='monte_carlo',
+                        help="exact: closed-form heatmap and value distribution, cross-checked "
+                             "against the Monte Carlo sample")
+    parser.add_argument('--guesses', action='store_true',
+                        help="also count the guesses a deduction solver is forced to make per board")
+    parser.add_argument('--first-click', type=int, metavar='BOARDS',
+                        help="also analyse every first-click position with BOARDS boards each")
+    parser.add_argument('--simulate', type=int, metavar='GAMES',
+                        help="also play GAMES full games per bot strategy")
+    parser.add_argument('--strategies', type=parse_strategies, default=list(DEFAULT_STRATEGIES),
+                        help=f"comma-separated bots for --simulate ({', '.join(STRATEGIES)}); "
+                             f"default: {','.join(DEFAULT_STRATEGIES)}")
+    parser.add_argument('--seed', type=int, help="seed for reproducible runs")
+    parser.add_argument('--workers', type=int, default=1, help="number of worker processes")
+    parser.add_argument('--format', dest='formats', type=parse_formats, default=['pdf'],
+                        help=f"comma-separated outputs ({', '.join(OUTPUT_FORMATS)}); default: pdf")
+    parser.add_argument('--output-dir', default="analytics_reports")
+    parser.add_argument('--board-records', choices=('auto',) + RECORD_FORMATS,
+                        help="also stream one row per board to a columnar file "
+                             "(auto: parquet if pyarrow is installed, else npz)")
+    log.add_arguments(parser)
+    return parser
+
+
+def resolve_config(args, parser):
+    if args.preset:
+        return DIFFICULTIES[args.preset]
+    if None in (args.rows, args.cols, args.mines):
+        parser.error("either --preset or all of --rows, --cols and --mines are required")
+    return args.rows, args.cols, args.mines
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    log.configure(args.log_level, args.log_format)
+    rows, cols, mines = resolve_config(args, parser)
+
+    runner = AnalyticsRunner(seed=args.seed, workers=args.workers, quiet=True)
+    try:
+        runner._validate_inputs(rows, cols, mines, args.samples, enforce_limits=False)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.first_click is not None and args.first_click < 1:
+        parser.error("--first-click must be positive")
+    if args.simulate is not None and args.simulate < 1:
+        parser.error("--simulate must be positive")
+
+    config = (rows, cols, mines)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    if args.board_records:
+        path = build_output_path(config, 'boards', args.output_dir, timestamp)
+        with BoardRecordWriter(path, args.board_records) as writer:
+            analytics_data = runner.run_analytics(rows, cols, mines, args.samples, record_writer=writer,
+                                                  include_guesses=args.guesses)
+        board_records_path = writer.path
+    else:
+        analytics_data = runner.run_analytics(rows, cols, mines, args.samples, include_guesses=args.guesses)
+
+    if args.mode == 'exact':
+        runner.add_exact_analytics(analytics_data, rows, cols, mines)
+
+    if args.first_click:
+        runner.add_first_click_analysis(analytics_data, rows, cols, mines, args.first_click)
+
+    if args.simulate:
+        runner.add_simulation(analytics_data, rows, cols, mines, args.simulate, args.strategies)
+
+    raw_formats = [fmt for fmt in args.formats if fmt != 'pdf']
+    outputs = export_results(analytics_data, config, args.samples, raw_formats,
+                             output_dir=args.output_dir, timestamp=timestamp, seed=args.seed)
+    if args.board_records:
+        outputs['board_records'] = board_records_path
+
+    if 'pdf' in args.formats:
+        # Force a non-interactive backend so matplotlib never pulls in Tk
+        import matplotlib
+        matplotlib.use('Agg')
+        pdf_path = build_output_path(config, 'pdf', args.output_dir, timestamp)
+        outputs['pdf'] = runner.generate_pdf_report(analytics_data, config, args.samples, pdf_path)
+
+    # Machine-readable result on stdout for scripted runs
+    result = {'config': list(config), 'summary': summarize(analytics_data), 'outputs': outputs}
+    if 'cross_check' in analytics_data:
+        result['cross_check'] = analytics_data['cross_check']
+    if 'first_click' in analytics_data:
+        result['best_first_click'] = analytics_data['first_click']['best_position']
+    if 'simulation' in analytics_data:
+        result['simulation'] = analytics_data['simulation']['strategies']
+    json.dump(result, sys.stdout)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,89 @@
 # minesweeper/analytics/analyzer.py - CORRECTED VERSION
 
-import matplotlib.pyplot as plt
 import numpy as np
 from minesweeper.core.game import Game
-from minesweeper.analytics.reporter import PDFReporter
-from collections import deque
+from minesweeper.core.difficulty import DIFFICULTY_KEYS, batch_metrics, forced_guesses, layouts_of
+from minesweeper.core.metrics import mine_clusters, value_histogram
+from minesweeper.analytics.exact import compute_exact_analytics, cross_check
+from minesweeper.analytics.first_click import analyse_first_clicks
+from minesweeper.analytics.simulation import run_simulation
+from minesweeper.log import get_logger
+from concurrent.futures import ProcessPoolExecutor
+import logging
 import random
 
+log = get_logger('analytics')
+
+# Boards per unit of work. Fixed so that a seeded run produces the same
+# results whatever the number of workers.
+CHUNK_SIZE = 250
+
+
+ANALYTICS_MODES = ('monte_carlo', 'exact')
+
+# Per-board columns produced when board records are requested
+BOARD_RECORD_COLUMNS = (
+    ['first_row', 'first_col', 'white_cells', 'openings', 'clusters', 'largest_cluster', 'bbbv']
+    + [f'num_{v}' for v in range(9)]
+)
+
+
+def _simulate_chunk(rows, cols, mines, n, seed, include_records=False, include_guesses=False):
+    """Generate and analyse one chunk of boards (runs inside worker processes)"""
+    runner = AnalyticsRunner(seed=seed, quiet=True)
+    runner.generate_boards(rows, cols, mines, n=n)
+    analytics_data = runner.collect_analytics_data(rows, cols, mines, include_records=include_records,
+                                                   include_guesses=include_guesses)
+    analytics_data['boards_processed'] = len(runner.sample_boards)
+    return analytics_data
+
+
+def merge_analytics_data(parts):
+    """Combine analytics data from several chunks into a single result"""
+    total = sum(part['boards_processed'] for part in parts)
+    merged = {
+        'white_counts': [],
+        'number_freq': [0] * 9,
+        'value_freq': [0] * 9,
+        'value_freq_sq': [0] * 9,
+        'cluster_counts': [],
+        'heatmap': np.zeros_like(parts[0]['heatmap']),
+        'heatmap_sq': np.zeros_like(parts[0]['heatmap']),
+        'boards_processed': total
+    }
+    for part in parts:
+        merged['white_counts'].extend(part['white_counts'])
+        merged['cluster_counts'].extend(part['cluster_counts'])
+        for key in DIFFICULTY_KEYS:
+            if key in part:
+                merged.setdefault(key, []).extend(part[key])
+        for key in ('number_freq', 'value_freq', 'value_freq_sq'):
+            merged[key] = [a + b for a, b in zip(merged[key], part[key])]
+        # Heatmaps are per-chunk averages, so weight them by chunk size
+        merged['heatmap'] += part['heatmap'] * part['boards_processed']
+        merged['heatmap_sq'] += part['heatmap_sq'] * part['boards_processed']
+    if total:
+        merged['heatmap'] /= total
+        merged['heatmap_sq'] /= total
+    return merged
+
+
 class AnalyticsRunner:
-    def __init__(self):
+    def __init__(self, seed=None, workers=1, quiet=False):
         self.sample_boards = []
-        self.pdf_reporter = PDFReporter()
+        self.seed = seed
+        self.workers = max(1, workers)
+        self.quiet = quiet
+        self.rng = random.Random(seed)
+        self._pdf_reporter = None
+
+    @property
+    def pdf_reporter(self):
+        # Imported lazily so headless runs without reportlab can still export raw data
+        if self._pdf_reporter is None:
+            from minesweeper.analytics.reporter import PDFReporter
+            self._pdf_reporter = PDFReporter()
+        return self._pdf_reporter
 
     def generate_boards(self, rows, cols, mines, n=100):
         """Generate sample boards with proper mine placement"""
@@ -22,65 +95,59 @@ class AnalyticsRunner:
             raise ValueError("Must have at least 1 mine")
             
         self.sample_boards.clear()
-        print(f"Generating {n} boards for analytics...")
+        if not self.quiet:
+            log.info("Generating %d boards for analytics...", n)
         
         boards_generated = 0
         for i in range(n):
             try:
                 # Create game and simulate first click at random position
                 game = Game(rows, cols, mines)
-                first_r, first_c = random.randint(0, rows-1), random.randint(0, cols-1)
-                game.board.place_mines((first_r, first_c))
+                first_r, first_c = self.rng.randint(0, rows-1), self.rng.randint(0, cols-1)
+                game.board.place_mines((first_r, first_c), rng=self.rng)
                 
                 # Simulate revealing the board to get actual white cells
                 revealed_cells = game.board.reveal(first_r, first_c)
                 
                 self.sample_boards.append({
                     'board': game.board,
+                    'first_click': (first_r, first_c),
                     'revealed_cells': revealed_cells
                 })
                 boards_generated += 1
             except Exception as e:
-                print(f"Warning: Failed to generate board {i+1} - {e}")
+                log.warning("Failed to generate board %d - %s", i + 1, e)
                 continue
         
         if boards_generated == 0:
             raise RuntimeError("Failed to generate any valid boards")
             
-        print(f"Successfully generated {boards_generated} boards")
+        if not self.quiet:
+            log.info("Successfully generated %d boards", boards_generated)
         return boards_generated
 
-    def collect_analytics_data(self, rows, cols, mines):
-        """Collect all analytics data for the 4 required visualizations - CORRECTED"""
+    def collect_analytics_data(self, rows, cols, mines, include_records=False, include_guesses=False):
+        """Collect all analytics data for the 4 required visualizations - CORRECTED
+
+        With include_records, also returns one row per board under 'board_records'
+        (a dict of columns, see BOARD_RECORD_COLUMNS). Difficulty metrics (3BV,
+        openings, isolated numbers) are computed for all boards in one batch;
+        with include_guesses, also the forced guesses of a deduction solver.
+        """
         white_counts = []
         number_freq = [0] * 9  # 0-8
+        value_freq = [0] * 9  # all safe cells, revealed or not
+        value_freq_sq = [0] * 9
         cluster_counts = []
         heatmap = np.zeros((rows, cols))
+        heatmap_sq = np.zeros((rows, cols))
+        records = {name: [] for name in BOARD_RECORD_COLUMNS} if include_records else None
 
-        def find_clusters(board):
-            """Find mine clusters using BFS"""
-            visited = set()
-            clusters = 0
-            
-            for r in range(rows):
-                for c in range(cols):
-                    if board.grid[r][c].is_mine and (r, c) not in visited:
-                        # Found new cluster
-                        clusters += 1
-                        queue = deque([(r, c)])
-                        visited.add((r, c))
-                        
-                        while queue:
-                            cr, cc = queue.popleft()
-                            for nr, nc in board.neighbours(cr, cc):
-                                if (board.grid[nr][nc].is_mine and 
-                                    (nr, nc) not in visited):
-                                    visited.add((nr, nc))
-                                    queue.append((nr, nc))
-            return clusters
+        layouts = layouts_of([board_data['board'] for board_data in self.sample_boards])
+        difficulty = batch_metrics(layouts)
 
         # Process each board
-        for board_data in self.sample_boards:
+        for i, board_data in enumerate(self.sample_boards):
             board = board_data['board']
             revealed_cells = board_data['revealed_cells']
             
@@ -101,60 +168,149 @@ class AnalyticsRunner:
                     number_freq[cell.value] += 1
 
             # 3. MINE CLUSTERS
-            clusters = find_clusters(board)
-            cluster_counts.append(clusters)
+            cluster_sizes = mine_clusters(board)
+            cluster_counts.append(len(cluster_sizes))
 
             # 4. HEATMAP: Average mines in 3x3 neighborhood for ALL cells
+            mine_counts = np.zeros((rows, cols))
             for r in range(rows):
                 for c in range(cols):
                     mine_count = 0
                     for nr, nc in board.neighbours(r, c):
                         if board.grid[nr][nc].is_mine:
                             mine_count += 1
-                    heatmap[r][c] += mine_count
+                    mine_counts[r][c] = mine_count
+            heatmap += mine_counts
+            heatmap_sq += mine_counts ** 2
+
+            # 5. VALUE FREQUENCY over the whole board, with second moments for error estimates
+            histogram = value_histogram(board)
+            for v, count in enumerate(histogram):
+                value_freq[v] += count
+                value_freq_sq[v] += count * count
+
+            if records is not None:
+                row = [board_data['first_click'][0], board_data['first_click'][1],
+                       white_cells_count, int(difficulty['openings'][i]), len(cluster_sizes),
+                       max(cluster_sizes, default=0), int(difficulty['bbbv'][i])] + histogram
+                for name, value in zip(BOARD_RECORD_COLUMNS, row):
+                    records[name].append(value)
 
         # Normalize heatmap by number of boards
         if self.sample_boards:
             heatmap /= len(self.sample_boards)
+            heatmap_sq /= len(self.sample_boards)
 
-        return {
+        analytics_data = {
             'white_counts': white_counts,
             'number_freq': number_freq,
+            'value_freq': value_freq,
+            'value_freq_sq': value_freq_sq,
             'cluster_counts': cluster_counts,
-            'heatmap': heatmap
+            'heatmap': heatmap,
+            'heatmap_sq': heatmap_sq
         }
+        for key, values in difficulty.items():
+            analytics_data[key] = values.tolist()
+        if include_guesses:
+            analytics_data['forced_guesses'] = forced_guesses(
+                layouts, [board_data['first_click'] for board_data in self.sample_boards]).tolist()
+        if records is not None:
+            analytics_data['board_records'] = records
+        return analytics_data
+
+    def run_analytics(self, rows, cols, mines, sample_size=100, record_writer=None, include_guesses=False):
+        """Simulate boards in chunks (in parallel when workers > 1) and merge the results
+
+        If record_writer is given (see exporter.BoardRecordWriter), per-board
+        records are handed to it chunk by chunk and not kept in memory.
+        include_guesses adds the forced guesses per board (a solver run each).
+        """
+        include_records = record_writer is not None
+        chunks = []
+        remaining = sample_size
+        while remaining > 0:
+            n = min(CHUNK_SIZE, remaining)
+            chunks.append((rows, cols, mines, n, self.rng.getrandbits(64), include_records, include_guesses))
+            remaining -= n
+
+        parts = []
+        if self.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for part in pool.map(_simulate_chunk, *zip(*chunks)):
+                    parts.append(self._consume_records(part, record_writer))
+        else:
+            for chunk in chunks:
+                parts.append(self._consume_records(_simulate_chunk(*chunk), record_writer))
+
+        return merge_analytics_data(parts)
 
-    def run_all(self, rows, cols, mines, sample_size=100, generate_pdf=True, output_path=None):
+    def add_exact_analytics(self, analytics_data, rows, cols, mines):
+        """Replace Monte Carlo estimates that have closed forms with exact values
+
+        The Monte Carlo heatmap is kept as 'heatmap_mc' and compared with the
+        exact one under 'cross_check'.
+        """
+        exact = compute_exact_analytics(rows, cols, mines)
+        analytics_data['heatmap_mc'] = analytics_data['heatmap']
+        analytics_data['heatmap'] = exact['heatmap']
+        analytics_data['exact'] = exact
+        analytics_data['cross_check'] = cross_check(exact, analytics_data)
+        if not self.quiet and not analytics_data['cross_check']['agree']:
+            log.warning("Monte Carlo and exact analytics disagree: %s", analytics_data['cross_check'])
+        return analytics_data
+
+    def add_first_click_analysis(self, analytics_data, rows, cols, mines, boards_per_position=200):
+        """Attach per-position first-click opening statistics under 'first_click'"""
+        analytics_data['first_click'] = analyse_first_clicks(
+            rows, cols, mines, boards_per_position, seed=self.rng.getrandbits(64))
+        return analytics_data
+
+    def add_simulation(self, analytics_data, rows, cols, mines, games=1000, strategies=None):
+        """Attach full-game bot results per strategy under 'simulation'"""
+        kwargs = {'strategies': strategies} if strategies else {}
+        analytics_data['simulation'] = run_simulation(
+            rows, cols, mines, games, workers=self.workers, seed=self.rng.getrandbits(64), **kwargs)
+        return analytics_data
+
+    def _consume_records(self, part, record_writer):
+        records = part.pop('board_records', None)
+        if record_writer is not None and records is not None:
+            record_writer.write_chunk(records)
+        return part
+
+    def run_all(self, rows, cols, mines, sample_size=100, generate_pdf=True, output_path=None,
+                mode='monte_carlo'):
         """Run analytics and generate PDF report - UPDATED"""
         try:
             self._validate_inputs(rows, cols, mines, sample_size)
+            if mode not in ANALYTICS_MODES:
+                raise ValueError(f"Unknown analytics mode: {mode}")
             
-            print(f"Starting analytics: {rows}x{cols}, {mines} mines, {sample_size} samples")
+            log.info("Starting analytics: %dx%d, %d mines, %d samples", rows, cols, mines, sample_size)
             
-            boards_generated = self.generate_boards(rows, cols, mines, n=sample_size)
-            analytics_data = self.collect_analytics_data(rows, cols, mines)
-            analytics_data['boards_processed'] = boards_generated
+            analytics_data = self.run_analytics(rows, cols, mines, sample_size)
+            if mode == 'exact':
+                self.add_exact_analytics(analytics_data, rows, cols, mines)
             
-            print(f"Analytics data collected:")
-            print(f"  - White counts: {len(analytics_data['white_counts'])} samples")
-            print(f"  - Number freq: {analytics_data['number_freq']}")
-            print(f"  - Cluster counts: {len(analytics_data['cluster_counts'])} samples")
-            print(f"  - Heatmap shape: {analytics_data['heatmap'].shape}")
+            if log.isEnabledFor(logging.INFO):
+                log.info("Analytics data collected: white counts: %d samples, number freq: %s, "
+                         "cluster counts: %d samples, heatmap shape: %s",
+                         len(analytics_data['white_counts']), analytics_data['number_freq'],
+                         len(analytics_data['cluster_counts']), analytics_data['heatmap'].shape)
             
             if generate_pdf:
                 pdf_path = self.generate_pdf_report(analytics_data, (rows, cols, mines), sample_size, output_path)
-                print(f"PDF report generated at: {pdf_path}")
+                log.info("PDF report generated at: %s", pdf_path)
                 return pdf_path
             
             return None
             
         except Exception as e:
-            print(f"Analytics error: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("Analytics error: %s", e)
             raise
 
-    def _validate_inputs(self, rows, cols, mines, sample_size):
+    def _validate_inputs(self, rows, cols, mines, sample_size, enforce_limits=True):
         """Validate all input parameters"""
         MAX_ROWS = 30
         MAX_COLS = 40  
@@ -162,6 +318,16 @@ class AnalyticsRunner:
         MIN_COLS = 5
         MAX_SAMPLE_SIZE = 5000
         
+        if not enforce_limits:
+            # Batch runs only need a board that can hold the mines outside the 3x3 safe zone
+            if rows < 3 or cols < 3:
+                raise ValueError("Board must be at least 3x3")
+            if not (1 <= mines <= rows * cols - 9):
+                raise ValueError(f"Mines must be between 1 and {rows*cols - 9}")
+            if sample_size < 1:
+                raise ValueError("Sample size must be positive")
+            return
+
         if not (MIN_ROWS <= rows <= MAX_ROWS):
             raise ValueError(f"Rows must be between {MIN_ROWS} and {MAX_ROWS}")
         if not (MIN_COLS <= cols <= MAX_COLS):
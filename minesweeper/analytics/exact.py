@@ -0,0 +1,142 @@
+# minesweeper/analytics/exact.py
+"""
+Exact (combinatorial) analytics for uniformly random boards.
+
+Board.place_mines picks the first click uniformly at random in the analytics
+runner, keeps the 3x3 zone around it free of mines and scatters the mines
+uniformly over the remaining cells. Under that model the mine probability of
+every cell, the expected neighbourhood heatmap and the expected number of
+cells showing each value 0-8 have closed forms: given the first click, the
+number of mines around a cell is hypergeometric. Averaging over the N
+possible first clicks gives the exact expectation in O(N) time.
+
+Statistics that depend on the reveal cascade (white cells, openings,
+clusters) have no simple closed form and stay Monte Carlo.
+"""
+from collections import Counter
+from math import comb
+
+import numpy as np
+
+from minesweeper.core.grid import box_sum
+
+# Monte Carlo and exact results agree if every estimate is within this many
+# standard errors of the exact value.
+AGREEMENT_Z = 5.0
+
+
+def _hypergeom_pmf(population, successes, draws):
+    """P(k successes) for k = 0..8 when drawing without replacement"""
+    pmf = np.zeros(9)
+    total = comb(population, draws)
+    for k in range(min(draws, successes) + 1):
+        pmf[k] = comb(successes, k) * comb(population - successes, draws - k) / total
+    return pmf
+
+
+def _span(center, size):
+    """Clipped [lo, hi] range of the 3-wide window around center"""
+    return max(center - 1, 0), min(center + 1, size - 1)
+
+
+def safe_zone_sizes(rows, cols):
+    """Number of on-board cells in the 3x3 safe zone around every first click"""
+    return box_sum(np.ones((rows, cols)))
+
+
+def exact_mine_probability(rows, cols, mines):
+    """Probability that each cell holds a mine, averaged over the first click"""
+    n_cells = rows * cols
+    candidates = n_cells - safe_zone_sizes(rows, cols)
+    density = mines / candidates            # P(mine) for cells outside the safe zone of click f
+    # A cell y is never a mine when the first click lands in the 3x3 box around y
+    return (density.sum() - box_sum(density)) / n_cells
+
+
+def exact_heatmap(rows, cols, mines):
+    """Expected number of mines among the neighbours of each cell"""
+    probability = exact_mine_probability(rows, cols, mines)
+    return box_sum(probability) - probability
+
+
+def exact_value_distribution(rows, cols, mines):
+    """Expected number of safe cells per board showing each value 0-8"""
+    n_cells = rows * cols
+    degree = (safe_zone_sizes(rows, cols) - 1).astype(int)
+    degree_counts = Counter(degree.ravel().tolist())
+
+    # Group every (first click, cell) pair by (safe zone size, cell in safe zone, open neighbours);
+    # only cells within 2 of the first click see the safe zone, all others keep their full degree.
+    groups = Counter()
+    for fr in range(rows):
+        r_lo, r_hi = _span(fr, rows)
+        for fc in range(cols):
+            c_lo, c_hi = _span(fc, cols)
+            zone = (r_hi - r_lo + 1) * (c_hi - c_lo + 1)
+            near = Counter()
+            for xr in range(max(fr - 2, 0), min(fr + 2, rows - 1) + 1):
+                xr_lo, xr_hi = _span(xr, rows)
+                overlap_r = max(0, min(r_hi, xr_hi) - max(r_lo, xr_lo) + 1)
+                for xc in range(max(fc - 2, 0), min(fc + 2, cols - 1) + 1):
+                    xc_lo, xc_hi = _span(xc, cols)
+                    overlap_c = max(0, min(c_hi, xc_hi) - max(c_lo, xc_lo) + 1)
+                    in_zone = r_lo <= xr <= r_hi and c_lo <= xc <= c_hi
+                    blocked = overlap_r * overlap_c - (1 if in_zone else 0)
+                    k = int(degree[xr, xc])
+                    near[k] += 1
+                    groups[(zone, in_zone, k - blocked)] += 1
+            for k, count in degree_counts.items():
+                groups[(zone, False, k)] += count - near[k]
+
+    expected = np.zeros(9)
+    for (zone, in_zone, open_neighbours), count in groups.items():
+        candidates = n_cells - zone
+        if in_zone:
+            expected += count * _hypergeom_pmf(candidates, mines, open_neighbours)
+        else:
+            p_safe = (candidates - mines) / candidates
+            expected += count * p_safe * _hypergeom_pmf(candidates - 1, mines, open_neighbours)
+    return expected / n_cells
+
+
+def compute_exact_analytics(rows, cols, mines):
+    """All closed-form statistics for a configuration"""
+    return {
+        'mine_probability': exact_mine_probability(rows, cols, mines),
+        'heatmap': exact_heatmap(rows, cols, mines),
+        'value_distribution': exact_value_distribution(rows, cols, mines),
+    }
+
+
+def cross_check(exact, analytics_data, z=AGREEMENT_Z):
+    """
+    Compare exact results with the Monte Carlo estimates in analytics_data.
+
+    Uses the per-board means and second moments collected by the runner to
+    express each difference in standard errors.
+    """
+    n = analytics_data['boards_processed']
+
+    def z_scores(estimate, second_moment, exact_value):
+        variance = np.maximum(second_moment - estimate ** 2, 0.0)
+        # Rare values may never show up in the sample; fall back to a Poisson error estimate
+        stderr = np.sqrt(np.where(variance > 0, variance, exact_value) / n)
+        diff = np.abs(estimate - exact_value)
+        return np.where(stderr > 0, diff / np.where(stderr > 0, stderr, 1), np.where(diff > 1e-12, np.inf, 0.0))
+
+    heatmap_mc = np.asarray(analytics_data['heatmap_mc'] if 'heatmap_mc' in analytics_data
+                            else analytics_data['heatmap'])
+    heatmap_z = z_scores(heatmap_mc, np.asarray(analytics_data['heatmap_sq']), exact['heatmap'])
+
+    value_mean = np.asarray(analytics_data['value_freq'], dtype=np.float64) / n
+    value_sq = np.asarray(analytics_data['value_freq_sq'], dtype=np.float64) / n
+    value_z = z_scores(value_mean, value_sq, exact['value_distribution'])
+
+    return {
+        'boards': n,
+        'heatmap_max_abs_diff': float(np.max(np.abs(heatmap_mc - exact['heatmap']))),
+        'heatmap_max_z': float(np.max(heatmap_z)),
+        'value_max_abs_diff': float(np.max(np.abs(value_mean - exact['value_distribution']))),
+        'value_max_z': float(np.max(value_z)),
+        'agree': bool(np.max(heatmap_z) <= z and np.max(value_z) <= z),
+    }
@@ -0,0 +1,239 @@
+# minesweeper/analytics/exporter.py
+import csv
+import json
+import os
+import zipfile
+from datetime import datetime
+
+import numpy as np
+
+from minesweeper.core.difficulty import DIFFICULTY_KEYS
+
+EXPORT_FORMATS = ('json', 'csv', 'npz')
+RECORD_FORMATS = ('parquet', 'npz', 'csv')
+
+
+def build_output_path(config, extension, output_dir="analytics_reports", timestamp=None):
+    """Build a report path using the same naming scheme as the PDF reports"""
+    rows, cols, mines = config
+    os.makedirs(output_dir, exist_ok=True)
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"minesweeper_analytics_{rows}x{cols}_{mines}mines_{timestamp}.{extension}"
+    return os.path.join(output_dir, filename)
+
+
+def summarize(analytics_data):
+    """Headline statistics shared by the JSON export and the command-line output"""
+    white_counts = analytics_data['white_counts']
+    cluster_counts = analytics_data['cluster_counts']
+    summary = {
+        'boards_processed': analytics_data.get('boards_processed', len(white_counts)),
+        'avg_white_cells': float(np.mean(white_counts)) if white_counts else 0.0,
+        'std_white_cells': float(np.std(white_counts)) if white_counts else 0.0,
+        'avg_clusters': float(np.mean(cluster_counts)) if cluster_counts else 0.0,
+        'most_common_number': int(np.argmax(analytics_data['number_freq'])),
+    }
+    for key in DIFFICULTY_KEYS:
+        if analytics_data.get(key):
+            summary[f'avg_{key}'] = float(np.mean(analytics_data[key]))
+    return summary
+
+
+def export_json(analytics_data, config, sample_size, path, seed=None):
+    """Write the summary and all raw results to a JSON document"""
+    rows, cols, mines = config
+    document = {
+        'config': {'rows': rows, 'cols': cols, 'mines': mines},
+        'sample_size': sample_size,
+        'seed': seed,
+        'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'summary': summarize(analytics_data),
+        'white_counts': [int(v) for v in analytics_data['white_counts']],
+        'cluster_counts': [int(v) for v in analytics_data['cluster_counts']],
+        'number_freq': [int(v) for v in analytics_data['number_freq']],
+        'heatmap': np.asarray(analytics_data['heatmap']).tolist(),
+    }
+    for key in DIFFICULTY_KEYS:
+        if key in analytics_data:
+            document[key] = [int(v) for v in analytics_data[key]]
+    if 'exact' in analytics_data:
+        document['exact'] = {name: np.asarray(value).tolist()
+                             for name, value in analytics_data['exact'].items()}
+        document['cross_check'] = analytics_data['cross_check']
+    if 'first_click' in analytics_data:
+        document['first_click'] = {name: np.asarray(value).tolist()
+                                   for name, value in analytics_data['first_click'].items()}
+    if 'simulation' in analytics_data:
+        document['simulation'] = analytics_data['simulation']
+    with open(path, 'w') as f:
+        json.dump(document, f)
+    return path
+
+
+def export_csv(analytics_data, path):
+    """Write one row per simulated board (white cells, mine clusters and difficulty metrics)"""
+    keys = [key for key in DIFFICULTY_KEYS if key in analytics_data]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['board', 'white_cells', 'clusters'] + keys)
+        for i, (white, clusters) in enumerate(zip(analytics_data['white_counts'],
+                                                  analytics_data['cluster_counts'])):
+            writer.writerow([i, white, clusters] + [analytics_data[key][i] for key in keys])
+    return path
+
+
+def export_npz(analytics_data, config, path):
+    """Write all raw results as compressed numpy arrays"""
+    arrays = {
+        'config': np.array(config, dtype=np.int64),
+        'white_counts': np.asarray(analytics_data['white_counts'], dtype=np.int64),
+        'cluster_counts': np.asarray(analytics_data['cluster_counts'], dtype=np.int64),
+        'number_freq': np.asarray(analytics_data['number_freq'], dtype=np.int64),
+        'heatmap': np.asarray(analytics_data['heatmap'], dtype=np.float64),
+    }
+    for key in DIFFICULTY_KEYS:
+        if key in analytics_data:
+            arrays[key] = np.asarray(analytics_data[key], dtype=np.int64)
+    for name, value in analytics_data.get('exact', {}).items():
+        arrays[f'exact_{name}'] = np.asarray(value, dtype=np.float64)
+    for name, value in analytics_data.get('first_click', {}).items():
+        arrays[f'first_click_{name}'] = np.asarray(value)
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def export_results(analytics_data, config, sample_size, formats, output_dir="analytics_reports",
+                   timestamp=None, seed=None):
+    """Export raw analytics results in each requested format and return the written paths"""
+    paths = {}
+    for fmt in formats:
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        path = build_output_path(config, fmt, output_dir, timestamp)
+        if fmt == 'json':
+            paths[fmt] = export_json(analytics_data, config, sample_size, path, seed=seed)
+        elif fmt == 'csv':
+            paths[fmt] = export_csv(analytics_data, path)
+        else:
+            paths[fmt] = export_npz(analytics_data, config, path)
+    return paths
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class BoardRecordWriter:
+    """
+    Streams per-board analytics records to a columnar file, one chunk at a time.
+
+    Parquet (one row group per chunk) is used when pyarrow is installed;
+    otherwise NPZ, where every chunk is stored as its own set of column
+    arrays (read them back with load_board_records), or CSV.
+    """
+    def __init__(self, path, fmt='auto'):
+        if fmt == 'auto':
+            fmt = 'parquet' if _parquet_available() else 'npz'
+        if fmt not in RECORD_FORMATS:
+            raise ValueError(f"Unknown board record format: {fmt}")
+        if fmt == 'parquet' and not _parquet_available():
+            raise ValueError("Parquet export requires pyarrow")
+
+        self.format = fmt
+        self.path = path if path.endswith(f'.{fmt}') else f'{path}.{fmt}'
+        self.rows_written = 0
+        self.chunks_written = 0
+        self._columns = None
+        self._handle = None
+        self._writer = None
+
+    def write_chunk(self, records):
+        """Append one chunk of records (a dict of equally long columns)"""
+        columns = list(records)
+        length = len(records[columns[0]]) if columns else 0
+        if length == 0:
+            return
+        if self._columns is None:
+            self._columns = ['board'] + columns
+        elif ['board'] + columns != self._columns:
+            raise ValueError("Board record columns changed between chunks")
+
+        arrays = {'board': np.arange(self.rows_written, self.rows_written + length, dtype=np.int64)}
+        for name in columns:
+            arrays[name] = np.asarray(records[name], dtype=np.int32)
+
+        if self.format == 'parquet':
+            self._write_parquet(arrays)
+        elif self.format == 'npz':
+            self._write_npz(arrays)
+        else:
+            self._write_csv(arrays)
+
+        self.rows_written += length
+        self.chunks_written += 1
+
+    def _write_parquet(self, arrays):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({name: arrays[name] for name in self._columns})
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def _write_npz(self, arrays):
+        if self._handle is None:
+            self._handle = zipfile.ZipFile(self.path, 'w', compression=zipfile.ZIP_DEFLATED)
+        for name in self._columns:
+            with self._handle.open(f'{name}_{self.chunks_written:06d}.npy', 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, arrays[name])
+
+    def _write_csv(self, arrays):
+        if self._handle is None:
+            self._handle = open(self.path, 'w', newline='')
+            self._writer = csv.writer(self._handle)
+            self._writer.writerow(self._columns)
+        columns = [arrays[name] for name in self._columns]
+        self._writer.writerows(zip(*(column.tolist() for column in columns)))
+
+    def close(self):
+        if self.format == 'parquet' and self._writer is not None:
+            self._writer.close()
+        if self._handle is not None:
+            self._handle.close()
+        self._writer = None
+        self._handle = None
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_board_records(path):
+    """Read board records written by BoardRecordWriter into a dict of numpy columns"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    if path.endswith('.csv'):
+        with open(path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = [list(map(int, row)) for row in reader]
+        data = np.array(rows, dtype=np.int64).reshape(-1, len(header))
+        return {name: data[:, i] for i, name in enumerate(header)}
+
+    parts = {}
+    with np.load(path) as npz:
+        for key in sorted(npz.files):
+            name, _ = key.rsplit('_', 1)
+            parts.setdefault(name, []).append(npz[key])
+    return {name: np.concatenate(chunks) for name, chunks in parts.items()}
@@ -0,0 +1,112 @@
+# minesweeper/analytics/first_click.py
+"""
+First-click position analysis.
+
+For every cell of the board, estimate how large the opening revealed by a
+first click there is, and how likely the click cascades beyond the 3x3 safe
+zone. Boards are generated and flood-filled in numpy batches (one batch per
+group of positions) instead of one Board object at a time, and only one
+quarter of the board is simulated: the rest follows by reflection symmetry.
+"""
+import numpy as np
+
+from minesweeper.core.grid import box_sum
+
+# Upper bound on cells held in one batch (positions x boards x rows x cols)
+MAX_BATCH_CELLS = 4_000_000
+
+
+def _dilate(mask):
+    """Grow a batch of boolean masks by one cell in all 8 directions"""
+    rows, cols = mask.shape[1:]
+    padded = np.pad(mask, ((0, 0), (1, 1), (1, 1)))
+    grown = np.zeros_like(mask)
+    for dr in range(3):
+        for dc in range(3):
+            grown |= padded[:, dr:dr + rows, dc:dc + cols]
+    return grown
+
+
+def _safe_zone(rows, cols, r, c):
+    zone = np.zeros((rows, cols), dtype=bool)
+    zone[max(r - 1, 0):r + 2, max(c - 1, 0):c + 2] = True
+    return zone
+
+
+def generate_mine_batch(rng, rows, cols, mines, click, boards):
+    """Boolean mine layouts (boards x rows x cols) with the 3x3 around click kept clear"""
+    candidates = np.flatnonzero(~_safe_zone(rows, cols, *click).ravel())
+    # Random keys per candidate; the `mines` smallest keys get a mine (uniform sample without replacement)
+    keys = rng.random((boards, len(candidates)))
+    chosen = candidates[np.argpartition(keys, mines - 1, axis=1)[:, :mines]]
+    layout = np.zeros((boards, rows * cols), dtype=bool)
+    np.put_along_axis(layout, chosen, True, axis=1)
+    return layout.reshape(boards, rows, cols)
+
+
+def opening_from_clicks(mine_layouts, clicks):
+    """Cells revealed by clicking clicks[i] on mine_layouts[i] (all clicks must be safe)"""
+    boards = len(mine_layouts)
+    zero = ~mine_layouts & (box_sum(mine_layouts.astype(np.int8)) == 0)
+    reach = np.zeros_like(mine_layouts)
+    reach[np.arange(boards), clicks[:, 0], clicks[:, 1]] = True
+
+    # Flood fill over zero cells, all boards in lockstep
+    while True:
+        grown = _dilate(reach) & zero | reach
+        if np.array_equal(grown, reach):
+            break
+        reach = grown
+    return _dilate(reach) & ~mine_layouts
+
+
+def _fundamental_positions(rows, cols):
+    """Positions in the top-left quarter; the other quarters are mirror images"""
+    return [(r, c) for r in range((rows + 1) // 2) for c in range((cols + 1) // 2)]
+
+
+def analyse_first_clicks(rows, cols, mines, boards_per_position=200, seed=None):
+    """
+    Estimate, for every first-click cell, the expected opening size, expected
+    white cells and the probability of cascading beyond the 3x3 safe zone.
+    """
+    rng = np.random.default_rng(seed)
+    opening_mean = np.zeros((rows, cols))
+    opening_std = np.zeros((rows, cols))
+    white_mean = np.zeros((rows, cols))
+    cascade_prob = np.zeros((rows, cols))
+
+    positions = _fundamental_positions(rows, cols)
+    per_batch = max(1, MAX_BATCH_CELLS // (boards_per_position * rows * cols))
+    for start in range(0, len(positions), per_batch):
+        group = positions[start:start + per_batch]
+        layouts = np.concatenate([
+            generate_mine_batch(rng, rows, cols, mines, click, boards_per_position) for click in group
+        ])
+        clicks = np.repeat(np.array(group), boards_per_position, axis=0)
+        revealed = opening_from_clicks(layouts, clicks)
+        zero = box_sum(layouts.astype(np.int8)) == 0
+
+        sizes = revealed.sum(axis=(1, 2)).reshape(len(group), boards_per_position)
+        whites = (revealed & zero).sum(axis=(1, 2)).reshape(len(group), boards_per_position)
+        for i, (r, c) in enumerate(group):
+            zone_size = _safe_zone(rows, cols, r, c).sum()
+            opening_mean[r, c] = sizes[i].mean()
+            opening_std[r, c] = sizes[i].std()
+            white_mean[r, c] = whites[i].mean()
+            cascade_prob[r, c] = (sizes[i] > zone_size).mean()
+
+    results = {
+        'opening_mean': opening_mean,
+        'opening_std': opening_std,
+        'white_mean': white_mean,
+        'cascade_prob': cascade_prob,
+    }
+    # Fill the other three quarters by reflection
+    for grid in results.values():
+        grid[(rows + 1) // 2:, :] = grid[:rows // 2, :][::-1, :]
+        grid[:, (cols + 1) // 2:] = grid[:, :cols // 2][:, ::-1]
+    results['boards_per_position'] = boards_per_position
+    best = np.unravel_index(np.argmax(opening_mean), opening_mean.shape)
+    results['best_position'] = (int(best[0]), int(best[1]))
+    return results
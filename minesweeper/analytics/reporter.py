@@ -9,6 +9,10 @@ from reportlab.lib import colors
 import matplotlib.pyplot as plt
 import numpy as np
 
+from minesweeper.log import get_logger
+
+log = get_logger('analytics.reporter')
+
 
 class PDFReporter:
     def __init__(self):
@@ -41,7 +45,7 @@ class PDFReporter:
         if output_path is None:
             output_path = self._get_default_output_path(config)
         
-        print(f"Generating PDF report at: {output_path}")  # Debug info
+        log.info("Generating PDF report at: %s", output_path)
         
         doc = SimpleDocTemplate(
             output_path,
@@ -68,6 +72,88 @@ class PDFReporter:
         doc.build(story)
         return output_path
     
+    def generate_sweep_report(self, results, sample_size, output_path):
+        """
+        Generate a consolidated PDF report for a parameter sweep
+        """
+        log.info("Generating sweep report at: %s", output_path)
+        
+        doc = SimpleDocTemplate(
+            output_path,
+            pagesize=A4,
+            rightMargin=72,
+            leftMargin=72,
+            topMargin=72,
+            bottomMargin=72
+        )
+        
+        story = []
+        story.append(Paragraph("MINESWEEPER PARAMETER SWEEP", self.styles['Title']))
+        story.append(Spacer(1, 0.2*inch))
+        sizes = sorted({(r['rows'], r['cols']) for r in results})
+        story.append(Paragraph(
+            f"{len(results)} configurations, {sample_size} boards each. "
+            f"Board sizes: {', '.join(f'{rows}×{cols}' for rows, cols in sizes)}.",
+            self.styles['Normal']))
+        date_info = f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        story.append(Paragraph(date_info, self.styles['Italic']))
+        story.append(Spacer(1, 0.2*inch))
+        
+        for key, label in self._sweep_metrics(results):
+            story.append(Paragraph(label, self.styles['AnalyticsTitle']))
+            plot_path = self._create_sweep_plot(results, key, label)
+            story.extend(self._create_image_with_caption(plot_path, f"{label} vs mine density, per board size"))
+            story.append(Spacer(1, 0.2*inch))
+        
+        story.append(PageBreak())
+        story.append(Paragraph("Configuration Results", self.styles['Heading1']))
+        table_data = [['Size', 'Mines', 'Density'] + [label for _, label in self._sweep_metrics(results)]]
+        for r in sorted(results, key=lambda r: (r['rows'], r['cols'], r['mines'])):
+            table_data.append([f"{r['rows']}×{r['cols']}", str(r['mines']), f"{r['density']*100:.1f}%"]
+                              + [f"{r[key]:.2f}" for key, _ in self._sweep_metrics(results)])
+        sweep_table = Table(table_data, repeatRows=1)
+        sweep_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        story.append(sweep_table)
+        
+        doc.build(story)
+        return output_path
+    
+    def _sweep_metrics(self, results):
+        """Metrics plotted in sweep reports that every result provides"""
+        metrics = [
+            ('mean_white_cells', 'First-Click Opening (white cells)'),
+            ('mean_openings', 'Openings per Board'),
+            ('mean_clusters', 'Mine Clusters per Board'),
+            ('mean_bbbv', '3BV per Board'),
+            ('win_rate', 'Solver Win Rate'),
+        ]
+        return [(key, label) for key, label in metrics if all(key in r for r in results)]
+    
+    def _create_sweep_plot(self, results, key, label):
+        """Create one line per board size of a metric against mine density"""
+        fig, ax = plt.subplots(figsize=(10, 5))
+        for rows, cols in sorted({(r['rows'], r['cols']) for r in results}):
+            points = sorted((r['density'], r[key]) for r in results if (r['rows'], r['cols']) == (rows, cols))
+            densities, values = zip(*points)
+            ax.plot(np.array(densities) * 100, values, marker='o', label=f'{rows}×{cols}')
+        ax.set_xlabel('Mine Density (%)', fontsize=12)
+        ax.set_ylabel(label, fontsize=12)
+        ax.set_title(f'{label} vs Mine Density', fontsize=14, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize=10)
+        
+        plt.tight_layout()
+        temp_path = self._save_temp_plot(fig, f"sweep_{key}")
+        return temp_path
+    
     def _create_cover_page(self, config, sample_size):
         """Create the cover page with title and configuration info"""
         rows, cols, mines = config
@@ -124,6 +210,11 @@ class PDFReporter:
             ['Avg Mine Clusters', f'{np.mean(analytics_data["cluster_counts"]):.1f}', 'Average clusters per board'],
             ['Most Common Number', f'{np.argmax(analytics_data["number_freq"])}', 'Most frequent cell value']
         ]
+        if analytics_data.get('bbbv'):
+            stats_data.append(['Avg 3BV', f'{np.mean(analytics_data["bbbv"]):.1f}', 'Minimum clicks to clear a board'])
+        if analytics_data.get('forced_guesses'):
+            stats_data.append(['Avg Forced Guesses', f'{np.mean(analytics_data["forced_guesses"]):.2f}',
+                               'Guesses a solver cannot avoid'])
         
         stats_table = Table(stats_data, colWidths=[2*inch, 1.5*inch, 2.5*inch])
         stats_table.setStyle(TableStyle([
@@ -182,11 +273,122 @@ class PDFReporter:
         # Heatmap
         elements.append(Paragraph("Mine Neighborhood Heatmap", self.styles['AnalyticsTitle']))
         heatmap_plot_path = self._create_heatmap_plot(analytics_data['heatmap'], config)
-        elements.extend(self._create_image_with_caption(heatmap_plot_path,
-                    "Average number of mines in 3×3 neighborhood around each cell"))
+        if 'exact' in analytics_data:
+            heatmap_caption = "Exact expected number of mines in 3×3 neighborhood around each cell"
+        else:
+            heatmap_caption = "Average number of mines in 3×3 neighborhood around each cell"
+        elements.extend(self._create_image_with_caption(heatmap_plot_path, heatmap_caption))
+        
+        if analytics_data.get('bbbv'):
+            elements.append(PageBreak())
+            elements.extend(self._create_difficulty_analytics(analytics_data))
+        
+        if 'exact' in analytics_data:
+            elements.append(PageBreak())
+            elements.extend(self._create_exact_analytics(analytics_data))
+        
+        if 'first_click' in analytics_data:
+            elements.append(PageBreak())
+            elements.extend(self._create_first_click_analytics(analytics_data['first_click'], config))
+        
+        if 'simulation' in analytics_data:
+            elements.append(PageBreak())
+            elements.extend(self._create_simulation_analytics(analytics_data['simulation']))
         
         return elements
     
+    def _create_difficulty_analytics(self, analytics_data):
+        """Create the board difficulty section: 3BV distribution and metric table"""
+        elements = []
+        
+        elements.append(Paragraph("Board Difficulty", self.styles['AnalyticsTitle']))
+        bbbv_plot_path = self._create_bbbv_plot(analytics_data['bbbv'])
+        elements.extend(self._create_image_with_caption(bbbv_plot_path,
+                    "Distribution of 3BV (minimum clicks needed to clear the board)"))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        metrics = [('3BV', 'bbbv'), ('Openings', 'openings'), ('Isolated Numbers', 'isolated_numbers'),
+                   ('Forced Guesses', 'forced_guesses')]
+        table_data = [['Metric', 'Mean', 'Std Dev', 'Min', 'Max']]
+        for label, key in metrics:
+            values = analytics_data.get(key)
+            if values:
+                table_data.append([label, f"{np.mean(values):.2f}", f"{np.std(values):.2f}",
+                                   str(int(np.min(values))), str(int(np.max(values)))])
+        difficulty_table = Table(table_data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch, 1*inch])
+        difficulty_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(difficulty_table)
+        
+        if analytics_data.get('forced_guesses'):
+            no_guess = np.mean(np.asarray(analytics_data['forced_guesses']) == 0) * 100
+            elements.append(Spacer(1, 0.1*inch))
+            elements.append(Paragraph(
+                f"{no_guess:.1f}% of boards can be cleared from the first click without guessing.",
+                self.styles['Statistics']))
+        return elements
+    
+    def _create_bbbv_plot(self, bbbv):
+        """Create 3BV histogram"""
+        fig, ax = plt.subplots(figsize=(10, 5))
+        bins = np.arange(min(bbbv), max(bbbv) + 2) - 0.5
+        if len(bins) > 60:
+            bins = 40
+        ax.hist(bbbv, bins=bins, color='mediumpurple', edgecolor='black', alpha=0.7)
+        ax.set_xlabel('3BV', fontsize=12)
+        ax.set_ylabel('Frequency', fontsize=12)
+        ax.set_title('Distribution of 3BV per Board', fontsize=14, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        mean_val = np.mean(bbbv)
+        ax.axvline(mean_val, color='red', linestyle='--', linewidth=2, label=f'Mean: {mean_val:.1f}')
+        ax.legend(fontsize=10)
+        
+        plt.tight_layout()
+        temp_path = self._save_temp_plot(fig, "bbbv")
+        return temp_path
+    
+    def _create_exact_analytics(self, analytics_data):
+        """Create the exact-vs-Monte-Carlo comparison section"""
+        elements = []
+        check = analytics_data['cross_check']
+        
+        elements.append(Paragraph("Exact Analytics", self.styles['AnalyticsTitle']))
+        value_plot_path = self._create_value_comparison_plot(
+            analytics_data['exact']['value_distribution'],
+            np.asarray(analytics_data['value_freq']) / check['boards'])
+        elements.extend(self._create_image_with_caption(value_plot_path,
+                    "Expected safe cells per board showing each value: exact vs Monte Carlo"))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        check_data = [
+            ['Check', 'Max Abs Diff', 'Max Z-Score'],
+            ['Neighborhood heatmap', f"{check['heatmap_max_abs_diff']:.4f}", f"{check['heatmap_max_z']:.2f}"],
+            ['Value distribution', f"{check['value_max_abs_diff']:.4f}", f"{check['value_max_z']:.2f}"],
+        ]
+        check_table = Table(check_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
+        check_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(check_table)
+        elements.append(Spacer(1, 0.1*inch))
+        
+        verdict = "agree" if check['agree'] else "DISAGREE"
+        elements.append(Paragraph(
+            f"Monte Carlo ({check['boards']} boards) and exact results {verdict} "
+            f"within the expected sampling error.", self.styles['Statistics']))
+        return elements
+    
     def _create_white_cells_plot(self, white_counts):
         """Create white cells histogram plot - IMPROVED VERSION"""
         fig, ax = plt.subplots(figsize=(10, 5))  # CHANGED: Larger size
@@ -238,6 +440,128 @@ class PDFReporter:
         temp_path = self._save_temp_plot(fig, "number_freq")
         return temp_path
     
+    def _create_first_click_analytics(self, first_click, config):
+        """Create the first-click position section"""
+        elements = []
+        best_r, best_c = first_click['best_position']
+        
+        elements.append(Paragraph("First-Click Position Analysis", self.styles['AnalyticsTitle']))
+        opening_plot_path = self._create_position_plot(
+            first_click['opening_mean'], config, 'Expected Opening Size', 'Cells revealed',
+            'Blues', first_click['best_position'])
+        elements.extend(self._create_image_with_caption(opening_plot_path,
+                    "Expected number of cells revealed by a first click on each cell"))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        cascade_plot_path = self._create_position_plot(
+            first_click['cascade_prob'], config, 'Cascade Probability', 'Probability', 'Greens')
+        elements.extend(self._create_image_with_caption(cascade_plot_path,
+                    "Probability that a first click on each cell opens beyond its 3×3 safe zone"))
+        elements.append(Spacer(1, 0.1*inch))
+        
+        elements.append(Paragraph(
+            f"Best first click: row {best_r}, column {best_c} "
+            f"({first_click['opening_mean'][best_r][best_c]:.1f} cells on average, "
+            f"{first_click['boards_per_position']} boards per position).", self.styles['Statistics']))
+        return elements
+    
+    def _create_simulation_analytics(self, simulation):
+        """Create the bot simulation section: win rates and per-game means per strategy"""
+        elements = []
+        strategies = simulation['strategies']
+        
+        elements.append(Paragraph("Full-Game Simulation", self.styles['AnalyticsTitle']))
+        win_plot_path = self._create_win_rate_plot(strategies)
+        elements.extend(self._create_image_with_caption(win_plot_path,
+                    "Win rate per bot strategy with 95% confidence intervals"))
+        elements.append(Spacer(1, 0.2*inch))
+        
+        table_data = [['Strategy', 'Games', 'Win Rate', '95% CI', 'Clicks', 'Guesses', 'Cleared', 'ms/Game']]
+        for name, summary in strategies.items():
+            low, high = summary['win_rate_ci']
+            table_data.append([
+                name.capitalize(), f"{summary['games']:,}", f"{summary['win_rate']*100:.1f}%",
+                f"{low*100:.1f}-{high*100:.1f}%", f"{summary['mean_clicks']:.1f}",
+                f"{summary['mean_guesses']:.2f}", f"{summary['mean_safe_revealed']*100:.1f}%",
+                f"{summary['mean_duration_ms']:.2f}"])
+        sim_table = Table(table_data, repeatRows=1)
+        sim_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(sim_table)
+        elements.append(Spacer(1, 0.1*inch))
+        
+        elements.append(Paragraph(
+            f"Guesses exclude the first click; cleared is the share of safe cells revealed. "
+            f"{simulation['games_per_second']:,.0f} games per second overall.", self.styles['Statistics']))
+        return elements
+    
+    def _create_win_rate_plot(self, strategies):
+        """Create a bar chart of win rates with confidence interval error bars"""
+        fig, ax = plt.subplots(figsize=(10, 5))
+        names = list(strategies)
+        rates = np.array([strategies[name]['win_rate'] for name in names]) * 100
+        lows = np.array([strategies[name]['win_rate_ci'][0] for name in names]) * 100
+        highs = np.array([strategies[name]['win_rate_ci'][1] for name in names]) * 100
+        ax.bar(names, rates, yerr=[rates - lows, highs - rates], capsize=8,
+               color='skyblue', edgecolor='black', alpha=0.7)
+        ax.set_xlabel('Strategy', fontsize=12)
+        ax.set_ylabel('Win Rate (%)', fontsize=12)
+        ax.set_title('Win Rate by Strategy', fontsize=14, fontweight='bold')
+        ax.set_ylim(0, 100)
+        ax.grid(True, axis='y', alpha=0.3)
+        
+        plt.tight_layout()
+        temp_path = self._save_temp_plot(fig, "win_rate")
+        return temp_path
+    
+    def _create_position_plot(self, grid, config, title, label, cmap, marker=None):
+        """Create a per-cell heatmap, optionally marking one position"""
+        rows, cols, _ = config
+        fig, ax = plt.subplots(figsize=(12, 8))
+        
+        im = ax.imshow(grid, cmap=cmap, aspect='auto')
+        ax.set_xlabel('Column', fontsize=12)
+        ax.set_ylabel('Row', fontsize=12)
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        if marker is not None:
+            ax.plot(marker[1], marker[0], marker='*', color='red', markersize=16)
+        
+        if cols > 20:
+            ax.set_xticks(range(0, cols, max(1, cols // 10)))
+        if rows > 20:
+            ax.set_yticks(range(0, rows, max(1, rows // 10)))
+        
+        cbar = plt.colorbar(im, ax=ax, shrink=0.8)
+        cbar.set_label(label, fontsize=10)
+        
+        plt.tight_layout()
+        temp_path = self._save_temp_plot(fig, f"position_{title.lower().replace(' ', '_')}")
+        return temp_path
+    
+    def _create_value_comparison_plot(self, exact_values, mc_values):
+        """Create side-by-side bars of exact and Monte Carlo value frequencies"""
+        fig, ax = plt.subplots(figsize=(10, 5))
+        values = np.arange(9)
+        width = 0.4
+        ax.bar(values - width/2, exact_values, width, color='darkblue', alpha=0.7, label='Exact')
+        ax.bar(values + width/2, mc_values, width, color='skyblue', edgecolor='black', alpha=0.7, label='Monte Carlo')
+        ax.set_xlabel('Cell Value (Number of Adjacent Mines)', fontsize=12)
+        ax.set_ylabel('Cells per Board', fontsize=12)
+        ax.set_title('Cell Values: Exact vs Monte Carlo', fontsize=14, fontweight='bold')
+        ax.set_xticks(values)
+        ax.legend(fontsize=10)
+        
+        plt.tight_layout()
+        temp_path = self._save_temp_plot(fig, "value_comparison")
+        return temp_path
+    
     def _create_cluster_plot(self, cluster_counts):
         """Create mine clusters histogram - IMPROVED VERSION"""
         fig, ax = plt.subplots(figsize=(10, 5))  # CHANGED: Larger size
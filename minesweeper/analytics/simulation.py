@@ -0,0 +1,101 @@
+# minesweeper/analytics/simulation.py
+"""
+Headless full-game simulation.
+
+Bots (see core.simulation) play complete games through Game.autoplay and
+every game is recorded: outcome, clicks, guesses and time taken. Games are
+split into fixed-size chunks with their own seeds, so a seeded run gives
+the same results whatever the number of workers. Within a chunk every
+strategy plays the same sequence of mine seeds, so strategies that share a
+first click also share their boards.
+"""
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from minesweeper.core.game import Game
+from minesweeper.core.simulation import DEFAULT_STRATEGIES, STRATEGIES
+
+# Games per unit of work
+CHUNK_SIZE = 200
+
+# z for 95% confidence intervals
+Z_95 = 1.959964
+
+
+def _simulate_games(rows, cols, mines, strategy_name, n, seed):
+    """Play n games with one strategy (runs inside worker processes)"""
+    strategy = STRATEGIES[strategy_name](random.Random(f"{seed}-strategy"))
+    records = {'won': [], 'clicks': [], 'guesses': [], 'duration': [], 'safe_revealed': []}
+    for i in range(n):
+        game = Game(rows, cols, mines, rng=random.Random(f"{seed}-{i}"))
+        record = game.autoplay(strategy)
+        for key, values in records.items():
+            values.append(record[key])
+    return strategy_name, records
+
+
+def wilson_interval(wins, games, z=Z_95):
+    """Wilson score interval for a win rate"""
+    if not games:
+        return 0.0, 0.0
+    p = wins / games
+    centre = (p + z * z / (2 * games)) / (1 + z * z / games)
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def summarize_games(records):
+    """Win rate with 95% interval and per-game means of one strategy's records"""
+    games = len(records['won'])
+    wins = int(sum(records['won']))
+    low, high = wilson_interval(wins, games)
+    return {
+        'games': games,
+        'wins': wins,
+        'win_rate': wins / games if games else 0.0,
+        'win_rate_ci': (low, high),
+        'mean_clicks': float(np.mean(records['clicks'])),
+        'mean_guesses': float(np.mean(records['guesses'])),
+        'mean_duration_ms': 1000 * float(np.mean(records['duration'])),
+        'mean_safe_revealed': float(np.mean(records['safe_revealed'])),
+    }
+
+
+def run_simulation(rows, cols, mines, games, strategies=DEFAULT_STRATEGIES, workers=1, seed=None):
+    """Play `games` games per strategy and summarise each strategy"""
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies {unknown}; choose from {list(STRATEGIES)}")
+
+    rng = random.Random(seed)
+    chunks = []
+    remaining = games
+    while remaining > 0:
+        n = min(CHUNK_SIZE, remaining)
+        chunk_seed = rng.getrandbits(64)
+        chunks.extend((rows, cols, mines, name, n, chunk_seed) for name in strategies)
+        remaining -= n
+
+    start = time.perf_counter()
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_games, *zip(*chunks)))
+    else:
+        parts = [_simulate_games(*chunk) for chunk in chunks]
+    elapsed = time.perf_counter() - start
+
+    merged = {name: {} for name in strategies}
+    for name, records in parts:
+        for key, values in records.items():
+            merged[name].setdefault(key, []).extend(values)
+    played = games * len(strategies)
+    return {
+        'config': (rows, cols, mines),
+        'strategies': {name: summarize_games(records) for name, records in merged.items()},
+        'elapsed': elapsed,
+        'games_per_second': played / elapsed if elapsed > 0 else 0.0,
+    }
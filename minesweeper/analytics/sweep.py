@@ -0,0 +1,254 @@
+# minesweeper/analytics/sweep.py
+"""
+Parameter sweeps over board sizes and mine densities.
+
+    python -m minesweeper.analytics.sweep --sizes 9x9,16x16,16x30 \\
+        --densities 0.10:0.25:0.025 --samples 500 --workers 8 --seed 1
+
+Every configuration is simulated once and its summary cached on disk, keyed
+by (rows, cols, mines, samples, seed, strategy). Besides the board metrics,
+the summary has the win rate of a solver (--strategy, see core.simulation)
+playing `samples` full games of the configuration. Extending a sweep with
+new sizes or densities only simulates the configurations that are not
+cached yet.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from minesweeper import log
+from minesweeper.core.game import DIFFICULTIES
+from minesweeper.core.simulation import STRATEGIES
+from minesweeper.analytics.analyzer import AnalyticsRunner
+from minesweeper.analytics.simulation import run_simulation
+
+DEFAULT_CACHE_DIR = os.path.join("analytics_reports", "sweep_cache")
+
+# Per-board columns averaged into each configuration's summary
+SUMMARY_COLUMNS = ('white_cells', 'openings', 'clusters', 'largest_cluster', 'bbbv')
+
+# Solver whose win rate is reported per configuration
+DEFAULT_STRATEGY = 'probability'
+
+
+def sweep_configs(sizes, densities):
+    """Every (rows, cols, mines) combination for the given sizes and mine densities
+
+    Sizes with no room for a mine outside the 3x3 safe zone are skipped.
+    """
+    configs = []
+    for rows, cols in sizes:
+        if not valid_size(rows, cols):
+            continue
+        for density in densities:
+            mines = min(max(1, round(density * rows * cols)), rows * cols - 9)
+            if (rows, cols, mines) not in configs:
+                configs.append((rows, cols, mines))
+    return configs
+
+
+def valid_size(rows, cols):
+    """Whether a board has room for at least one mine outside the first click's 3x3"""
+    return rows >= 3 and cols >= 3 and rows * cols > 9
+
+
+def config_seed(seed, config):
+    """Seed for one configuration, independent of which other configs are in the sweep"""
+    rows, cols, mines = config
+    return random.Random(f"{seed}-{rows}x{cols}-{mines}").getrandbits(64)
+
+
+class _SummaryCollector:
+    """Record writer that keeps only running sums of the per-board columns"""
+    def __init__(self):
+        self.count = 0
+        self.sums = {name: 0.0 for name in SUMMARY_COLUMNS}
+        self.squares = {name: 0.0 for name in SUMMARY_COLUMNS}
+
+    def write_chunk(self, records):
+        self.count += len(records[SUMMARY_COLUMNS[0]])
+        for name in SUMMARY_COLUMNS:
+            values = np.asarray(records[name], dtype=np.float64)
+            self.sums[name] += values.sum()
+            self.squares[name] += (values ** 2).sum()
+
+    def summary(self):
+        result = {}
+        for name in SUMMARY_COLUMNS:
+            mean = self.sums[name] / self.count
+            result[f'mean_{name}'] = mean
+            result[f'std_{name}'] = float(np.sqrt(max(self.squares[name] / self.count - mean ** 2, 0.0)))
+        return result
+
+
+def run_config(rows, cols, mines, samples, seed, strategy=DEFAULT_STRATEGY):
+    """Simulate one configuration and return its summary (runs inside worker processes)"""
+    collector = _SummaryCollector()
+    runner = AnalyticsRunner(seed=seed, quiet=True)
+    runner.run_analytics(rows, cols, mines, samples, record_writer=collector)
+    games = run_simulation(rows, cols, mines, samples, strategies=(strategy,), seed=seed)['strategies'][strategy]
+    summary = {
+        'rows': rows,
+        'cols': cols,
+        'mines': mines,
+        'density': mines / (rows * cols),
+        'samples': samples,
+        'strategy': strategy,
+        'win_rate': games['win_rate'],
+        'win_rate_ci': list(games['win_rate_ci']),
+    }
+    summary.update(collector.summary())
+    return summary
+
+
+class SweepRunner:
+    def __init__(self, samples=500, seed=0, workers=1, cache_dir=DEFAULT_CACHE_DIR, strategy=DEFAULT_STRATEGY):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r}; choose from {list(STRATEGIES)}")
+        self.samples = samples
+        self.seed = seed
+        self.strategy = strategy
+        self.workers = max(1, workers)
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _cache_path(self, config):
+        rows, cols, mines = config
+        return os.path.join(self.cache_dir, f"{rows}x{cols}_{mines}_{self.samples}s_{self.seed}_{self.strategy}.json")
+
+    def _load_cached(self, config):
+        path = self._cache_path(config)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, config, summary):
+        # Write then rename so a concurrent sweep never reads a half-written file
+        path = self._cache_path(config)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(summary, f)
+        os.replace(temp_path, path)
+
+    def run(self, configs):
+        """Return one summary per configuration, simulating only uncached ones"""
+        results = {}
+        missing = []
+        for config in configs:
+            cached = self._load_cached(config)
+            if cached is None:
+                missing.append(config)
+            else:
+                results[config] = cached
+
+        if self.workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    pool.submit(run_config, *config, self.samples, config_seed(self.seed, config), self.strategy): config
+                    for config in missing
+                }
+                for future in as_completed(futures):
+                    config = futures[future]
+                    results[config] = future.result()
+                    self._store(config, results[config])
+        else:
+            for config in missing:
+                results[config] = run_config(*config, self.samples, config_seed(self.seed, config), self.strategy)
+                self._store(config, results[config])
+
+        return [results[config] for config in configs]
+
+
+def parse_sizes(value):
+    """Board sizes such as 9x9,16x30; difficulty names use their preset size"""
+    try:
+        sizes = []
+        for item in value.split(','):
+            item = item.strip().lower()
+            if item in DIFFICULTIES:
+                sizes.append(DIFFICULTIES[item][:2])
+                continue
+            rows, cols = item.split('x')
+            sizes.append((int(rows), int(cols)))
+        return sizes
+    except ValueError:
+        raise argparse.ArgumentTypeError("sizes must look like 9x9,16x16,16x30 or easy,medium,hard")
+
+
+def parse_densities(value):
+    """Either a comma-separated list or start:stop:step (stop inclusive)"""
+    try:
+        if ':' in value:
+            start, stop, step = (float(part) for part in value.split(':'))
+            count = int(round((stop - start) / step)) + 1
+            return [round(start + i * step, 6) for i in range(count)]
+        return [float(part) for part in value.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError("densities must be a list (0.1,0.15) or a range (0.1:0.25:0.05)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m minesweeper.analytics.sweep",
+        description="Sweep board analytics over sizes and mine densities.")
+    parser.add_argument('--sizes', type=parse_sizes, required=True, help="e.g. 9x9,16x16,16x30")
+    parser.add_argument('--densities', type=parse_densities, required=True,
+                        help="mine densities as a list (0.1,0.2) or range (0.1:0.25:0.05)")
+    parser.add_argument('--samples', type=int, default=500, help="boards (and solver games) per configuration")
+    parser.add_argument('--strategy', choices=list(STRATEGIES), default=DEFAULT_STRATEGY,
+                        help="solver whose win rate is reported (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--format', dest='formats', default='pdf,json',
+                        help="comma-separated outputs (pdf, json); default: pdf,json")
+    parser.add_argument('--output-dir', default="analytics_reports")
+    log.add_arguments(parser)
+    args = parser.parse_args(argv)
+    log.configure(args.log_level, args.log_format)
+
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    if any(fmt not in ('pdf', 'json') for fmt in formats):
+        parser.error("--format accepts pdf and json")
+    if args.samples < 1:
+        parser.error("--samples must be positive")
+    bad_sizes = [f"{rows}x{cols}" for rows, cols in args.sizes if not valid_size(rows, cols)]
+    if bad_sizes:
+        parser.error(f"--sizes must be at least 3x3 with more than 9 cells: {', '.join(bad_sizes)}")
+
+    configs = sweep_configs(args.sizes, args.densities)
+    sweeper = SweepRunner(samples=args.samples, seed=args.seed, workers=args.workers,
+                          cache_dir=args.cache_dir, strategy=args.strategy)
+    results = sweeper.run(configs)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base = os.path.join(args.output_dir, f"minesweeper_sweep_{timestamp}")
+    outputs = {}
+    if 'json' in formats:
+        outputs['json'] = f"{base}.json"
+        with open(outputs['json'], 'w') as f:
+            json.dump({'samples': args.samples, 'seed': args.seed, 'strategy': args.strategy, 'results': results}, f)
+    if 'pdf' in formats:
+        import matplotlib
+        matplotlib.use('Agg')
+        from minesweeper.analytics.reporter import PDFReporter
+        outputs['pdf'] = PDFReporter().generate_sweep_report(results, args.samples, f"{base}.pdf")
+
+    json.dump({'configs': len(configs), 'outputs': outputs}, sys.stdout)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
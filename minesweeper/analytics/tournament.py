@@ -0,0 +1,266 @@
+# minesweeper/analytics/tournament.py
+"""
+Strategy tournaments on identical board sets.
+
+    python -m minesweeper.analytics.tournament --preset hard --boards 2000 --seed 1 \\
+        --strategies deduction,probability,deduction_sets --baseline deduction --workers 4
+
+A board set (mine layouts plus the first click of every board) is generated
+once from a seed, or loaded from an .npz saved earlier so later code can be
+measured on exactly the same boards. Every strategy then plays every board
+from the same first click. Worker processes read the set from one shared
+memory block instead of receiving a copy per task.
+
+Because the boards are shared, strategies are compared pairwise per board:
+the win-rate difference to the baseline gets a paired confidence interval,
+which is much narrower than comparing two independent win rates. The time
+of every strategy decision is recorded too, so a solver change that keeps
+its strength but loses speed shows up as well.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from minesweeper import log
+from minesweeper.core.game import DIFFICULTIES, Game
+from minesweeper.core.simulation import STRATEGIES
+from minesweeper.analytics.first_click import generate_mine_batch
+from minesweeper.analytics.simulation import Z_95, summarize_games
+
+# Boards per unit of work
+CHUNK_SIZE = 100
+
+FIRST_CLICK_MODES = ('centre', 'random')
+
+# Per-process view of the shared board set (set in workers by _init_worker)
+_shared = None
+
+
+class BoardSet:
+    """Mine layouts (boards x rows x cols, bool) and first clicks (boards x 2)"""
+
+    def __init__(self, layouts, clicks, mines):
+        self.layouts = layouts
+        self.clicks = clicks
+        self.mines = mines
+
+    @property
+    def config(self):
+        return self.layouts.shape[1], self.layouts.shape[2], self.mines
+
+    def __len__(self):
+        return len(self.layouts)
+
+    @classmethod
+    def generate(cls, rows, cols, mines, boards, seed=None, first_click='centre'):
+        if first_click not in FIRST_CLICK_MODES:
+            raise ValueError(f"first_click must be one of {FIRST_CLICK_MODES}")
+        rng = np.random.default_rng(seed)
+        if first_click == 'centre':
+            clicks = np.tile(np.array([rows // 2, cols // 2], dtype=np.int32), (boards, 1))
+            layouts = generate_mine_batch(rng, rows, cols, mines, (rows // 2, cols // 2), boards)
+        else:
+            clicks = np.stack([rng.integers(rows, size=boards), rng.integers(cols, size=boards)],
+                              axis=1).astype(np.int32)
+            layouts = np.concatenate([generate_mine_batch(rng, rows, cols, mines, tuple(click), 1)
+                                      for click in clicks])
+        return cls(layouts, clicks, mines)
+
+    def save(self, path):
+        np.savez_compressed(path, layouts=self.layouts, clicks=self.clicks, mines=self.mines)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['layouts'], data['clicks'], int(data['mines']))
+
+    def share(self):
+        """Copy the set into a new shared memory block; returns (block, spec for attach)"""
+        layouts_size = self.layouts.nbytes
+        block = shared_memory.SharedMemory(create=True, size=layouts_size + self.clicks.nbytes)
+        view = _views(block.buf, self.layouts.shape, self.clicks.shape)
+        view[0][:] = self.layouts
+        view[1][:] = self.clicks
+        return block, (block.name, self.layouts.shape, self.clicks.shape, self.mines)
+
+    @classmethod
+    def attach(cls, spec):
+        """Board set backed by an existing shared memory block (no copy); returns (block, set)"""
+        name, layouts_shape, clicks_shape, mines = spec
+        block = shared_memory.SharedMemory(name=name)
+        layouts, clicks = _views(block.buf, layouts_shape, clicks_shape)
+        return block, cls(layouts, clicks, mines)
+
+
+def _views(buffer, layouts_shape, clicks_shape):
+    layouts = np.ndarray(layouts_shape, dtype=bool, buffer=buffer)
+    clicks = np.ndarray(clicks_shape, dtype=np.int32, buffer=buffer, offset=layouts.nbytes)
+    return layouts, clicks
+
+
+def _init_worker(spec):
+    global _shared
+    # Keep the block referenced: the arrays are views into it
+    _shared = BoardSet.attach(spec)
+
+
+def play_boards(board_set, strategy_name, start, stop, seed):
+    """Play boards [start, stop) of a set with one strategy
+
+    The strategy's random choices are seeded per board, so results don't
+    depend on how the set is split into chunks.
+    """
+    rows, cols, mines = board_set.config
+    records = {'won': [], 'clicks': [], 'guesses': [], 'duration': [], 'safe_revealed': []}
+    move_times = []
+    for i in range(start, stop):
+        strategy = STRATEGIES[strategy_name](random.Random(f"{seed}-{i}"))
+        layout = [tuple(cell) for cell in np.argwhere(board_set.layouts[i]).tolist()]
+        game = Game(rows, cols, mines, layout=layout)
+        record = game.autoplay(strategy, first_click=tuple(board_set.clicks[i].tolist()))
+        for key, values in records.items():
+            values.append(record[key])
+        move_times.extend(record['move_times'])
+    return strategy_name, start, records, move_times
+
+
+def _play_shared(strategy_name, start, stop, seed):
+    return play_boards(_shared[1], strategy_name, start, stop, seed)
+
+
+def paired_comparison(won, baseline_won, z=Z_95):
+    """Win-rate difference to the baseline on the same boards, with a paired interval"""
+    diffs = np.asarray(won, dtype=float) - np.asarray(baseline_won, dtype=float)
+    n = len(diffs)
+    delta = float(diffs.mean())
+    half = z * float(diffs.std(ddof=1)) / math.sqrt(n) if n > 1 else 0.0
+    return {
+        'win_rate_delta': delta,
+        'win_rate_delta_ci': (delta - half, delta + half),
+        'only_strategy_won': int(np.sum(diffs > 0)),
+        'only_baseline_won': int(np.sum(diffs < 0)),
+    }
+
+
+def latency_summary(move_times):
+    """Per-decision strategy latency in milliseconds"""
+    if not move_times:
+        return {'moves': 0, 'mean_ms': 0.0, 'median_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    ms = np.asarray(move_times) * 1000
+    return {
+        'moves': len(ms),
+        'mean_ms': float(ms.mean()),
+        'median_ms': float(np.median(ms)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def run_tournament(board_set, strategies, baseline=None, workers=1, seed=0):
+    """Play every board of the set with every strategy and compare them to the baseline"""
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies {unknown}; choose from {list(STRATEGIES)}")
+    baseline = baseline or strategies[0]
+    if baseline not in strategies:
+        raise ValueError(f"baseline {baseline!r} is not one of the strategies")
+
+    tasks = [(name, start, min(start + CHUNK_SIZE, len(board_set)), seed)
+             for name in strategies for start in range(0, len(board_set), CHUNK_SIZE)]
+    start_time = time.perf_counter()
+    if workers > 1 and len(tasks) > 1:
+        block, spec = board_set.share()
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec,)) as pool:
+                parts = list(pool.map(_play_shared, *zip(*tasks)))
+        finally:
+            block.close()
+            block.unlink()
+    else:
+        parts = [play_boards(board_set, *task) for task in tasks]
+    elapsed = time.perf_counter() - start_time
+
+    # Reassemble in board order so results can be paired board by board
+    merged = {name: {} for name in strategies}
+    latencies = {name: [] for name in strategies}
+    for name, _, records, move_times in sorted(parts, key=lambda part: (part[0], part[1])):
+        for key, values in records.items():
+            merged[name].setdefault(key, []).extend(values)
+        latencies[name].extend(move_times)
+
+    results = {}
+    for name in strategies:
+        results[name] = summarize_games(merged[name])
+        results[name]['latency'] = latency_summary(latencies[name])
+    comparisons = {name: paired_comparison(merged[name]['won'], merged[baseline]['won'])
+                   for name in strategies if name != baseline}
+    return {
+        'config': board_set.config,
+        'boards': len(board_set),
+        'baseline': baseline,
+        'strategies': results,
+        'comparisons': comparisons,
+        'elapsed': elapsed,
+    }
+
+
+def parse_strategies(value):
+    strategies = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in strategies if name not in STRATEGIES]
+    if unknown or not strategies:
+        raise argparse.ArgumentTypeError(
+            f"strategies must be a comma-separated list of: {', '.join(STRATEGIES)}")
+    return strategies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m minesweeper.analytics.tournament",
+        description="Play bot strategies on the same seeded boards and compare them.")
+    parser.add_argument('--preset', choices=sorted(DIFFICULTIES), default='hard')
+    parser.add_argument('--boards', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--first-click', choices=FIRST_CLICK_MODES, default='centre')
+    parser.add_argument('--board-set', metavar='NPZ',
+                        help="load the board set from this file, or generate and save it there")
+    parser.add_argument('--strategies', type=parse_strategies, default=['deduction', 'probability'],
+                        help=f"comma-separated ({', '.join(STRATEGIES)}); default: deduction,probability")
+    parser.add_argument('--baseline', help="strategy the others are compared to; default: the first")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', help="also write the results to this JSON file")
+    log.add_arguments(parser)
+    args = parser.parse_args(argv)
+    log.configure(args.log_level, args.log_format)
+
+    if args.boards < 1:
+        parser.error("--boards must be positive")
+    if args.baseline and args.baseline not in args.strategies:
+        parser.error("--baseline must be one of --strategies")
+
+    if args.board_set and os.path.exists(args.board_set):
+        board_set = BoardSet.load(args.board_set)
+    else:
+        board_set = BoardSet.generate(*DIFFICULTIES[args.preset], args.boards, args.seed, args.first_click)
+        if args.board_set:
+            board_set.save(args.board_set)
+
+    results = run_tournament(board_set, args.strategies, args.baseline, args.workers, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+# minesweeper/core/bitboard.py
+"""
+Bitmask view of a Board for the solver.
+
+Cells are numbered by flat index (r * cols + c). Board-wide sets of cells
+(revealed, flagged, deduced) are Python ints with one bit per cell.
+
+A revealed number only ever constrains its 8 neighbours, so constraint
+masks use a small 3x3 window around their number cell instead: bit
+3 * (dr + 1) + (dc + 1) stands for the cell at offset (dr, dc) and the
+centre bit is never set. Window masks are below 512, which keeps subset
+tests, differences and popcounts on small ints. Two windows up to two
+cells apart overlap; SHIFTS translates a window mask into the frame of
+the other number cell so the two can be compared directly. The 5x5 ring
+of cells whose windows can overlap a cell's uses a 25-bit ring mask with
+bit 5 * (dr + 2) + (dc + 2) for offset (dr, dc).
+
+Per-cell tables (in-bounds window and ring, flat neighbour masks) are
+precomputed once per board size.
+"""
+from functools import lru_cache
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(mask):
+        return bin(mask).count('1')
+
+# Window bit k <-> offset (k // 3 - 1, k % 3 - 1); the opposite offset is bit 8 - k
+WINDOW_OFFSETS = tuple((k // 3 - 1, k % 3 - 1) for k in range(9))
+WINDOW_BITS = tuple(tuple(k for k in range(9) if mask >> k & 1) for mask in range(512))
+
+
+def _shift_table(dr, dc):
+    """Window mask around a cell -> the same cells' mask around the cell at (dr, dc) from it"""
+    table = []
+    for mask in range(512):
+        moved = 0
+        for k in WINDOW_BITS[mask]:
+            r, c = WINDOW_OFFSETS[k]
+            r, c = r - dr, c - dc
+            if -1 <= r <= 1 and -1 <= c <= 1:
+                moved |= 1 << (3 * (r + 1) + c + 1)
+        table.append(moved)
+    return tuple(table)
+
+
+SHIFTS = {(dr, dc): _shift_table(dr, dc)
+          for dr in range(-2, 3) for dc in range(-2, 3) if (dr, dc) != (0, 0)}
+
+# Ring bit j <-> offset (j // 5 - 2, j % 5 - 2), with the SHIFTS to that cell and back
+RING_OFFSETS = tuple((j // 5 - 2, j % 5 - 2) for j in range(25))
+RING_SHIFTS = tuple((SHIFTS[(dr, dc)], SHIFTS[(-dr, -dc)]) if (dr, dc) != (0, 0) else None
+                    for dr, dc in RING_OFFSETS)
+
+
+def _to_ring(k, window):
+    """Ring mask of a window mask taken around the cell at window bit k"""
+    r, c = WINDOW_OFFSETS[k]
+    ring = 0
+    for j in WINDOW_BITS[window]:
+        dr, dc = WINDOW_OFFSETS[j]
+        ring |= 1 << (5 * (r + dr + 2) + c + dc + 2)
+    return ring
+
+
+# TO_RING[k][window]: a window around the neighbour at bit k, re-expressed in the ring of the centre cell
+TO_RING = tuple(tuple(_to_ring(k, window) for window in range(512)) for k in range(9))
+RING_CENTRE = 1 << 12
+
+
+def iter_bits(mask):
+    """Flat indices of the set bits, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _in_bounds_mask(rows, cols, r, c, offsets):
+    mask = 0
+    for bit, (dr, dc) in enumerate(offsets):
+        if (dr, dc) != (0, 0) and 0 <= r + dr < rows and 0 <= c + dc < cols:
+            mask |= 1 << bit
+    return mask
+
+
+@lru_cache(maxsize=16)
+def _tables(rows, cols):
+    windows = []
+    rings = []
+    neighbour_masks = []
+    for r in range(rows):
+        for c in range(cols):
+            window = _in_bounds_mask(rows, cols, r, c, WINDOW_OFFSETS)
+            windows.append(window)
+            rings.append(_in_bounds_mask(rows, cols, r, c, RING_OFFSETS))
+            neighbour_masks.append(sum(1 << ((r + dr) * cols + c + dc)
+                                       for dr, dc in (WINDOW_OFFSETS[k] for k in WINDOW_BITS[window])))
+    return tuple(windows), tuple(rings), tuple(neighbour_masks)
+
+
+class BitBoard:
+    def __init__(self, board):
+        self.board = board
+        self.rows = board.rows
+        self.cols = board.cols
+        self.size = board.rows * board.cols
+        # In-bounds neighbours / ring of every cell as window / ring masks, and the neighbours as flat masks
+        self.windows, self.rings, self.neighbour_masks = _tables(self.rows, self.cols)
+        # Flat index offsets of the window and ring bits
+        self.deltas = tuple(dr * self.cols + dc for dr, dc in WINDOW_OFFSETS)
+        self.ring_deltas = tuple(dr * self.cols + dc for dr, dc in RING_OFFSETS)
+        self._span = (1 << (2 * self.cols + 3)) - 1
+
+    def index(self, r, c):
+        return r * self.cols + c
+
+    def cell(self, index):
+        return divmod(index, self.cols)
+
+    def window(self, mask, index):
+        """The 3x3 window of a flat mask around cell `index`, as a window mask"""
+        cols = self.cols
+        start = index - cols - 1
+        # Cut the three rows out first so the remaining shifts work on a small int
+        rows = (mask >> start if start >= 0 else mask << -start) & self._span
+        return (rows & 7 | (rows >> cols & 7) << 3 | (rows >> 2 * cols & 7) << 6) & self.windows[index]
+
+    def window_indices(self, index, window):
+        """Flat indices of the cells of a window mask around cell `index`"""
+        deltas = self.deltas
+        return [index + deltas[k] for k in WINDOW_BITS[window]]
+
+    def mask_of(self, cells):
+        mask = 0
+        for r, c in cells:
+            mask |= 1 << (r * self.cols + c)
+        return mask
+
+    def cells_of(self, mask):
+        return {divmod(index, self.cols) for index in iter_bits(mask)}
+
+    def revealed_mask(self):
+        return self._mask_where(lambda cell: cell.revealed)
+
+    def marked_mask(self):
+        return self._mask_where(lambda cell: cell.marked and not cell.revealed)
+
+    def _mask_where(self, predicate):
+        mask = 0
+        bit = 1
+        for row in self.board.grid:
+            for cell in row:
+                if predicate(cell):
+                    mask |= bit
+                bit <<= 1
+        return mask
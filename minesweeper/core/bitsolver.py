@@ -0,0 +1,277 @@
+# minesweeper/core/bitsolver.py
+"""
+Solver with bitmask constraints.
+
+Same rules and interface as solver.Solver, but state is kept as bitmasks
+over a BitBoard: revealed, flagged and deduced cells as flat board masks,
+and each constraint as a 3x3 window mask around its number cell.
+Rebuilding a constraint, removing a deduced cell and the pairwise overlap
+test are then a few operations on small ints and table lookups instead of
+set arithmetic on (r, c) tuples.
+
+    python benchmarks/solver_bench.py   # compare against solver.Solver
+"""
+from minesweeper.core.bitboard import RING_CENTRE, RING_SHIFTS, TO_RING, WINDOW_BITS, BitBoard, iter_bits, popcount
+from minesweeper.core.components import BudgetExceeded, constraint_components
+from minesweeper.core.solver import Constraint, constrained_numbers
+
+
+class BitsetSolver:
+    def __init__(self, board, trust_flags=True, pattern_cache=None, max_pattern_cells=16):
+        self.board = board
+        self.bits = BitBoard(board)
+        self.trust_flags = trust_flags
+        self.pattern_cache = pattern_cache
+        self.max_pattern_cells = max_pattern_cells
+        self.masks = {}            # number cell index -> window mask of its unknown neighbours
+        self.mines = {}            # number cell index -> mines left among them
+        self.owners = [0] * self.bits.size   # cell index -> window mask of the number cells constraining it
+        self.revealed = 0
+        self.flagged = 0
+        self.safe_mask = 0         # deduced safe, not revealed yet
+        self.mine_mask = 0         # deduced mines
+        self.taken = 0             # hidden cells counted as mines: deduced, and flagged if trusted
+        self.blocked = 0           # cells that can't be in a constraint: revealed, deduced safe or taken
+        self.known_safe = set()    # the same two sets as (r, c) tuples
+        self.known_mines = set()
+        self.contradictions = set()
+        self._dirty = set()
+        self.sync()
+
+    # ------------------------------------------------------------------
+    # Visible state
+
+    @property
+    def constraints(self):
+        """{number cell: Constraint} in (r, c) coordinates, as solver.Solver exposes it"""
+        cols = self.bits.cols
+        return {divmod(number, cols): Constraint({divmod(index, cols) for index in self.bits.window_indices(number, window)},
+                                                 self.mines[number])
+                for number, window in self.masks.items()}
+
+    def _drop(self, number):
+        window = self.masks.pop(number, None)
+        if window is None:
+            return
+        del self.mines[number]
+        # The cell at window bit k sees this number cell at bit 8 - k of its own window
+        owners, deltas = self.owners, self.bits.deltas
+        for k in WINDOW_BITS[window]:
+            owners[number + deltas[k]] &= ~(1 << (8 - k))
+
+    def _rebuild(self, number):
+        """Recompute the constraint of one revealed number cell from the masks"""
+        if number in self.masks:
+            self._drop(number)
+        r, c = divmod(number, self.bits.cols)
+        self.contradictions.discard((r, c))
+
+        cell = self.board.grid[r][c]
+        if not cell.revealed or cell.is_mine:
+            return
+
+        mines = cell.value - popcount(self.bits.window(self.taken, number))
+        unknown = self.bits.windows[number] & ~self.bits.window(self.blocked, number)
+
+        if mines < 0 or mines > popcount(unknown):
+            self.contradictions.add((r, c))
+            return
+        if not unknown:
+            return
+
+        self.masks[number] = unknown
+        self.mines[number] = mines
+        owners, deltas = self.owners, self.bits.deltas
+        for k in WINDOW_BITS[unknown]:
+            owners[number + deltas[k]] |= 1 << (8 - k)
+        self._dirty.add(number)
+
+    def sync(self):
+        """Rebuild all constraints from scratch (used once at start-up)"""
+        self.masks.clear()
+        self.mines.clear()
+        self.owners = [0] * self.bits.size
+        self.contradictions.clear()
+        self._dirty.clear()
+        self.revealed = self.bits.revealed_mask()
+        self.flagged = self.bits.marked_mask()
+        self.safe_mask &= ~self.revealed
+        self.known_safe = self.bits.cells_of(self.safe_mask)
+        self.taken = (self.mine_mask | self.flagged if self.trust_flags else self.mine_mask) & ~self.revealed
+        self.blocked = self.revealed | self.safe_mask | self.taken
+        cols = self.bits.cols
+        for r, c in constrained_numbers(self.board):
+            self._rebuild(r * cols + c)
+
+    def update(self, changed_cells):
+        """Bring the solver up to date after cells were revealed, flagged or unflagged
+
+        Takes the same changed_cells as solver.Solver.update.
+        """
+        affected = set()
+        revealed = 0
+        grid = self.board.grid
+        owners, deltas, cols = self.owners, self.bits.deltas, self.bits.cols
+        for r, c in changed_cells:
+            index = r * cols + c
+            cell = grid[r][c]
+            if cell.revealed:
+                # A newly revealed cell leaves the constraints it was part of and adds its own
+                revealed |= 1 << index
+                affected.add(index)
+                affected.update(index + deltas[k] for k in WINDOW_BITS[owners[index]])
+                continue
+
+            # A changed flag changes the counts of every number around it
+            bit = 1 << index
+            if cell.marked:
+                self.flagged |= bit
+            else:
+                self.flagged &= ~bit
+            if self.trust_flags and not self.mine_mask & bit:
+                if cell.marked:
+                    self.taken |= bit
+                    self.blocked |= bit
+                else:
+                    self.taken &= ~bit
+                    if not self.safe_mask & bit:
+                        self.blocked &= ~bit
+            affected.update(iter_bits(self.bits.neighbour_masks[index] & self.revealed))
+
+        if revealed:
+            self.revealed |= revealed
+            self.flagged &= ~revealed
+            self.taken &= ~revealed
+            self.blocked |= revealed
+            if self.safe_mask & revealed:
+                self.known_safe -= self.bits.cells_of(self.safe_mask & revealed)
+                self.safe_mask &= ~revealed
+        for number in affected:
+            self._rebuild(number)
+
+    # ------------------------------------------------------------------
+    # Deduction
+
+    def _mark_known(self, indices, is_mine, queue):
+        masks, mines, owners = self.masks, self.mines, self.owners
+        deltas, cols = self.bits.deltas, self.bits.cols
+        for index in indices:
+            bit = 1 << index
+            if self.blocked & bit:
+                continue
+            self.blocked |= bit
+            if is_mine:
+                self.mine_mask |= bit
+                self.taken |= bit
+                self.known_mines.add(divmod(index, cols))
+            else:
+                self.safe_mask |= bit
+                self.known_safe.add(divmod(index, cols))
+
+            # The constraining number at window bit k holds this cell at bit 8 - k
+            for k in WINDOW_BITS[owners[index]]:
+                number = index + deltas[k]
+                window = masks[number] ^ (1 << (8 - k))
+                if is_mine:
+                    mines[number] -= 1
+                if window:
+                    masks[number] = window
+                    queue.add(number)
+                else:
+                    self._drop(number)
+            owners[index] = 0
+
+    def _examine(self, number, queue):
+        masks, mines = self.masks, self.mines
+        window_indices = self.bits.window_indices
+        a = masks.get(number)
+        if a is None:
+            return
+        a_mines = mines[number]
+
+        # Single-constraint rules
+        if a_mines == 0:
+            self._mark_known(window_indices(number, a), False, queue)
+            return
+        if a_mines == popcount(a):
+            self._mark_known(window_indices(number, a), True, queue)
+            return
+
+        # Pairwise reduction against the constraints sharing a cell with this one
+        owners, deltas, ring_deltas = self.owners, self.bits.deltas, self.bits.ring_deltas
+        candidates = 0
+        for k in WINDOW_BITS[a]:
+            candidates |= TO_RING[k][owners[number + deltas[k]]]
+        candidates &= ~RING_CENTRE
+        while candidates:
+            low = candidates & -candidates
+            candidates ^= low
+            j = low.bit_length() - 1
+            a = masks.get(number)
+            if a is None:
+                return
+            other = number + ring_deltas[j]
+            b = masks.get(other)
+            if b is None:
+                continue
+            forward, back = RING_SHIFTS[j]
+            shared = forward[a] & b        # in the other cell's window
+            if not shared:
+                continue
+            a_mines, b_mines = mines[number], mines[other]
+            only_a = a ^ back[shared]
+            only_b = b ^ shared
+            size_a, size_b = popcount(only_a), popcount(only_b)
+            # Mines in the shared cells are bounded by both constraints
+            shared_max = min(a_mines, b_mines, popcount(shared))
+            shared_min = max(0, a_mines - size_a, b_mines - size_b)
+            if only_a:
+                if a_mines == shared_min:
+                    self._mark_known(window_indices(number, only_a), False, queue)
+                elif a_mines - shared_max == size_a:
+                    self._mark_known(window_indices(number, only_a), True, queue)
+            if only_b:
+                if b_mines == shared_min:
+                    self._mark_known(window_indices(other, only_b), False, queue)
+                elif b_mines - shared_max == size_b:
+                    self._mark_known(window_indices(other, only_b), True, queue)
+
+    def deduce(self):
+        """Run deductions to a fixed point and return (safe cells, mine cells)"""
+        queue = self._dirty
+        self._dirty = set()
+        while True:
+            while queue:
+                self._examine(queue.pop(), queue)
+            if self.safe_mask or self.pattern_cache is None or not self._solve_components(queue):
+                break
+        return set(self.known_safe), set(self.known_mines)
+
+    def _solve_components(self, queue):
+        """Deduce from whole components through the pattern cache; True if anything was found"""
+        constraints = [(constraint.cells, constraint.mines) for constraint in self.constraints.values()]
+        found = False
+        index = self.bits.index
+        for component in constraint_components(constraints):
+            if len({cell for cells, _ in component for cell in cells}) > self.max_pattern_cells:
+                continue
+            try:
+                safe, mines = self.pattern_cache.deductions(component)
+            except BudgetExceeded:
+                continue
+            if safe or mines:
+                self._mark_known([index(*cell) for cell in safe], False, queue)
+                self._mark_known([index(*cell) for cell in mines], True, queue)
+                found = True
+        return found
+
+    def safe_cells(self):
+        return set(self.known_safe)
+
+    def mine_cells(self):
+        return set(self.known_mines)
+
+    def frontier(self):
+        """The board's frontier less the cells deduced since"""
+        return {cell for cell in self.board.iter_frontier()
+                if cell not in self.known_safe and cell not in self.known_mines}
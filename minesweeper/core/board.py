@@ -1,3 +1,17 @@
+import base64
+from functools import lru_cache
+
+
+@lru_cache(maxsize=16)
+def _neighbour_table(rows, cols):
+    """In-bounds neighbours of every cell, as table[r][c] -> tuple of (r, c)"""
+    return tuple(
+        tuple(tuple((r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                    if (dr or dc) and 0 <= r + dr < rows and 0 <= c + dc < cols)
+              for c in range(cols))
+        for r in range(rows))
+
+
 class Cell:
     """
     Represents a single cell of the Minesweeper game board.
@@ -9,33 +23,50 @@ class Cell:
         self.marked = False      # True if player has placed a flag on this cell
 
 class Board:
+    """
+    The grid of cells, plus an incrementally maintained frontier.
+
+    The frontier is the set of hidden, unflagged cells next to at least one
+    revealed number; the active numbers are the revealed numbers that still
+    have such a hidden neighbour. reveal, toggle_mark and set_mines keep
+    both up to date from per-cell neighbour counts, touching only the cells
+    around what changed, so reading them never scans the grid. The flagged
+    cells are kept as a set too.
+    """
     def __init__(self, rows, cols, mines):
         self.rows = rows
         self.cols = cols
         self.mines = mines
         self.grid = [[Cell() for _ in range(cols)] for _ in range(rows)]
         self.mine_positions = set()
+        self.revealed_count = 0
+        self._adjacent = _neighbour_table(rows, cols)
+        self._frontier = set()
+        self._active = set()
+        self._marked = set()
+        self._hidden_around = None   # [r][c] -> hidden, unflagged neighbours
+        self._numbers_around = None  # [r][c] -> revealed number neighbours
+        self._reset_counts()
 
     def in_bounds(self, r, c):
         return 0 <= r < self.rows and 0 <= c < self.cols
 
     def neighbours(self, r, c):
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                nr, nc = r + dr, c + dc
-                if self.in_bounds(nr, nc):
-                    yield nr, nc
-
-    def place_mines(self, first_click):
+        return iter(self._adjacent[r][c])
+
+    def place_mines(self, first_click, rng=None):
         import random
+        rng = rng or random
         safe_zone = {(first_click[0] + dr, first_click[1] + dc)
                      for dr in [-1, 0, 1] for dc in [-1, 0, 1]
                      if self.in_bounds(first_click[0] + dr, first_click[1] + dc)}
         candidates = [(r, c) for r in range(self.rows) for c in range(self.cols)
                       if (r, c) not in safe_zone]
-        self.mine_positions = set(random.sample(candidates, self.mines))
+        self.set_mines(rng.sample(candidates, self.mines))
+
+    def set_mines(self, positions):
+        """Place mines at the given cells (e.g. a layout from the no-guess generator)"""
+        self.mine_positions = set(positions)
         for r, c in self.mine_positions:
             self.grid[r][c].is_mine = True
 
@@ -43,6 +74,31 @@ class Board:
             for nr, nc in self.neighbours(r, c):
                 self.grid[nr][nc].value += 1
 
+        # Values changed under any cells revealed before the mines were placed
+        if self.revealed_count:
+            self._rebuild_frontier()
+
+    def encode(self):
+        """Board code: size, mine count and the mine layout as a url-safe base64 bitmask"""
+        mask = 0
+        for r, c in self.mine_positions:
+            mask |= 1 << (r * self.cols + c)
+        data = mask.to_bytes((self.rows * self.cols + 7) // 8, 'little')
+        return f"{self.rows}x{self.cols}-{self.mines}-{base64.urlsafe_b64encode(data).decode().rstrip('=')}"
+
+    @classmethod
+    def decode(cls, code):
+        """Board with the mine layout of a board code (see encode)"""
+        size, mines, layout = code.split('-', 2)
+        rows, cols = map(int, size.split('x'))
+        data = base64.urlsafe_b64decode(layout + '=' * (-len(layout) % 4))
+        mask = int.from_bytes(data, 'little')
+        board = cls(rows, cols, int(mines))
+        board.set_mines(divmod(index, cols) for index in range(rows * cols) if mask >> index & 1)
+        if len(board.mine_positions) != board.mines:
+            raise ValueError(f"Board code {code!r} has {len(board.mine_positions)} mines, expected {mines}")
+        return board
+
     def reveal(self, r, c):
         if not self.in_bounds(r, c) or self.grid[r][c].revealed:
             return []
@@ -57,16 +113,106 @@ class Board:
                 continue
             cell.revealed = True
             revealed.append((cr, cc))
+            self._hidden_cell_removed(cr, cc)
+            if cell.value > 0 and not cell.is_mine:
+                self._number_added(cr, cc)
             if cell.value == 0 and not cell.is_mine:
                 for nr, nc in self.neighbours(cr, cc):
                     if not self.grid[nr][nc].revealed:
                         queue.append((nr, nc))
 
+        self.revealed_count += len(revealed)
         return revealed
 
     def toggle_mark(self, r, c):
         if self.in_bounds(r, c) and not self.grid[r][c].revealed:
-            self.grid[r][c].marked = not self.grid[r][c].marked
+            cell = self.grid[r][c]
+            cell.marked = not cell.marked
+            if cell.marked:
+                self._marked.add((r, c))
+                self._hidden_cell_removed(r, c)
+            else:
+                self._marked.discard((r, c))
+                self._hidden_cell_added(r, c)
+
+    # ------------------------------------------------------------------
+    # Frontier
+
+    def iter_frontier(self):
+        """Hidden, unflagged cells next to a revealed number"""
+        # Iterate a snapshot so the board can change (or be read from another thread) meanwhile
+        return iter(tuple(self._frontier))
+
+    def iter_active_numbers(self):
+        """Revealed numbers with at least one hidden, unflagged neighbour"""
+        return iter(tuple(self._active))
+
+    def iter_marked(self):
+        """Flagged cells that are still hidden"""
+        return iter(tuple(self._marked))
+
+    def frontier_size(self):
+        return len(self._frontier)
+
+    def is_frontier(self, r, c):
+        return (r, c) in self._frontier
+
+    def hidden_neighbours(self, r, c):
+        """Number of hidden, unflagged neighbours of a cell"""
+        return self._hidden_around[r][c]
+
+    def _hidden_cell_removed(self, r, c):
+        """A hidden, unflagged cell was revealed or flagged"""
+        self._frontier.discard((r, c))
+        hidden_around = self._hidden_around
+        for nr, nc in self._adjacent[r][c]:
+            hidden_around[nr][nc] -= 1
+            if not hidden_around[nr][nc]:
+                self._active.discard((nr, nc))
+
+    def _hidden_cell_added(self, r, c):
+        """A flagged cell was unflagged"""
+        grid = self.grid
+        hidden_around = self._hidden_around
+        for nr, nc in self._adjacent[r][c]:
+            hidden_around[nr][nc] += 1
+            neighbour = grid[nr][nc]
+            if neighbour.revealed and neighbour.value > 0 and not neighbour.is_mine:
+                self._active.add((nr, nc))
+        if self._numbers_around[r][c]:
+            self._frontier.add((r, c))
+
+    def _number_added(self, r, c):
+        """A number cell was revealed"""
+        grid = self.grid
+        numbers_around = self._numbers_around
+        for nr, nc in self._adjacent[r][c]:
+            numbers_around[nr][nc] += 1
+            neighbour = grid[nr][nc]
+            if not neighbour.revealed and not neighbour.marked:
+                self._frontier.add((nr, nc))
+        if self._hidden_around[r][c]:
+            self._active.add((r, c))
+
+    def _reset_counts(self):
+        self._hidden_around = [[len(neighbours) for neighbours in row] for row in self._adjacent]
+        self._numbers_around = [[0] * self.cols for _ in range(self.rows)]
+        self._frontier.clear()
+        self._active.clear()
+
+    def _rebuild_frontier(self):
+        """Recompute the frontier from the whole grid (after bulk changes)"""
+        self._reset_counts()
+        for r in range(self.rows):
+            for c in range(self.cols):
+                cell = self.grid[r][c]
+                if cell.revealed or cell.marked:
+                    self._hidden_cell_removed(r, c)
+        for r in range(self.rows):
+            for c in range(self.cols):
+                cell = self.grid[r][c]
+                if cell.revealed and cell.value > 0 and not cell.is_mine:
+                    self._number_added(r, c)
 
     def is_mine(self, r, c):
         return self.grid[r][c].is_mine
@@ -92,3 +238,12 @@ class Board:
         for r in range(self.rows):
             for c in range(self.cols):
                 self.grid[r][c].revealed = True
+        self.revealed_count = self.rows * self.cols
+        self._marked.clear()
+        self._rebuild_frontier()
+
+    def render(self):
+        """One string per row: '.' hidden, 'F' flagged, '*' a revealed mine, a digit a revealed number"""
+        return [''.join(('*' if cell.is_mine else str(cell.value)) if cell.revealed else ('F' if cell.marked else '.')
+                        for cell in row)
+                for row in self.grid]
@@ -0,0 +1,255 @@
+# minesweeper/core/board_pool.py
+"""
+Pool of pre-generated boards for instant game start.
+
+A background thread keeps a few mine layouts ready per (rows, cols, mines,
+mode), where mode is 'random' or 'no_guess'. Layouts are generated for a
+reference first click (alternately the centre and a corner). When the real
+first click comes, a ready layout is mapped onto it: one of the board's
+symmetries (rotations/reflections that keep its shape) followed by a
+cyclic translation moves the reference click, and its clear 3x3, onto the
+clicked cell.
+
+A transformed random layout is not quite uniform: the reference's clear
+cells that don't land in the clicked cell's 3x3 (where the translation
+wrapped them around an edge) would never hold a mine, and a corner
+reference leaves part of the 3x3 uncleared. rebalance_layout redistributes
+a few mines so the result is exactly as likely as a freshly drawn layout;
+random takes never miss once a layout is ready. A no-guess layout is
+only guaranteed solvable from its own reference click, so transformed
+candidates are re-checked with the solver (cheap compared to generating)
+and the first one that still needs no guessing is used. If none passes,
+or nothing is ready yet, take() reports a miss and the caller generates
+the board itself.
+"""
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+from minesweeper.core.board import Board
+from minesweeper.core.no_guess import NoGuessGenerator, random_layout, solve_without_guessing
+
+POOL_MODES = ('random', 'no_guess')
+
+# Transformed no-guess candidates checked per take() before giving up
+MAX_CHECKS = 16
+
+# (r, c) -> (r', c') on a rows x cols board; the last four only fit square boards
+_SYMMETRIES = (
+    lambda r, c, rows, cols: (r, c),
+    lambda r, c, rows, cols: (rows - 1 - r, c),
+    lambda r, c, rows, cols: (r, cols - 1 - c),
+    lambda r, c, rows, cols: (rows - 1 - r, cols - 1 - c),
+    lambda r, c, rows, cols: (c, r),
+    lambda r, c, rows, cols: (cols - 1 - c, r),
+    lambda r, c, rows, cols: (c, rows - 1 - r),
+    lambda r, c, rows, cols: (cols - 1 - c, rows - 1 - r),
+)
+
+
+def reference_clicks(rows, cols):
+    return [(rows // 2, cols // 2), (0, 0)]
+
+
+def placements(reference, click, rows, cols):
+    """(symmetry, shift) pairs mapping reference onto click, untranslated ones first"""
+    symmetries = _SYMMETRIES if rows == cols else _SYMMETRIES[:4]
+    options = []
+    for symmetry in symmetries:
+        r, c = symmetry(*reference, rows, cols)
+        shift = ((click[0] - r) % rows, (click[1] - c) % cols)
+        distance = min(shift[0], rows - shift[0]) + min(shift[1], cols - shift[1])
+        options.append((distance, symmetry, shift))
+    options.sort(key=lambda option: option[0])
+    return [(symmetry, shift) for _, symmetry, shift in options]
+
+
+def transform_layout(positions, rows, cols, symmetry, shift):
+    """Apply a symmetry, then a cyclic shift, to a set of mine positions"""
+    moved = set()
+    for r, c in positions:
+        r, c = symmetry(r, c, rows, cols)
+        moved.add(((r + shift[0]) % rows, (c + shift[1]) % cols))
+    return moved
+
+
+def _zone(click, rows, cols):
+    """The in-bounds 3x3 around a cell"""
+    r, c = click
+    return {(r + dr, c + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+            if 0 <= r + dr < rows and 0 <= c + dc < cols}
+
+
+def rebalance_layout(positions, cleared, safe, rows, cols, rng):
+    """Turn a transformed random layout into a uniform one over the cells outside `safe`
+
+    `positions` is uniform over the cells outside `cleared` (the reference
+    zone, transformed). The cells of `cleared` outside `safe` then never get
+    a mine, and cells of `safe` may have one (a corner reference only clears
+    a 2x2). Draw how many mines a uniform layout puts on the former
+    (hypergeometric) and place them at random; the remaining mines keep
+    their places outside both zones, less or more random ones to make up
+    the count. The result is distributed exactly as a freshly drawn layout.
+    """
+    mines = len(positions)
+    extra = sorted(cleared - safe)
+    rest = rows * cols - len(cleared | safe)
+    count = sum(1 for i in rng.sample(range(rest + len(extra)), mines) if i < len(extra))
+    kept = sorted(set(positions) - safe)
+    target = mines - count
+    if len(kept) > target:
+        kept = rng.sample(kept, target)
+    elif len(kept) < target:
+        blocked = cleared | safe | set(kept)
+        free = [(r, c) for r in range(rows) for c in range(cols) if (r, c) not in blocked]
+        kept += rng.sample(free, target - len(kept))
+    return set(kept) | set(rng.sample(extra, count))
+
+
+def _safe_zone_clear(positions, click, rows, cols):
+    r, c = click
+    return not any((r + dr, c + dc) in positions
+                   for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+                   if 0 <= r + dr < rows and 0 <= c + dc < cols)
+
+
+class BoardPool:
+    def __init__(self, size=3, generator=None, seed=None):
+        self.size = size
+        # Owned by the background thread; don't share it with code generating on the main thread
+        self.generator = generator or NoGuessGenerator(seed=seed)
+        self.rng = random.Random(seed)
+        # For take(), which runs on the caller's thread
+        self._take_rng = random.Random(self.rng.getrandbits(64))
+        self.ready = defaultdict(deque)   # (rows, cols, mines, mode) -> deque of (reference click, positions)
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self.generated = defaultdict(int)
+        self.take_times = []
+        self._reference_index = defaultdict(int)
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._refill, name="board-pool", daemon=True)
+        self._thread.start()
+
+    def register(self, rows, cols, mines, mode='random'):
+        """Start keeping boards ready for a configuration"""
+        if mode not in POOL_MODES:
+            raise ValueError(f"mode must be one of {POOL_MODES}")
+        with self._condition:
+            self.ready[(rows, cols, mines, mode)]
+            self._condition.notify()
+
+    def take(self, rows, cols, mines, first_click, mode='random'):
+        """Mine positions for a game starting at first_click, or None on a miss
+
+        The configuration is registered, so later games find boards ready.
+        """
+        start = time.perf_counter()
+        key = (rows, cols, mines, mode)
+        self.register(*key)
+        positions = None
+        with self._condition:
+            entries = list(self.ready[key])
+        checks = 0
+        for entry in entries:
+            reference, layout = entry
+            for symmetry, shift in placements(reference, first_click, rows, cols):
+                candidate = transform_layout(layout, rows, cols, symmetry, shift)
+                if mode == 'random':
+                    # Always the first placement: skipping some by their mines would bias the layout
+                    cleared = transform_layout(_zone(reference, rows, cols), rows, cols, symmetry, shift)
+                    positions = rebalance_layout(candidate, cleared, _zone(first_click, rows, cols),
+                                                 rows, cols, self._take_rng)
+                    break
+                # A corner reference only clears a 2x2, which may not cover the whole 3x3 after shifting
+                if not _safe_zone_clear(candidate, first_click, rows, cols):
+                    continue
+                if checks >= MAX_CHECKS:
+                    break
+                checks += 1
+                board = Board(rows, cols, mines)
+                board.set_mines(candidate)
+                if not solve_without_guessing(board, first_click):
+                    continue
+                positions = candidate
+                break
+            if positions is not None:
+                with self._condition:
+                    if entry in self.ready[key]:
+                        self.ready[key].remove(entry)
+                    self._condition.notify()
+                break
+
+        if positions is None:
+            self.misses[key] += 1
+        else:
+            self.hits[key] += 1
+        self.take_times.append(time.perf_counter() - start)
+        return positions
+
+    def _next_job(self):
+        """The configuration with the fewest ready boards below `size`, or None"""
+        open_keys = [key for key, entries in self.ready.items() if len(entries) < self.size]
+        if not open_keys:
+            return None
+        return min(open_keys, key=lambda key: len(self.ready[key]))
+
+    def _refill(self):
+        while True:
+            with self._condition:
+                while not self._closed and self._next_job() is None:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                key = self._next_job()
+                references = reference_clicks(*key[:2])
+                reference = references[self._reference_index[key] % len(references)]
+                self._reference_index[key] += 1
+                seed = self.rng.getrandbits(64)
+
+            rows, cols, mines, mode = key
+            if mode == 'no_guess':
+                layout = self.generator.generate(rows, cols, mines, reference)
+            else:
+                layout = random_layout(rows, cols, mines, reference, random.Random(seed))
+            if layout is None:
+                # No board within the generator's budget; stop until the config is asked for again
+                with self._condition:
+                    if not self.ready[key]:
+                        del self.ready[key]
+                continue
+            with self._condition:
+                self.ready[key].append((reference, frozenset(layout)))
+                self.generated[key] += 1
+
+    def stats(self):
+        """Hit/miss counts overall and per configuration, plus boards ready and generated"""
+        with self._condition:
+            keys = set(self.ready) | set(self.hits) | set(self.misses)
+            per_config = {
+                f"{rows}x{cols}/{mines}/{mode}": {
+                    'hits': self.hits[(rows, cols, mines, mode)],
+                    'misses': self.misses[(rows, cols, mines, mode)],
+                    'ready': len(self.ready[(rows, cols, mines, mode)]),
+                    'generated': self.generated[(rows, cols, mines, mode)],
+                }
+                for rows, cols, mines, mode in sorted(keys)
+            }
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'mean_take_ms': 1000 * sum(self.take_times) / len(self.take_times) if self.take_times else 0.0,
+            'configs': per_config,
+        }
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self.generator.close()
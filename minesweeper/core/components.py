@@ -0,0 +1,150 @@
+# minesweeper/core/components.py
+"""
+Frontier components: independent groups of constraints, and counting their
+solutions. A constraint here is a pair (cells, mines) meaning exactly
+`mines` of `cells` are mines.
+"""
+import time
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def constraint_components(constraints):
+    """Group constraints into independent components (union-find over cells)"""
+    parent = {}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for cells, _ in constraints:
+        cells = list(cells)
+        for cell in cells:
+            parent.setdefault(cell, cell)
+        for cell in cells[1:]:
+            a, b = find(cells[0]), find(cell)
+            if a != b:
+                parent[a] = b
+
+    groups = {}
+    for cells, mines in constraints:
+        groups.setdefault(find(next(iter(cells))), []).append((cells, mines))
+    return list(groups.values())
+
+
+def _order_cells(constraints):
+    """Order cells so that each constraint is completed as early as possible"""
+    order = []
+    seen = set()
+    for cells, _ in sorted(constraints, key=lambda item: len(item[0])):
+        for cell in sorted(cells):
+            if cell not in seen:
+                seen.add(cell)
+                order.append(cell)
+    return order
+
+
+def _prepare(constraints):
+    cells = _order_cells(constraints)
+    index = {cell: i for i, cell in enumerate(cells)}
+    need = [mines for _, mines in constraints]
+    left = [len(group) for group, _ in constraints]
+    cell_constraints = [[] for _ in cells]
+    for j, (group, _) in enumerate(constraints):
+        for cell in group:
+            cell_constraints[index[cell]].append(j)
+    return cells, need, left, cell_constraints
+
+
+def enumerate_component(constraints, deadline=None):
+    """
+    Count the solutions of one component.
+
+    Returns (cells, {mines: (solutions, [per-cell mine counts])}). Raises
+    BudgetExceeded if the deadline passes.
+    """
+    cells, need, left, cell_constraints = _prepare(constraints)
+    n = len(cells)
+    assignment = [0] * n
+    totals = {}
+    steps = 0
+
+    def place(i, mines):
+        nonlocal steps
+        steps += 1
+        if deadline is not None and steps % 1024 == 0 and time.perf_counter() > deadline:
+            raise BudgetExceeded()
+        if i == n:
+            solutions, counts = totals.get(mines, (0, [0] * n))
+            for k in range(n):
+                counts[k] += assignment[k]
+            totals[mines] = (solutions + 1, counts)
+            return
+        for value in (0, 1):
+            ok = True
+            for j in cell_constraints[i]:
+                need[j] -= value
+                left[j] -= 1
+                if need[j] < 0 or need[j] > left[j]:
+                    ok = False
+            if ok:
+                assignment[i] = value
+                place(i + 1, mines + value)
+            for j in cell_constraints[i]:
+                need[j] += value
+                left[j] += 1
+        assignment[i] = 0
+
+    place(0, 0)
+    return cells, totals
+
+
+def sample_component(constraints, samples, rng, deadline=None):
+    """
+    Estimate a component from random solutions (randomized backtracking).
+
+    Solutions are not drawn exactly uniformly, so results are approximate.
+    Per-mine-count solution totals are only meaningful relative to each other.
+    """
+    cells, need, left, cell_constraints = _prepare(constraints)
+    n = len(cells)
+    totals = {}
+
+    def place(i, assignment):
+        if i == n:
+            return True
+        values = (0, 1) if rng.random() < 0.5 else (1, 0)
+        for value in values:
+            ok = True
+            for j in cell_constraints[i]:
+                need[j] -= value
+                left[j] -= 1
+                if need[j] < 0 or need[j] > left[j]:
+                    ok = False
+            if ok:
+                assignment.append(value)
+                if place(i + 1, assignment):
+                    return True
+                assignment.pop()
+            for j in cell_constraints[i]:
+                need[j] += value
+                left[j] += 1
+        return False
+
+    for _ in range(samples):
+        if deadline is not None and time.perf_counter() > deadline and totals:
+            break
+        assignment = []
+        need_backup, left_backup = list(need), list(left)
+        if place(0, assignment):
+            mines = sum(assignment)
+            solutions, counts = totals.get(mines, (0, [0] * n))
+            for k in range(n):
+                counts[k] += assignment[k]
+            totals[mines] = (solutions + 1, counts)
+        need[:], left[:] = need_backup, left_backup
+    return cells, totals
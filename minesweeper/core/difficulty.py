@@ -0,0 +1,125 @@
+# minesweeper/core/difficulty.py
+"""
+Board difficulty metrics for single boards or whole batches.
+
+* 3BV (Bechtel's Board Benchmark Value): the minimum number of clicks that
+  clears a board -- one per opening plus one per isolated number
+* openings: connected regions of zero cells (8-connected); one click
+  reveals an opening together with the numbers around it
+* isolated numbers: safe numbered cells that border no opening
+* forced guesses: how often a deduction solver gets stuck while clearing
+  the board (see no_guess.count_forced_guesses)
+
+Batches are boolean mine layouts of shape (boards, rows, cols). Openings
+are labelled for the whole batch at once, as connected components of the
+graph of adjacent zero cells: each pass hooks the larger label of every
+edge whose ends still differ under the smaller one and then compresses
+label chains, so even a board-sized opening converges in a few passes.
+Forced guesses need the solver and are computed board by board.
+"""
+import numpy as np
+
+from minesweeper.core.board import Board
+from minesweeper.core.grid import box_sum
+from minesweeper.core.no_guess import count_forced_guesses
+
+METRICS = ('bbbv', 'openings', 'isolated_numbers')
+# Per-board lists in analytics data; forced guesses only when asked for
+DIFFICULTY_KEYS = METRICS + ('forced_guesses',)
+
+
+def _edges(mask):
+    """Flat index pairs of 8-adjacent cells that are both set in a batch of masks"""
+    rows, cols = mask.shape[1:]
+    index = np.arange(mask.size).reshape(mask.shape)
+    sources, targets = [], []
+    # Each adjacent pair once: right, down, down-right and down-left
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        a = (slice(None), slice(0, rows - dr), slice(max(0, -dc), cols - max(0, dc)))
+        b = (slice(None), slice(dr, rows), slice(max(0, dc), cols - max(0, -dc)))
+        both = mask[a] & mask[b]
+        sources.append(index[a][both])
+        targets.append(index[b][both])
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def label_openings(zero):
+    """Label the 8-connected regions of a batch of boolean masks
+
+    Returns (cells, labels): the flat indices of the set cells, and for each
+    the flat index of the smallest cell of its region.
+    """
+    cells = np.flatnonzero(zero)
+    compact = np.full(zero.size, -1, dtype=np.int64)
+    compact[cells] = np.arange(len(cells))
+    sources, targets = _edges(zero)
+    u, v = compact[sources], compact[targets]
+    parent = np.arange(len(cells))
+    while True:
+        pu, pv = parent[u], parent[v]
+        unjoined = pu != pv
+        if not unjoined.any():
+            return cells, cells[parent]
+        # Hook the larger of two roots under the smaller, then compress all paths
+        pu, pv = pu[unjoined], pv[unjoined]
+        np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+
+def batch_metrics(layouts):
+    """3BV, openings and isolated numbers of every board in a batch of mine layouts
+
+    Returns a dict of int arrays, one entry per board, keyed as METRICS.
+    """
+    layouts = np.asarray(layouts, dtype=bool)
+    safe = ~layouts
+    zero = safe & (box_sum(layouts.astype(np.int8)) == 0)
+    cells, labels = label_openings(zero)
+    # One opening per zero cell that is its own label
+    boards = cells[cells == labels] // (zero.shape[1] * zero.shape[2])
+    openings = np.bincount(boards, minlength=len(zero))
+    # Cells revealed by clicking the openings: the zeros and every safe cell next to one
+    covered = (box_sum(zero.astype(np.int8)) > 0) & safe
+    isolated = (safe & ~covered).sum(axis=(1, 2))
+    return {
+        'bbbv': openings + isolated,
+        'openings': openings,
+        'isolated_numbers': isolated,
+    }
+
+
+def layout_of(board):
+    """Boolean mine layout (rows x cols) of a Board"""
+    layout = np.zeros((board.rows, board.cols), dtype=bool)
+    if board.mine_positions:
+        layout[tuple(np.array(sorted(board.mine_positions)).T)] = True
+    return layout
+
+
+def layouts_of(boards):
+    """Stack the mine layouts of several same-sized Boards into a batch"""
+    return np.stack([layout_of(board) for board in boards])
+
+
+def forced_guesses(layouts, first_clicks, pattern_cache=None):
+    """Guesses a deduction solver needs to clear each board from its first click"""
+    guesses = []
+    for layout, click in zip(np.asarray(layouts, dtype=bool), first_clicks):
+        rows, cols = layout.shape
+        board = Board(rows, cols, int(layout.sum()))
+        board.set_mines(map(tuple, np.argwhere(layout).tolist()))
+        guesses.append(count_forced_guesses(board, tuple(click), pattern_cache))
+    return np.array(guesses, dtype=np.int64)
+
+
+def board_difficulty(board, first_click=None, pattern_cache=None):
+    """Metrics of one Board with mines placed; forced guesses too if first_click is given"""
+    layout = layout_of(board)
+    metrics = {name: int(values[0]) for name, values in batch_metrics(layout[None]).items()}
+    if first_click is not None:
+        metrics['forced_guesses'] = int(forced_guesses(layout[None], [first_click], pattern_cache)[0])
+    return metrics
@@ -1,9 +1,17 @@
 import time
 from collections import deque
 from minesweeper.core.board import Board
+from minesweeper.core.difficulty import board_difficulty
+from minesweeper.core.no_guess import NoGuessGenerator
+
+DIFFICULTIES = {
+    'easy': (9, 9, 10),
+    'medium': (16, 16, 40),
+    'hard': (16, 30, 99)
+}
 
 class Game:
-    def __init__(self, rows, cols, mines):
+    def __init__(self, rows, cols, mines, no_guess=False, generator=None, pool=None, rng=None, layout=None):
         self.board = Board(rows, cols, mines)
         self.started = False
         self.start_time = None
@@ -12,13 +20,43 @@ class Game:
         self.won = False
         self.first_click = True
         self.clicks = 0
+        self.safe_remaining = rows * cols - mines
+        self.rng = rng   # random.Random for mine placement; the module-level generator if None
+        # no_guess: generate a board that is solvable from the first click without guessing.
+        # Pass a shared NoGuessGenerator to reuse its worker processes across games.
+        self.no_guess = no_guess
+        self.generator = generator
+        self.guess_free = False
+        # Optional BoardPool with boards generated ahead of time
+        self.pool = pool
+        # Fixed mine positions to use instead of generating them (e.g. a tournament board set)
+        self.layout = layout
+        self._bbbv = None
+        # Moves that changed the board, and the callbacks told about each (see add_observer)
+        self.seq = 0
+        self._observers = []
+
+    @property
+    def status(self):
+        if self.lost:
+            return 'lost'
+        if self.won:
+            return 'won'
+        return 'playing'
 
     def click(self, r, c):
+        revealed = self._click(r, c)
+        if revealed:
+            self._changed(opened=revealed)
+        return revealed
+
+    def _click(self, r, c):
+        """click() without telling the observers"""
         if self.board.is_marked(r, c) or self.board.is_revealed(r, c):
             return []
 
         if self.first_click:
-            self.board.place_mines((r, c))
+            self.place_mines((r, c))
             self.start_time = time.time()
             self.first_click = False
             self.started = True
@@ -29,18 +67,148 @@ class Game:
             self.end_time = time.time()
             self.lost = True
             self.board.reveal_all()
-        elif self.board.all_safe_cells_revealed():
-            self.end_time = time.time()
-            self.won = True
-
+        else:
+            self.safe_remaining -= len(revealed)
+            if self.safe_remaining == 0:
+                self.end_time = time.time()
+                self.won = True
         return revealed
 
+    def place_mines(self, first_click):
+        if self.layout is not None:
+            self.board.set_mines(self.layout)
+            return
+        if self.pool is not None:
+            mode = 'no_guess' if self.no_guess else 'random'
+            positions = self.pool.take(self.board.rows, self.board.cols, self.board.mines, first_click, mode)
+            if positions is not None:
+                self.board.set_mines(positions)
+                self.guess_free = self.no_guess
+                return
+        if self.no_guess:
+            generator = self.generator or NoGuessGenerator()
+            positions = generator.generate(self.board.rows, self.board.cols, self.board.mines, first_click)
+            if positions is not None:
+                self.board.set_mines(positions)
+                self.guess_free = True
+                return
+        # No-guess generation off, or no solvable board found: fall back to a random layout
+        self.board.place_mines(first_click, self.rng)
+
     def mark(self, r, c):
+        if not self.board.in_bounds(r, c) or self.board.is_revealed(r, c):
+            return
         self.board.toggle_mark(r, c)
+        self._changed(flag=(r, c))
+
+    def chord(self, r, c):
+        """Click every unmarked hidden neighbour of a revealed number whose mines are all marked"""
+        board = self.board
+        if self.lost or self.won or not board.is_revealed(r, c) or board.get_value(r, c) <= 0:
+            return []
+        neighbours = list(board.neighbours(r, c))
+        if sum(board.is_marked(nr, nc) for nr, nc in neighbours) != board.get_value(r, c):
+            return []
+        # One move: every cell it opens goes in one delta
+        revealed = []
+        for nr, nc in neighbours:
+            revealed += self._click(nr, nc)
+            if self.lost:
+                break
+        if revealed:
+            self._changed(opened=revealed)
+        return revealed
+
+    # ------------------------------------------------------------------
+    # Observers
+
+    def add_observer(self, callback):
+        """Call callback(delta) after every move that changes the board
+
+        A delta holds the move number "seq" and what changed: "open" lists
+        the revealed cells as [r, c, value] (-1 for a mine) and "flag" is
+        [r, c, flagged]. The move that ends the game adds "status" and
+        "elapsed", and "mines" if it was lost. Callbacks run on the thread
+        that plays the game; keyframe() gives the state to start from.
+        """
+        self._observers.append(callback)
+
+    def remove_observer(self, callback):
+        self._observers.remove(callback)
+
+    def keyframe(self):
+        """The whole visible state after move `seq` (board rows as in Board.render)"""
+        board = self.board
+        return {'keyframe': True, 'seq': self.seq, 'rows': board.rows, 'cols': board.cols, 'mines': board.mines,
+                'status': self.status, 'elapsed': self.get_elapsed_time(), 'board': board.render()}
+
+    def _changed(self, opened=(), flag=None):
+        self.seq += 1
+        if not self._observers:
+            return
+        board = self.board
+        delta = {'seq': self.seq}
+        if opened:
+            delta['open'] = [[r, c, -1 if board.is_mine(r, c) else board.get_value(r, c)] for r, c in opened]
+        if flag is not None:
+            delta['flag'] = [*flag, board.is_marked(*flag)]
+        # Only reveals end a game
+        if opened and (self.lost or self.won):
+            delta['status'] = self.status
+            delta['elapsed'] = self.get_elapsed_time()
+            if self.lost:
+                delta['mines'] = sorted(map(list, board.mine_positions))
+        for callback in list(self._observers):
+            callback(delta)
 
     def get_elapsed_time(self):
         if self.start_time is None:
             return 0
         if self.end_time:
             return self.end_time - self.start_time
-        return time.time() - self.start_time
\ No newline at end of file
+        return time.time() - self.start_time
+
+    @property
+    def bbbv(self):
+        """3BV of the board (minimum clicks to clear it); None until the mines are placed"""
+        if self._bbbv is None and not self.first_click:
+            self._bbbv = board_difficulty(self.board)['bbbv']
+        return self._bbbv
+
+    def get_3bv_per_second(self):
+        """Speed score of a won game: 3BV divided by the time taken"""
+        elapsed = self.get_elapsed_time()
+        if not self.won or elapsed <= 0:
+            return None
+        return self.bbbv / elapsed
+
+    def autoplay(self, strategy, first_click=None):
+        """Play the game to the end with a simulation strategy (see core.simulation)
+
+        first_click overrides the strategy's own choice. Returns a record with
+        the outcome, clicks, guesses (clicks not proven safe, the first click
+        excluded), the time taken in seconds and the time of every strategy
+        decision.
+        """
+        start = time.perf_counter()
+        guesses = 0
+        move_times = []
+        changed = self.click(*(first_click or strategy.first_click(self)))
+        while not self.won and not self.lost:
+            move_start = time.perf_counter()
+            cells, guess = strategy.next_moves(self, changed)
+            move_times.append(time.perf_counter() - move_start)
+            guesses += guess
+            changed = []
+            for r, c in cells:
+                changed += self.click(r, c)
+                if self.lost:
+                    break
+        return {
+            'won': self.won,
+            'clicks': self.clicks,
+            'guesses': guesses,
+            'duration': time.perf_counter() - start,
+            'move_times': move_times,
+            'safe_revealed': 1 - self.safe_remaining / (self.board.rows * self.board.cols - self.board.mines),
+        }
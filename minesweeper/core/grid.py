@@ -0,0 +1,22 @@
+# minesweeper/core/grid.py
+"""
+Neighbourhood arithmetic on numpy grids, shared by the batched metrics
+(core.difficulty) and the vectorised analytics (analytics.exact,
+analytics.first_click).
+"""
+import numpy as np
+
+
+def box_sum(grid):
+    """Sum over every cell's 3x3 box, the cell included (cells off the board count as 0)
+
+    Works on the last two axes, so on one board or a batch of boards; the
+    result has the grid's dtype.
+    """
+    rows, cols = grid.shape[-2:]
+    padded = np.pad(grid, [(0, 0)] * (grid.ndim - 2) + [(1, 1), (1, 1)])
+    total = np.zeros_like(grid)
+    for dr in range(3):
+        for dc in range(3):
+            total += padded[..., dr:dr + rows, dc:dc + cols]
+    return total
@@ -0,0 +1,84 @@
+# minesweeper/core/hints.py
+"""
+Hints for the player: a cell that is certainly safe, or else the cell least
+likely to hold a mine.
+
+The solver behind the hints lives on one worker thread and is kept up to
+date from the change-sets of Game.click and Game.mark, so a hint never
+re-solves the whole board and never runs on the Tk thread. Updates and
+hint requests are queued on the same thread and therefore run in order;
+deductions are made eagerly after every update so a "safe" hint is usually
+ready at once. Only when no safe cell is known does a request run the
+probability engine, limited by the time budget (beyond it, large frontier
+components are sampled instead of enumerated exactly).
+
+Player flags are not trusted: a wrong flag would otherwise turn into a
+confidently wrong hint.
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from minesweeper.core.bitsolver import BitsetSolver
+from minesweeper.core.pattern_cache import PatternCache
+from minesweeper.core.probability import ProbabilityEngine
+
+# Default latency budget for the probability engine, in seconds
+HINT_TIME_BUDGET = 0.1
+
+# cell: (r, c); probability: P(mine), 0 for a proven-safe cell; exact: False if sampled
+Hint = namedtuple('Hint', 'cell probability safe exact elapsed version')
+
+# Shared by the hint engines of successive games so patterns stay cached
+_pattern_cache = PatternCache()
+
+
+class HintEngine:
+    def __init__(self, board, time_budget=HINT_TIME_BUDGET):
+        self.board = board
+        self.time_budget = time_budget
+        self.solver = None
+        # Number of change-sets handed in; a hint is current if no change came after it
+        self.version = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hints")
+
+    def notify(self, changed_cells):
+        """Queue a change-set from Game.click (revealed cells) or Game.mark (one flag)"""
+        if not changed_cells:
+            return
+        self.version += 1
+        self._executor.submit(self._update, list(changed_cells))
+
+    def request(self):
+        """Start computing a hint; returns a Future resolving to a Hint, or None if there is none"""
+        return self._executor.submit(self._hint, self.version)
+
+    def _update(self, changed_cells):
+        if self.solver is None:
+            self.solver = BitsetSolver(self.board, trust_flags=False, pattern_cache=_pattern_cache)
+        else:
+            self.solver.update(changed_cells)
+        self.solver.deduce()
+
+    def _hint(self, version):
+        start = time.perf_counter()
+        board = self.board
+        if self.solver is None:
+            # Nothing revealed yet: the first click is always safe, and the centre opens the most
+            return Hint((board.rows // 2, board.cols // 2), 0.0, True, True, 0.0, version)
+
+        safe, _ = self.solver.deduce()
+        safe = sorted(cell for cell in safe if not board.is_revealed(*cell) and not board.is_marked(*cell))
+        if safe:
+            return Hint(safe[0], 0.0, True, True, time.perf_counter() - start, version)
+
+        engine = ProbabilityEngine(board, solver=self.solver, time_budget=self.time_budget,
+                                   pattern_cache=_pattern_cache)
+        result = engine.compute()
+        cell, probability = engine.safest_cell(result)
+        if cell is None:
+            return None
+        return Hint(cell, probability, probability == 0, result['exact'], time.perf_counter() - start, version)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,37 @@
+# minesweeper/core/metrics.py
+"""
+Board statistics: mine clusters and number counts. Openings and 3BV are
+computed by core.difficulty.
+"""
+from collections import deque
+
+
+def mine_clusters(board):
+    """Return the size of every group of touching mines (8-connectivity)"""
+    visited = set()
+    sizes = []
+    for r, c in board.mine_positions:
+        if (r, c) in visited:
+            continue
+        visited.add((r, c))
+        queue = deque([(r, c)])
+        size = 0
+        while queue:
+            cr, cc = queue.popleft()
+            size += 1
+            for nr, nc in board.neighbours(cr, cc):
+                if board.grid[nr][nc].is_mine and (nr, nc) not in visited:
+                    visited.add((nr, nc))
+                    queue.append((nr, nc))
+        sizes.append(size)
+    return sizes
+
+
+def value_histogram(board):
+    """Count safe cells by value (0-8)"""
+    histogram = [0] * 9
+    for row in board.grid:
+        for cell in row:
+            if not cell.is_mine:
+                histogram[cell.value] += 1
+    return histogram
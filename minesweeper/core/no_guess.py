@@ -0,0 +1,191 @@
+# minesweeper/core/no_guess.py
+"""
+No-guess board generation.
+
+Candidate layouts (with the usual safe 3x3 around the first click) are
+played out by the deduction solver. A candidate is accepted when every
+safe cell can be revealed without guessing; the solver is helped by the
+pattern cache for whole-component deductions and, when it stalls, by the
+exact probability engine, which also applies the global mine count.
+
+With several workers, candidates are checked in parallel processes. As
+soon as one board passes, a shared event tells the other workers to stop
+after their current candidate.
+"""
+import multiprocessing
+import random
+import statistics
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from minesweeper.core.bitsolver import BitsetSolver
+from minesweeper.core.board import Board
+from minesweeper.core.pattern_cache import PatternCache
+from minesweeper.core.probability import ProbabilityEngine
+
+# Candidates per task handed to a worker; cancellation is checked between candidates
+BATCH_SIZE = 8
+
+# Per-process state: the cancellation event (set in workers) and a pattern cache that stays warm
+_cancel = None
+_pattern_cache = PatternCache()
+
+
+def _init_worker(cancel):
+    global _cancel
+    _cancel = cancel
+
+
+def solve_without_guessing(board, first_click, pattern_cache=None):
+    """Play a board with mines placed from first_click by deduction only
+
+    Returns True if every safe cell gets revealed. The board is modified.
+    """
+    return count_forced_guesses(board, first_click, pattern_cache, max_guesses=0) == 0
+
+
+def count_forced_guesses(board, first_click, pattern_cache=None, max_guesses=None):
+    """Number of guesses needed to clear a board with mines placed from first_click
+
+    Plays by deduction; whenever that stalls, counts a guess and reveals the
+    safe cell the probability engine rates least likely to be a mine (the
+    luckiest guess). Stops early once more than max_guesses were needed.
+    The board is modified.
+    """
+    changed = board.reveal(*first_click)
+    hidden_safe = board.rows * board.cols - board.mines - len(changed)
+    solver = BitsetSolver(board, pattern_cache=pattern_cache)
+    engine = None
+    guesses = 0
+    while hidden_safe > 0:
+        solver.update(changed)
+        safe, _ = solver.deduce()
+        if not safe:
+            # Stalled: cells that are mine-free in every consistent layout are still safe
+            engine = engine or ProbabilityEngine(board, solver=solver, pattern_cache=pattern_cache)
+            result = engine.compute()
+            hidden = {cell: p for cell, p in result['probabilities'].items()
+                      if not board.is_revealed(*cell)}
+            if result['exact']:
+                safe = [cell for cell, p in hidden.items() if p == 0]
+            if not safe:
+                guesses += 1
+                if max_guesses is not None and guesses > max_guesses:
+                    return guesses
+                safe = [min((p, cell) for cell, p in hidden.items() if not board.is_mine(*cell))[1]]
+        changed = []
+        for r, c in safe:
+            changed += board.reveal(r, c)
+        hidden_safe -= len(changed)
+    return guesses
+
+
+def random_layout(rows, cols, mines, first_click, rng):
+    """Mine positions with the 3x3 around first_click kept clear (as Board.place_mines)"""
+    board = Board(rows, cols, mines)
+    board.place_mines(first_click, rng)
+    return board.mine_positions
+
+
+def _search(rows, cols, mines, first_click, seed, attempts):
+    """Try up to `attempts` candidates; return (mine positions or None, candidates tried)"""
+    rng = random.Random(seed)
+    for attempt in range(attempts):
+        if _cancel is not None and _cancel.is_set():
+            return None, attempt
+        positions = random_layout(rows, cols, mines, first_click, rng)
+        board = Board(rows, cols, mines)
+        board.set_mines(positions)
+        if solve_without_guessing(board, first_click, _pattern_cache):
+            return sorted(positions), attempt + 1
+    return None, attempts
+
+
+class NoGuessGenerator:
+    def __init__(self, workers=1, max_attempts=5000, seed=None):
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.rng = random.Random(seed)
+        self.records = defaultdict(list)   # (rows, cols, mines) -> [(seconds, candidates, found)]
+        self._pool = None
+        self._cancel = None
+
+    def _get_pool(self):
+        # Kept between boards so worker start-up is paid once
+        if self._pool is None:
+            self._cancel = multiprocessing.Event()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self._cancel,))
+        return self._pool
+
+    def generate(self, rows, cols, mines, first_click):
+        """Mine positions of a board solvable from first_click without guessing
+
+        Returns None if no such board was found within max_attempts candidates.
+        """
+        start = time.perf_counter()
+        if self.workers == 1:
+            positions, attempts = _search(rows, cols, mines, first_click,
+                                          self.rng.getrandbits(64), self.max_attempts)
+        else:
+            positions, attempts = self._generate_parallel(rows, cols, mines, first_click)
+        self.records[(rows, cols, mines)].append((time.perf_counter() - start, attempts, positions is not None))
+        return positions
+
+    def _generate_parallel(self, rows, cols, mines, first_click):
+        pool = self._get_pool()
+        self._cancel.clear()
+        pending = set()
+        submitted = 0
+        attempts = 0
+        positions = None
+
+        def submit():
+            nonlocal submitted
+            n = min(BATCH_SIZE, self.max_attempts - submitted)
+            if n > 0:
+                pending.add(pool.submit(_search, rows, cols, mines, first_click, self.rng.getrandbits(64), n))
+                submitted += n
+
+        for _ in range(self.workers):
+            submit()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                found, tried = future.result()
+                attempts += tried
+                if found is not None and positions is None:
+                    positions = found
+                    self._cancel.set()
+            if positions is None:
+                while len(pending) < self.workers and submitted < self.max_attempts:
+                    submit()
+        return positions, attempts
+
+    def stats(self):
+        """Generation latency and candidates per board configuration"""
+        result = {}
+        for (rows, cols, mines), records in self.records.items():
+            times = [seconds * 1000 for seconds, _, _ in records]
+            result[f"{rows}x{cols}/{mines}"] = {
+                'boards': len(records),
+                'failures': sum(not found for _, _, found in records),
+                'mean_ms': statistics.mean(times),
+                'median_ms': statistics.median(times),
+                'max_ms': max(times),
+                'mean_candidates': statistics.mean(attempts for _, attempts, _ in records),
+            }
+        return result
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,157 @@
+# minesweeper/core/pattern_cache.py
+"""
+Transposition cache for frontier components.
+
+A component's solutions depend only on the shape of its constraints, not
+on where it sits on the board. Components are therefore keyed by a
+canonical form: cells are translated to the origin and the smallest of the
+8 rotations/reflections is chosen, so a 1-2-1 along any edge maps to the
+same entry. Each entry holds the per-mine-count solution counts and the
+deductions that follow from them (cells that are safe or mines in every
+solution).
+
+Entries are evicted least-recently-used. The cache can be saved to and
+loaded from a JSON file so batch simulations start warm.
+"""
+import json
+import os
+from collections import OrderedDict
+
+from minesweeper.core.components import enumerate_component
+
+# The 8 symmetries of the square grid
+_TRANSFORMS = (
+    lambda r, c: (r, c),
+    lambda r, c: (c, -r),
+    lambda r, c: (-r, -c),
+    lambda r, c: (-c, r),
+    lambda r, c: (r, -c),
+    lambda r, c: (-r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (-c, -r),
+)
+
+
+def canonicalize(constraints):
+    """
+    Return (key, mapping) for a list of (cells, mines) constraints.
+
+    key is hashable and identical for all translations, rotations and
+    reflections of the pattern; mapping takes canonical cells back to the
+    original cells.
+    """
+    cells = {cell for group, _ in constraints for cell in group}
+    best = None
+    for transform in _TRANSFORMS:
+        moved = {cell: transform(*cell) for cell in cells}
+        min_r = min(r for r, _ in moved.values())
+        min_c = min(c for _, c in moved.values())
+        moved = {cell: (r - min_r, c - min_c) for cell, (r, c) in moved.items()}
+        key = tuple(sorted((tuple(sorted(moved[cell] for cell in group)), mines)
+                           for group, mines in constraints))
+        if best is None or key < best[0]:
+            best = (key, moved)
+    key, moved = best
+    return key, {canonical: original for original, canonical in moved.items()}
+
+
+class PatternCache:
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def _store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _lookup(self, constraints, deadline):
+        key, mapping = canonicalize(constraints)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            canonical = [([cell for cell in mapping if mapping[cell] in group], mines)
+                         for group, mines in constraints]
+            cells, totals = enumerate_component(canonical, deadline)
+            entry = self._make_entry(cells, totals)
+            self._store(key, entry)
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return entry, mapping
+
+    def solve(self, constraints, deadline=None):
+        """
+        Solution counts for one component, from the cache if its pattern was seen before.
+
+        Returns (cells, totals) in the caller's coordinates, where totals maps
+        a mine count to (solutions, per-cell mine counts) as in
+        enumerate_component. May raise BudgetExceeded on a cache miss.
+        """
+        entry, mapping = self._lookup(constraints, deadline)
+        return [mapping[cell] for cell in entry['cells']], entry['totals']
+
+    def deductions(self, constraints, deadline=None):
+        """Cells that are safe / mines in every solution of the component"""
+        entry, mapping = self._lookup(constraints, deadline)
+        return ({mapping[entry['cells'][i]] for i in entry['safe']},
+                {mapping[entry['cells'][i]] for i in entry['mines']})
+
+    def _make_entry(self, cells, totals):
+        solutions = sum(count for count, _ in totals.values())
+        per_cell = [sum(counts[i] for _, counts in totals.values()) for i in range(len(cells))]
+        return {
+            'cells': cells,
+            'totals': totals,
+            'safe': [i for i, count in enumerate(per_cell) if count == 0],
+            'mines': [i for i, count in enumerate(per_cell) if solutions and count == solutions],
+        }
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self, path=None):
+        """Write all entries to a JSON file (atomically, via a temporary file)"""
+        path = path or self.path
+        data = {'version': 1, 'entries': [
+            [[[[list(cell) for cell in group], mines] for group, mines in key],
+             {'cells': [list(cell) for cell in entry['cells']],
+              'totals': {str(k): [count, counts] for k, (count, counts) in entry['totals'].items()}}]
+            for key, entry in self.entries.items()
+        ]}
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def load(self, path=None):
+        """Merge entries from a JSON file written by save()"""
+        path = path or self.path
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        loaded = 0
+        for raw_key, raw_entry in data.get('entries', []):
+            key = tuple((tuple(tuple(cell) for cell in group), mines) for group, mines in raw_key)
+            cells = [tuple(cell) for cell in raw_entry['cells']]
+            totals = {int(k): (count, counts) for k, (count, counts) in raw_entry['totals'].items()}
+            self._store(key, self._make_entry(cells, totals))
+            loaded += 1
+        return loaded
@@ -0,0 +1,146 @@
+# minesweeper/core/probability.py
+"""
+Mine probabilities for every unknown cell of a Board.
+
+The frontier (unknown cells next to revealed numbers) is split into
+independent components: two cells are in the same component when a
+constraint links them. Each component's solutions are enumerated by
+backtracking and counted per number of mines. Components are then combined
+with the interior (unknown cells next to no number) using the global mine
+count: a frontier total of t mines leaves C(interior, remaining - t) ways to
+place the rest, which weights every solution.
+
+Enumeration is bounded by component size and a time budget. A component
+that exceeds either is estimated from random solutions instead, and the
+result is marked as not exact. The budget covers the whole compute() call:
+enumeration and sampling of every component share one deadline.
+"""
+import random
+import time
+from math import comb
+
+from minesweeper.core.components import BudgetExceeded, constraint_components, sample_component
+from minesweeper.core.pattern_cache import PatternCache
+from minesweeper.core.solver import Solver
+
+# Component results kept between calls; the same components reappear move after move
+COMPONENT_CACHE_SIZE = 4096
+
+
+def _convolve(a, b):
+    result = {}
+    for i, x in a.items():
+        for j, y in b.items():
+            result[i + j] = result.get(i + j, 0) + x * y
+    return result
+
+
+class ProbabilityEngine:
+    def __init__(self, board, solver=None, trust_flags=True, max_component_cells=48,
+                 time_budget=0.05, samples=400, rng=None, pattern_cache=None):
+        self.board = board
+        self.solver = solver if solver is not None else Solver(board, trust_flags=trust_flags)
+        self.max_component_cells = max_component_cells
+        self.time_budget = time_budget
+        self.samples = samples
+        self.rng = rng or random.Random()
+        # Share one cache between engines (and solvers) to reuse patterns across games
+        self.pattern_cache = pattern_cache if pattern_cache is not None else PatternCache(COMPONENT_CACHE_SIZE)
+
+    def _solve_component(self, constraints, deadline):
+        n_cells = len({cell for cells, _ in constraints for cell in cells})
+        if n_cells <= self.max_component_cells:
+            try:
+                cells, totals = self.pattern_cache.solve(constraints, deadline)
+                return cells, totals, True
+            except BudgetExceeded:
+                pass
+        # Sampling shares the call's deadline, so many large components still fit the budget
+        # (each gets at least one sample, whatever time is left)
+        cells, totals = sample_component(constraints, self.samples, self.rng, deadline)
+        return cells, totals, False
+
+    def compute(self):
+        """
+        Return a dict with:
+          'probabilities': {cell: P(mine)} for every cell not yet revealed
+          'interior': P(mine) for unknown cells next to no number
+          'exact': False if any component had to be sampled
+          'components': number of frontier components
+        """
+        deadline = time.perf_counter() + self.time_budget
+        solver = self.solver
+        solver.deduce()
+        board = self.board
+
+        known_mines = set(solver.known_mines)
+        if solver.trust_flags:
+            known_mines.update(board.iter_marked())
+        constraints = [(frozenset(constraint.cells), constraint.mines)
+                       for constraint in solver.constraints.values()]
+        frontier = {cell for cells, _ in constraints for cell in cells}
+        unknown = [(r, c) for r in range(board.rows) for c in range(board.cols)
+                   if not board.is_revealed(r, c) and (r, c) not in known_mines
+                   and (r, c) not in solver.known_safe]
+        interior = [cell for cell in unknown if cell not in frontier]
+        remaining = board.mines - len(known_mines)
+
+        solved = []
+        exact = True
+        for component in constraint_components(constraints):
+            cells, totals, component_exact = self._solve_component(component, deadline)
+            exact = exact and component_exact
+            solved.append((cells, totals))
+
+        # Weight of a frontier total of t mines, including the ways to fill the interior
+        def interior_ways(t):
+            rest = remaining - t
+            return comb(len(interior), rest) if 0 <= rest <= len(interior) else 0
+
+        distributions = [{k: solutions for k, (solutions, _) in totals.items()} for _, totals in solved]
+        combined = {0: 1}
+        for distribution in distributions:
+            combined = _convolve(combined, distribution)
+        total_weight = sum(ways * interior_ways(t) for t, ways in combined.items())
+
+        probabilities = {cell: 1.0 for cell in known_mines}
+        probabilities.update({cell: 0.0 for cell in solver.known_safe})
+        if total_weight == 0:
+            # Inconsistent view (e.g. wrong flags); fall back to uniform density
+            density = remaining / len(unknown) if unknown else 0.0
+            probabilities.update({cell: density for cell in unknown})
+            return {'probabilities': probabilities, 'interior': density, 'exact': False,
+                    'components': len(solved)}
+
+        for i, (cells, totals) in enumerate(solved):
+            others = {0: 1}
+            for j, distribution in enumerate(distributions):
+                if j != i:
+                    others = _convolve(others, distribution)
+            cell_weights = [0] * len(cells)
+            for k, (_, counts) in totals.items():
+                weight = sum(ways * interior_ways(k + t) for t, ways in others.items())
+                if weight:
+                    for idx, count in enumerate(counts):
+                        cell_weights[idx] += count * weight
+            for cell, weight in zip(cells, cell_weights):
+                probabilities[cell] = weight / total_weight
+
+        interior_probability = 0.0
+        if interior:
+            expected = sum(ways * interior_ways(t) * (remaining - t) for t, ways in combined.items())
+            interior_probability = expected / total_weight / len(interior)
+            probabilities.update({cell: interior_probability for cell in interior})
+
+        return {'probabilities': probabilities, 'interior': interior_probability, 'exact': exact,
+                'components': len(solved)}
+
+    def safest_cell(self, result=None):
+        """Unrevealed, unflagged cell with the lowest mine probability, and that probability"""
+        result = result or self.compute()
+        candidates = [(p, cell) for cell, p in result['probabilities'].items()
+                      if not self.board.is_marked(*cell)]
+        if not candidates:
+            return None, None
+        p, cell = min(candidates)
+        return cell, p
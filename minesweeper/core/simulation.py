@@ -0,0 +1,89 @@
+# minesweeper/core/simulation.py
+"""
+Bot strategies for headless full-game simulation (see Game.autoplay).
+
+A strategy picks the first click and, after every move, the next cells to
+click together with whether that move is a guess:
+
+* random       -- clicks a random unrevealed cell every move
+* deduction    -- clicks every cell the solver proves safe; when stuck,
+                  guesses a random cell not known to be a mine
+* probability  -- like deduction, but guesses the cell with the lowest
+                  exact mine probability
+* deduction_sets -- deduction with the set-based solver.Solver instead of
+                  the bitset solver, to compare solver implementations
+
+Solver-based strategies start from the centre, where openings are largest.
+"""
+import random
+
+from minesweeper.core.bitsolver import BitsetSolver
+from minesweeper.core.pattern_cache import PatternCache
+from minesweeper.core.probability import ProbabilityEngine
+from minesweeper.core.solver import Solver
+
+# Shared by all games in one process so component patterns are solved once
+_pattern_cache = PatternCache()
+
+
+def _hidden_cells(board, exclude=()):
+    return [(r, c) for r in range(board.rows) for c in range(board.cols)
+            if not board.is_revealed(r, c) and not board.is_marked(r, c) and (r, c) not in exclude]
+
+
+class RandomStrategy:
+    name = 'random'
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
+    def first_click(self, game):
+        return self.rng.randrange(game.board.rows), self.rng.randrange(game.board.cols)
+
+    def next_moves(self, game, changed):
+        return [self.rng.choice(_hidden_cells(game.board))], True
+
+
+class DeductionStrategy:
+    name = 'deduction'
+    solver_class = BitsetSolver
+
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.solver = None
+
+    def first_click(self, game):
+        return game.board.rows // 2, game.board.cols // 2
+
+    def next_moves(self, game, changed):
+        if self.solver is None or self.solver.board is not game.board:
+            self.solver = self.solver_class(game.board, pattern_cache=_pattern_cache)
+        else:
+            self.solver.update(changed)
+        safe, _ = self.solver.deduce()
+        if safe:
+            return sorted(safe), False
+        return [self.guess(game)], True
+
+    def guess(self, game):
+        return self.rng.choice(_hidden_cells(game.board, exclude=self.solver.known_mines))
+
+
+class ProbabilityStrategy(DeductionStrategy):
+    name = 'probability'
+
+    def guess(self, game):
+        engine = ProbabilityEngine(game.board, solver=self.solver, rng=self.rng, pattern_cache=_pattern_cache)
+        cell, _ = engine.safest_cell()
+        return cell
+
+
+class SetSolverStrategy(DeductionStrategy):
+    name = 'deduction_sets'
+    solver_class = Solver
+
+
+STRATEGIES = {strategy.name: strategy
+              for strategy in (RandomStrategy, DeductionStrategy, ProbabilityStrategy, SetSolverStrategy)}
+# Played by default; deduction_sets only matters when comparing solvers
+DEFAULT_STRATEGIES = ('random', 'deduction', 'probability')
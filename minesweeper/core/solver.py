@@ -0,0 +1,242 @@
+# minesweeper/core/solver.py
+"""
+Deterministic Minesweeper solver.
+
+Works only from what a player can see on a Board: revealed numbers and
+(optionally) flags. Every revealed number gives a constraint "exactly k of
+these unknown cells are mines". The solver derives certainly-safe and
+certainly-mine cells with
+
+* single-constraint rules (k == 0 -> all safe, k == size -> all mines), and
+* pairwise subset/overlap reduction between constraints that share cells
+  (covers 1-1, 1-2, 1-2-1 style patterns).
+
+State is kept between moves: after a reveal or flag only the constraints
+around the changed cells are rebuilt and re-examined. Start-up reads the
+revealed numbers that still have hidden neighbours from the Board's own
+frontier bookkeeping (see constrained_numbers) instead of scanning the grid.
+
+With a PatternCache, whole frontier components are also solved (and
+cached by shape) whenever the local rules find no safe cell.
+"""
+from collections import defaultdict
+
+from minesweeper.core.components import BudgetExceeded, constraint_components
+
+
+def constrained_numbers(board):
+    """Revealed numbers with a hidden neighbour, flagged or not
+
+    The board's active numbers, plus the numbers around flags (whose hidden
+    neighbours may all be flagged); the only numbers that give a constraint.
+    """
+    numbers = set(board.iter_active_numbers())
+    for r, c in board.iter_marked():
+        numbers.update(cell for cell in board.neighbours(r, c) if board.is_revealed(*cell))
+    return numbers
+
+
+class Constraint:
+    """Exactly `mines` of `cells` are mines"""
+    __slots__ = ('cells', 'mines')
+
+    def __init__(self, cells, mines):
+        self.cells = cells
+        self.mines = mines
+
+    def __repr__(self):
+        return f"Constraint({sorted(self.cells)}, {self.mines})"
+
+
+class Solver:
+    def __init__(self, board, trust_flags=True, pattern_cache=None, max_pattern_cells=16):
+        self.board = board
+        self.trust_flags = trust_flags
+        self.pattern_cache = pattern_cache
+        self.max_pattern_cells = max_pattern_cells
+        self.constraints = {}                      # number cell -> Constraint over its unknown neighbours
+        self.cell_constraints = defaultdict(set)   # unknown cell -> number cells constraining it
+        self.known_safe = set()                    # deduced safe, not revealed yet
+        self.known_mines = set()                   # deduced mines
+        self.contradictions = set()                # number cells whose constraint can't be satisfied
+        self._dirty = set()
+        self.sync()
+
+    # ------------------------------------------------------------------
+    # Visible state
+
+    def _rebuild(self, number_cell):
+        """Recompute the constraint of one revealed number cell from the board"""
+        old = self.constraints.pop(number_cell, None)
+        if old is not None:
+            for cell in old.cells:
+                self.cell_constraints[cell].discard(number_cell)
+        self.contradictions.discard(number_cell)
+
+        r, c = number_cell
+        grid = self.board.grid
+        cell = grid[r][c]
+        if not cell.revealed or cell.is_mine:
+            return
+
+        unknown = set()
+        mines = cell.value
+        for nr, nc in self.board.neighbours(r, c):
+            neighbour = grid[nr][nc]
+            if neighbour.revealed:
+                continue
+            if (nr, nc) in self.known_mines or (self.trust_flags and neighbour.marked):
+                mines -= 1
+            elif (nr, nc) not in self.known_safe:
+                unknown.add((nr, nc))
+
+        if mines < 0 or mines > len(unknown):
+            self.contradictions.add(number_cell)
+            return
+        if not unknown:
+            return
+
+        constraint = Constraint(unknown, mines)
+        self.constraints[number_cell] = constraint
+        for cell in unknown:
+            self.cell_constraints[cell].add(number_cell)
+        self._dirty.add(number_cell)
+
+    def sync(self):
+        """Rebuild all constraints from scratch (used once at start-up)"""
+        self.constraints.clear()
+        self.cell_constraints.clear()
+        self.contradictions.clear()
+        self._dirty.clear()
+        for number_cell in constrained_numbers(self.board):
+            self._rebuild(number_cell)
+        self.known_safe = {cell for cell in self.known_safe if not self.board.is_revealed(*cell)}
+
+    def update(self, changed_cells):
+        """Bring the solver up to date after cells were revealed, flagged or unflagged
+
+        changed_cells is e.g. the list returned by Game.click, or [(r, c)]
+        after Game.mark. Only constraints touching those cells are rebuilt.
+        """
+        affected = set()
+        for r, c in changed_cells:
+            if self.board.is_revealed(r, c):
+                # A newly revealed cell leaves the constraints it was part of and adds its own
+                self.known_safe.discard((r, c))
+                affected.add((r, c))
+                affected.update(self.cell_constraints.get((r, c), ()))
+            else:
+                # A changed flag changes the counts of every number around it
+                for nr, nc in self.board.neighbours(r, c):
+                    if self.board.is_revealed(nr, nc):
+                        affected.add((nr, nc))
+        for number_cell in affected:
+            self._rebuild(number_cell)
+
+    # ------------------------------------------------------------------
+    # Deduction
+
+    def _mark_known(self, cells, is_mine, queue):
+        target = self.known_mines if is_mine else self.known_safe
+        for cell in cells:
+            if cell in self.known_mines or cell in self.known_safe:
+                continue
+            target.add(cell)
+            for number_cell in list(self.cell_constraints.get(cell, ())):
+                constraint = self.constraints[number_cell]
+                constraint.cells.discard(cell)
+                self.cell_constraints[cell].discard(number_cell)
+                if is_mine:
+                    constraint.mines -= 1
+                if not constraint.cells:
+                    del self.constraints[number_cell]
+                else:
+                    queue.add(number_cell)
+            self.cell_constraints.pop(cell, None)
+
+    def _neighbouring_constraints(self, number_cell):
+        constraint = self.constraints[number_cell]
+        others = set()
+        for cell in constraint.cells:
+            others.update(self.cell_constraints[cell])
+        others.discard(number_cell)
+        return others
+
+    def _examine(self, number_cell, queue):
+        constraint = self.constraints.get(number_cell)
+        if constraint is None:
+            return
+
+        # Single-constraint rules
+        if constraint.mines == 0:
+            self._mark_known(set(constraint.cells), False, queue)
+            return
+        if constraint.mines == len(constraint.cells):
+            self._mark_known(set(constraint.cells), True, queue)
+            return
+
+        # Pairwise reduction against constraints sharing a cell
+        for other_cell in self._neighbouring_constraints(number_cell):
+            a = self.constraints.get(number_cell)
+            if a is None:
+                return
+            b = self.constraints.get(other_cell)
+            if b is None:
+                continue
+            shared = a.cells & b.cells
+            only_a = a.cells - shared
+            only_b = b.cells - shared
+            # Mines in the shared cells are bounded by both constraints
+            shared_max = min(a.mines, b.mines, len(shared))
+            shared_min = max(0, a.mines - len(only_a), b.mines - len(only_b))
+            if only_a and a.mines - shared_min == 0:
+                self._mark_known(only_a, False, queue)
+            elif only_a and a.mines - shared_max == len(only_a):
+                self._mark_known(only_a, True, queue)
+            if only_b and b.mines - shared_min == 0:
+                self._mark_known(only_b, False, queue)
+            elif only_b and b.mines - shared_max == len(only_b):
+                self._mark_known(only_b, True, queue)
+
+    def deduce(self):
+        """Run deductions to a fixed point and return (safe cells, mine cells)
+
+        Both sets contain only cells that are not revealed yet. Flagged cells
+        are only listed as mines if the solver deduced them too.
+        """
+        queue = self._dirty
+        self._dirty = set()
+        while True:
+            while queue:
+                self._examine(queue.pop(), queue)
+            if self.known_safe or self.pattern_cache is None or not self._solve_components(queue):
+                break
+        return set(self.known_safe), set(self.known_mines)
+
+    def _solve_components(self, queue):
+        """Deduce from whole components through the pattern cache; True if anything was found"""
+        constraints = [(constraint.cells, constraint.mines) for constraint in self.constraints.values()]
+        found = False
+        for component in constraint_components(constraints):
+            if len({cell for cells, _ in component for cell in cells}) > self.max_pattern_cells:
+                continue
+            try:
+                safe, mines = self.pattern_cache.deductions(component)
+            except BudgetExceeded:
+                continue
+            if safe or mines:
+                self._mark_known(safe, False, queue)
+                self._mark_known(mines, True, queue)
+                found = True
+        return found
+
+    def safe_cells(self):
+        return set(self.known_safe)
+
+    def mine_cells(self):
+        return set(self.known_mines)
+
+    def frontier(self):
+        """The board's frontier less the cells deduced since"""
+        return {cell for cell in self.board.iter_frontier()
+                if cell not in self.known_safe and cell not in self.known_mines}
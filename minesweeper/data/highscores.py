@@ -1,81 +1,126 @@
 # minesweeper/data/highscores.py
-import json
+import logging
 import os
 from datetime import datetime
 
+from minesweeper.data.remote import LeaderboardClient, RemoteDistributions, RemoteScoreStore
+from minesweeper.data.sketch import TimeDistributions
+from minesweeper.data.stores import RANK_METRICS, TOP_N, JSONScoreStore, SQLiteScoreStore
+from minesweeper.log import get_logger
+
+log = get_logger('highscores')
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'highscores.db')
+# Imported into a new default database once
+LEGACY_JSON_PATH = os.path.join(DATA_DIR, 'highscores.json')
+# Submissions waiting for the leaderboard service in client mode
+LEADERBOARD_QUEUE_PATH = os.path.join(DATA_DIR, 'leaderboard_queue.json')
+
+# Quantiles of winning times shown as percentile bands
+TIME_BANDS = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def open_store(path=None):
+    """Store for a path: JSON for a .json file, SQLite otherwise (default: the data folder's database)"""
+    if path is None:
+        return SQLiteScoreStore(DEFAULT_DB_PATH, migrate_from=LEGACY_JSON_PATH)
+    if path.endswith('.json'):
+        return JSONScoreStore(path)
+    return SQLiteScoreStore(path)
+
+
 class HighScoreManager:
-    def __init__(self, path=None):
-        # Use absolute path to data folder
-        if path is None:
-            # Get the directory where this file is located (data folder)
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            self.path = os.path.join(current_dir, 'highscores.json')
-        else:
-            self.path = path
-        
-        print(f"Highscores file path: {self.path}")  # Debug
-        self.scores = self._load()
-
-    def _load(self):
-        print(f"Loading highscores from: {self.path}")  # Debug
-        if os.path.exists(self.path):
-            try:
-                with open(self.path, 'r') as f:
-                    data = json.load(f)
-                    print(f"Loaded {len(data)} highscore configurations")  # Debug
-                    return data
-            except Exception as e:
-                print(f"Error loading highscores: {e}")  # Debug
-                return {}
+    """
+    Highscores per board configuration.
+
+    Every entry has a name, time and date; entries from games with known
+    boards also carry the board code, 3BV, clicks and 3BV/s. Scores rank by
+    time or by efficiency (3BV/s). Storage is pluggable (see data.stores):
+    by default the full history goes to an SQLite database, and a path
+    ending in .json uses a JSON snapshot with an append-only journal.
+
+    Besides the highscores, the times of all finished games, won or lost,
+    are summarised in a quantile sketch per configuration (kept next to the
+    store as <name>_times.json), so a win can be placed among all wins.
+
+    With `server` (a leaderboard service URL, see data.leaderboard) scores
+    and game times go to the shared service instead, queued locally while it
+    can't be reached.
+    """
+    def __init__(self, path=None, store=None, server=None):
+        if server is not None:
+            client = LeaderboardClient(server, queue_path=LEADERBOARD_QUEUE_PATH)
+            self.store = RemoteScoreStore(client)
+            self.distributions = RemoteDistributions(client)
         else:
-            print(f"Highscores file not found at: {self.path}")  # Debug
-            # Create empty file
-            self._save()
-            return {}
-
-    def _save(self):
-        try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.path), exist_ok=True)
-            with open(self.path, 'w') as f:
-                json.dump(self.scores, f, indent=2)
-            print(f"Saved highscores to: {self.path}")  # Debug
-        except Exception as e:
-            print(f"Error saving highscores: {e}")  # Debug
+            self.store = store if store is not None else open_store(path)
+        self.path = getattr(self.store, 'path', path)
+        log.debug("Highscores store: %s at %s", type(self.store).__name__, self.path)
+        if server is None:
+            self.distributions = TimeDistributions(os.path.splitext(self.path)[0] + '_times.json')
 
     def _key(self, rows, cols, mines):
         return f"{rows}x{cols}_{mines}"
 
-    def is_highscore(self, rows, cols, mines, time):
+    def is_highscore(self, rows, cols, mines, time, bbbv_per_second=None):
+        """True if the result would enter the top TOP_N by time or, if given, by 3BV/s"""
         k = self._key(rows, cols, mines)
-        lst = self.scores.get(k, [])
-        print(f"Checking highscore for {k}: {len(lst)} existing scores, new time: {time:.2f}")  # Debug
-        return len(lst) < 10 or time < max(s['time'] for s in lst)
+        log.debug("Checking highscore for %s: new time: %.2f", k, time)
+        if self.store.qualifies(k, 'time', time, TOP_N):
+            return True
+        return bbbv_per_second is not None and self.store.qualifies(k, 'efficiency', bbbv_per_second, TOP_N)
 
-    def add_score(self, rows, cols, mines, name, time):
+    def add_score(self, rows, cols, mines, name, time, board_code=None, bbbv=None, clicks=None):
         k = self._key(rows, cols, mines)
         entry = {
             'name': name,
             'time': time,
             'date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
-        print(f"Adding score for {k}: {entry}")  # Debug
-        
-        if k not in self.scores:
-            self.scores[k] = []
-        
-        self.scores[k].append(entry)
-        self.scores[k] = sorted(self.scores[k], key=lambda x: x['time'])[:10]
-        self._save()
-        
-        # Verify it was saved
-        saved_scores = self.get_top_scores(rows, cols, mines)
-        print(f"Verified saved scores for {k}: {len(saved_scores)} entries")  # Debug
-
-    def get_top_scores(self, rows, cols, mines):
+        if board_code is not None:
+            entry['board'] = board_code
+        if clicks is not None:
+            entry['clicks'] = clicks
+        if bbbv is not None:
+            entry['bbbv'] = bbbv
+            entry['bbbv_per_second'] = bbbv / time if time > 0 else None
+        log.info("Adding score for %s: %s", k, entry)
+        self.store.add(k, entry)
+
+        # Verify it was saved (an extra query, so only when it will be logged)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Verified saved scores for %s: %d entries", k, len(self.get_top_scores(rows, cols, mines)))
+
+    def get_top_scores(self, rows, cols, mines, metric='time', limit=TOP_N):
+        """Top entries ranked by 'time' (fastest first) or 'efficiency' (highest 3BV/s first)"""
+        if metric not in RANK_METRICS:
+            raise ValueError(f"metric must be one of {list(RANK_METRICS)}")
         k = self._key(rows, cols, mines)
-        scores = self.scores.get(k, [])
-        print(f"Retrieving scores for {k}: {len(scores)} entries")  # Debug
-        for i, score in enumerate(scores):
-            print(f"  {i+1}. {score['name']} - {score['time']:.2f}s")  # Debug
-        return scores
\ No newline at end of file
+        scores = self.store.top(k, metric, limit)
+        log.debug("Retrieving %s ranking for %s: %d entries", metric, k, len(scores))
+        return scores
+
+    def record_game(self, rows, cols, mines, time, won):
+        """Fold the time of a finished game into its configuration's distribution"""
+        self.distributions.record(self._key(rows, cols, mines), time, won)
+
+    def percentile(self, rows, cols, mines, time):
+        """Percentage of winning times in the configuration slower than `time`, or None without data"""
+        sketch = self.distributions.get(self._key(rows, cols, mines))
+        if not sketch:
+            return None
+        return 100 * (1 - sketch.rank(time))
+
+    def time_bands(self, rows, cols, mines):
+        """Games won and lost, and the winning time at each of TIME_BANDS (empty without wins)"""
+        k = self._key(rows, cols, mines)
+        won, lost = self.distributions.get(k, 'won'), self.distributions.get(k, 'lost')
+        return {
+            'won': len(won) if won else 0,
+            'lost': len(lost) if lost else 0,
+            'bands': dict(zip(TIME_BANDS, won.quantiles(TIME_BANDS))) if won else {},
+        }
+
+    def close(self):
+        self.store.close()
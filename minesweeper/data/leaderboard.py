@@ -0,0 +1,460 @@
+# minesweeper/data/leaderboard.py
+"""
+Shared leaderboard service for many game instances.
+
+    python -m minesweeper.data.leaderboard --port 8765 --db leaderboard.db
+
+A small HTTP/JSON server on asyncio (standard library only) in front of a
+highscore store and the game-time sketches:
+
+    POST /submit       {"scores": [{"id", "config", "entry"}, ...],
+                        "games": [{"id", "config", "time", "won"}, ...]}
+    GET  /top          ?config=9x9_10&metric=time&limit=10    (limit 1..TOP_N)
+    GET  /qualifies    ?config=...&metric=time&value=51.2&limit=10
+    GET  /sketch       ?config=...&outcome=won  -> a KLL sketch (see data.sketch)
+    GET  /percentile   ?config=...&time=51.2
+    GET  /events       server-sent events, one per accepted score
+    GET  /health
+
+Submissions come in batches: a batch is one store transaction and one
+sketch save. Rankings are answered from an in-memory index holding the best
+INDEX_DEPTH entries per configuration and metric, filled from the store the
+first time a configuration is asked for and kept current as scores arrive.
+Connections are kept alive, so a
+client pays for one TCP connection however many requests it makes.
+
+Every entry of a batch is checked before anything is stored, and a batch
+that can't be stored gets an error answer, never a dropped connection: a
+client resends on a dropped connection, and would resend a bad batch
+forever. A 400 lists the rejected entries ("rejected": {"scores": [index,
+...], "games": [...]}) so the client can drop only those. The optional
+"id" of an entry makes resending it harmless: the last SEEN_IDS ids are
+remembered and an entry seen before is accepted without being stored
+again. Work that touches the store or the sketch file (SQLite commits,
+fsyncs, lazy index loads) runs on one worker thread, in arrival order, so
+it never stalls the event loop.
+
+Subscribers to /events get every accepted score with its rank. Each has a
+bounded queue; one that falls SUBSCRIBER_QUEUE events behind is dropped
+rather than slowing the others down.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import os
+import sqlite3
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qsl, urlsplit
+
+from minesweeper import log
+from minesweeper.data.highscores import open_store
+from minesweeper.data.sketch import TimeDistributions
+from minesweeper.data.stores import ENTRY_FIELDS, RANK_METRICS, TOP_N, sort_key
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Entries per configuration and metric kept in memory
+INDEX_DEPTH = 100
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 20
+# Events a subscriber may fall behind before it is dropped
+SUBSCRIBER_QUEUE = 256
+# Submission ids remembered, so an entry resent after a lost answer is stored once
+SEEN_IDS = 100_000
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+logger = log.get_logger('leaderboard')
+
+
+class RequestError(Exception):
+    """An error answer; `details` go into the JSON body next to the message"""
+    def __init__(self, status, message, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+    def payload(self):
+        return {'error': str(self), **self.details}
+
+
+class LeaderboardIndex:
+    """Best INDEX_DEPTH entries per (configuration, metric), loaded lazily from a store"""
+    def __init__(self, store, depth=INDEX_DEPTH):
+        self.store = store
+        self.depth = depth
+        # (key, metric) -> sorted [(sort key, arrival number, entry)]
+        self._rankings = {}
+        self._arrivals = 0
+
+    def _ranking(self, key, metric):
+        ranking = self._rankings.get((key, metric))
+        if ranking is None:
+            entries = self.store.top(key, metric, self.depth)
+            ranking = [(sort_key(entry, metric), -i, entry) for i, entry in enumerate(entries, 1)]
+            self._rankings[key, metric] = ranking
+        return ranking
+
+    def load(self, key):
+        """Load a configuration's rankings (before storing new entries for it, or they'd be indexed twice)"""
+        for metric in RANK_METRICS:
+            self._ranking(key, metric)
+
+    def add(self, key, entry):
+        """Index a stored entry; returns its 1-based rank per metric (None beyond the index)"""
+        ranks = {}
+        self._arrivals += 1
+        for metric in RANK_METRICS:
+            rank_key = sort_key(entry, metric)
+            if rank_key is None:
+                ranks[metric] = None
+                continue
+            ranking = self._ranking(key, metric)
+            item = (rank_key, self._arrivals, entry)
+            position = bisect.bisect_right(ranking, item)
+            ranks[metric] = position + 1 if position < self.depth else None
+            if position < self.depth:
+                ranking.insert(position, item)
+                del ranking[self.depth:]
+        return ranks
+
+    def top(self, key, metric, limit):
+        if limit > self.depth:
+            return self.store.top(key, metric, limit)
+        return [entry for _, _, entry in self._ranking(key, metric)[:limit]]
+
+    def qualifies(self, key, metric, value, limit):
+        if limit > self.depth:
+            return self.store.qualifies(key, metric, value, limit)
+        ranking = self._ranking(key, metric)
+        return len(ranking) < limit or sort_key({RANK_METRICS[metric][0]: value}, metric) < ranking[limit - 1][0]
+
+
+class LeaderboardService:
+    def __init__(self, store, distributions, index_depth=INDEX_DEPTH):
+        self.store = store
+        self.distributions = distributions
+        self.index = LeaderboardIndex(store, index_depth)
+        self._subscribers = set()
+        self._server = None
+        self._loop = None
+        self._seen = OrderedDict()
+        # One thread, so store calls never overlap (an SQLite connection isn't safe to share concurrently)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='leaderboard-store')
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        for queue in list(self._subscribers):
+            queue.put_nowait(None)
+        self._server.close()
+        await self._server.wait_closed()
+        self._executor.shutdown()
+
+    # -- HTTP ---------------------------------------------------------------
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                url = urlsplit(target)
+                params = dict(parse_qsl(url.query))
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if method == 'GET' and url.path == '/events':
+                    await self._stream_events(writer)
+                    break
+                try:
+                    status, payload = 200, await self._loop.run_in_executor(
+                        self._executor, self._dispatch, method, url.path, params, body)
+                except RequestError as e:
+                    status, payload = e.status, e.payload()
+                except Exception as e:
+                    logger.exception("Leaderboard request %s %s failed", method, url.path)
+                    status, payload = 500, {'error': f"internal error: {e}"}
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except RequestError as e:
+            _write_response(writer, e.status, e.payload(), keep_alive=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _dispatch(self, method, path, params, body):
+        routes = {
+            ('POST', '/submit'): lambda: self.submit(_parse_json(body)),
+            ('GET', '/top'): lambda: {'scores': self.index.top(
+                _config(params), _metric(params), _limit(params))},
+            ('GET', '/qualifies'): lambda: {'qualifies': self.index.qualifies(
+                _config(params), _metric(params), _number(params, 'value', float), _limit(params))},
+            ('GET', '/sketch'): lambda: self.sketch(_config(params), params.get('outcome', 'won')),
+            ('GET', '/percentile'): lambda: self.percentile(_config(params), _number(params, 'time', float)),
+            ('GET', '/health'): lambda: {'status': 'ok', 'subscribers': len(self._subscribers)},
+        }
+        route = routes.get((method, path))
+        if route is None:
+            if any(route_path == path for _, route_path in routes):
+                raise RequestError(405, f"{method} not allowed on {path}")
+            raise RequestError(404, f"no route {path}")
+        return route()
+
+    # -- Operations ---------------------------------------------------------
+
+    def submit(self, batch):
+        """Store a batch of scores and games; returns what was accepted (runs on the store thread)"""
+        if not isinstance(batch, dict):
+            raise RequestError(400, "body must be a JSON object")
+        scores, games = batch.get('scores', []), batch.get('games', [])
+        if not isinstance(scores, list) or not isinstance(games, list):
+            raise RequestError(400, "scores and games must be lists")
+        scores, games = self._parse_batch(scores, games)
+        accepted = {'scores': len(scores), 'games': len(games)}
+        # Entries already stored come back when a client missed our answer; accept them again, once
+        scores = [(item_id, score) for item_id, score in scores if item_id not in self._seen]
+        games = [(item_id, game) for item_id, game in games if item_id not in self._seen]
+        ids = [item_id for item_id, _ in scores + games if item_id is not None]
+        scores = [score for _, score in scores]
+        games = [game for _, game in games]
+        try:
+            for key in {key for key, _ in scores}:
+                self.index.load(key)
+            if scores:
+                self.store.add_many(scores)
+        except sqlite3.IntegrityError as e:
+            raise RequestError(400, f"scores rejected by the store: {e}")
+        except (sqlite3.Error, OSError) as e:
+            # Nothing of the batch was stored; the client keeps it and retries
+            logger.error("Error storing %d scores: %s", len(scores), e)
+            raise RequestError(500, f"scores could not be stored: {e}")
+        if games:
+            self.distributions.record_many(games)
+        for item_id in ids:
+            self._seen[item_id] = None
+        while len(self._seen) > SEEN_IDS:
+            self._seen.popitem(last=False)
+        for key, entry in scores:
+            ranks = self.index.add(key, entry)
+            self._loop.call_soon_threadsafe(
+                self._publish, {'type': 'score', 'config': key, 'entry': entry, 'ranks': ranks})
+        logger.debug("Stored %d scores and %d games", len(scores), len(games))
+        return {'accepted': accepted}
+
+    def _parse_batch(self, scores, games):
+        """[(id, (key, entry))] and [(id, (key, time, won))]; every bad entry is named in one 400"""
+        parsed = {'scores': [], 'games': []}
+        rejected = {'scores': [], 'games': []}
+        errors = []
+        for kind, items, parse in (('scores', scores, _score), ('games', games, _game)):
+            for i, item in enumerate(items):
+                try:
+                    value = parse(item)
+                    item_id = item.get('id')
+                    if item_id is not None and not isinstance(item_id, str):
+                        raise RequestError(400, "an id must be a string")
+                except RequestError as e:
+                    rejected[kind].append(i)
+                    errors.append(str(e))
+                else:
+                    parsed[kind].append((item_id, value))
+        if errors:
+            # The client drops just these entries and resends the rest
+            raise RequestError(400, f"{len(errors)} entries rejected: {errors[0]}", rejected=rejected)
+        return parsed['scores'], parsed['games']
+
+    def sketch(self, key, outcome):
+        sketch = self.distributions.get(key, outcome)
+        return {'sketch': sketch.to_dict() if sketch else None}
+
+    def percentile(self, key, time):
+        sketch = self.distributions.get(key, 'won')
+        return {'percentile': 100 * (1 - sketch.rank(time)) if sketch else None}
+
+    # -- Events -------------------------------------------------------------
+
+    def _publish(self, event):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A stalled subscriber is dropped instead of buffering without bound
+                self._subscribers.discard(queue)
+                logger.warning("Dropped a leaderboard subscriber that fell behind")
+
+    async def _stream_events(self, writer):
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE)
+        self._subscribers.add(queue)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        try:
+            await writer.drain()
+            while queue in self._subscribers:
+                event = await queue.get()
+                if event is None:
+                    break
+                writer.write(f"data: {json.dumps(event)}\n\n".encode())
+                await writer.drain()
+        finally:
+            self._subscribers.discard(queue)
+
+
+# -- Request parsing ----------------------------------------------------------
+
+async def _read_request(reader):
+    """(method, target, headers, body) of the next request, or None at end of stream"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise RequestError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise RequestError(400, "Content-Length must be a number")
+    if length < 0:
+        raise RequestError(400, "Content-Length must not be negative")
+    if length > MAX_BODY:
+        raise RequestError(413, f"body larger than {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, headers, body
+
+
+def _write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        .encode() + body)
+
+
+def _parse_json(body):
+    try:
+        return json.loads(body or b'{}')
+    except ValueError as e:
+        raise RequestError(400, f"invalid JSON: {e}")
+
+
+def _config(params):
+    if 'config' not in params:
+        raise RequestError(400, "missing config")
+    return params['config']
+
+
+def _metric(params):
+    metric = params.get('metric', 'time')
+    if metric not in RANK_METRICS:
+        raise RequestError(400, f"metric must be one of {list(RANK_METRICS)}")
+    return metric
+
+
+def _number(params, name, kind, default=None):
+    if name not in params:
+        if default is None:
+            raise RequestError(400, f"missing {name}")
+        return default
+    try:
+        return kind(params[name])
+    except ValueError:
+        raise RequestError(400, f"{name} must be a number")
+
+
+def _limit(params):
+    limit = _number(params, 'limit', int, TOP_N)
+    if not 1 <= limit <= TOP_N:
+        raise RequestError(400, f"limit must be between 1 and {TOP_N}")
+    return limit
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _score(item):
+    """(config, entry) of a submitted score, with only the stored fields; a missing date is filled in"""
+    try:
+        key, entry = item['config'], item['entry']
+        if not isinstance(key, str) or not isinstance(entry['name'], str) or not _is_number(entry['time']):
+            raise TypeError
+    except (KeyError, TypeError):
+        raise RequestError(400, "scores need a config and an entry with a name and a time")
+    entry = {field: entry[field] for field in ENTRY_FIELDS if entry.get(field) is not None}
+    entry.setdefault('date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    if not isinstance(entry['date'], str) or not isinstance(entry.get('board', ''), str):
+        raise RequestError(400, "a score's date and board must be strings")
+    for field in ('bbbv', 'clicks'):
+        if field in entry and (not isinstance(entry[field], int) or isinstance(entry[field], bool)):
+            raise RequestError(400, f"a score's {field} must be an integer")
+    if 'bbbv_per_second' in entry and not _is_number(entry['bbbv_per_second']):
+        raise RequestError(400, "a score's bbbv_per_second must be a number")
+    return key, entry
+
+
+def _game(item):
+    try:
+        key, time, won = item['config'], float(item['time']), bool(item['won'])
+        if not isinstance(key, str) or not math.isfinite(time):
+            raise TypeError
+    except (KeyError, TypeError, ValueError):
+        raise RequestError(400, "games need a config, a time and won")
+    return key, time, won
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m minesweeper.data.leaderboard",
+        description="Serve a shared Minesweeper leaderboard over HTTP/JSON.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--db', help="highscore store (.db for SQLite, .json for JSON); "
+                                     "default: the game's own store")
+    log.add_arguments(parser)
+    args = parser.parse_args(argv)
+    log.configure(args.log_level or os.environ.get('MINESWEEPER_LOG_LEVEL', 'INFO'), args.log_format)
+
+    store = open_store(args.db)
+    distributions = TimeDistributions(os.path.splitext(store.path)[0] + '_times.json')
+    service = LeaderboardService(store, distributions)
+
+    async def serve():
+        host, port = await service.start(args.host, args.port)
+        logger.info("Leaderboard serving %s on http://%s:%d", store.path, host, port)
+        await service.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
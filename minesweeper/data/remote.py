@@ -0,0 +1,206 @@
+# minesweeper/data/remote.py
+"""
+Client side of the leaderboard service (see data.leaderboard).
+
+LeaderboardClient keeps one HTTP connection open and reuses it for every
+request, reconnecting once if the service closed it. Scores and game times
+are queued and sent together as one batch. If the service can't be
+reached, the queue is kept (and saved to disk, so it survives a restart)
+and goes out with the next request that gets through. Every queued entry
+carries a random id, so the service stores it once however often it is
+resent (e.g. when the connection drops after the service stored a batch
+but before its answer arrived). Entries the service rejects are dropped
+one by one; the rest of the batch is sent again.
+
+The client blocks on the network (up to TIMEOUT per request); the game
+calls it from a worker thread, never from the Tk thread.
+
+RemoteScoreStore and RemoteDistributions give HighScoreManager the same
+interface as the local stores and time sketches. While the service is
+offline, rankings come from the last answer received and a result counts
+as a highscore, so the player can still enter a name; it is submitted once
+the service is back.
+"""
+import http.client
+import json
+import os
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+from minesweeper.data.sketch import KLLSketch
+from minesweeper.data.stores import TOP_N
+from minesweeper.log import get_logger
+
+log = get_logger('highscores.remote')
+
+# Seconds to wait for the service before treating it as offline
+TIMEOUT = 2.0
+
+
+class LeaderboardRejected(ValueError):
+    """The service refused a request (4xx); `answer` is its JSON body"""
+    def __init__(self, message, answer):
+        super().__init__(message)
+        self.answer = answer
+
+
+class LeaderboardClient:
+    def __init__(self, url, queue_path=None, timeout=TIMEOUT):
+        parts = urlsplit(url if '://' in url else f"http://{url}")
+        self.url = url
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.queue_path = queue_path
+        self._connection = None
+        self.queue = self._load_queue()
+
+    def _load_queue(self):
+        if self.queue_path and os.path.exists(self.queue_path):
+            try:
+                with open(self.queue_path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                log.error("Error loading leaderboard queue from %s: %s", self.queue_path, e)
+        return {'scores': [], 'games': []}
+
+    def _save_queue(self):
+        if not self.queue_path:
+            return
+        temp_path = self.queue_path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.queue_path)), exist_ok=True)
+            with open(temp_path, 'w') as f:
+                json.dump(self.queue, f)
+            os.replace(temp_path, self.queue_path)
+        except OSError as e:
+            log.error("Error saving leaderboard queue to %s: %s", self.queue_path, e)
+
+    def _request(self, method, path, body=None):
+        """JSON answer of one request
+
+        Raises ConnectionError if the service can't be reached or fails on its
+        side (5xx), and LeaderboardRejected if it rejects the request (4xx).
+        A request is sent again on a new connection if a kept-alive one
+        turns out to be closed; submitted entries carry ids, so a batch the
+        service got the first time is not stored twice.
+        """
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        while True:
+            reused = self._connection is not None
+            if not reused:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._connection.request(method, path, body=payload, headers=headers)
+                response = self._connection.getresponse()
+                data = json.loads(response.read() or b'{}')
+                break
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                self._connection.close()
+                self._connection = None
+                # A kept-alive connection may have been closed by the service meanwhile: retry on a new one
+                if not reused:
+                    raise ConnectionError(f"leaderboard {self.url} unreachable: {e}") from e
+        if response.status >= 500:
+            # The service failed on its side; what was sent may go through later
+            raise ConnectionError(f"leaderboard {self.url} failed: {data.get('error', response.status)}")
+        if response.status != 200:
+            raise LeaderboardRejected(f"leaderboard {self.url}: {data.get('error', response.status)}", data)
+        return data
+
+    def get(self, path, **params):
+        return self._request('GET', f"{path}?{urlencode(params)}")
+
+    def submit(self, scores=(), games=()):
+        """Queue scores ({'config', 'entry'}) and games ({'config', 'time', 'won'}) and try to send them"""
+        self.queue['scores'].extend(dict(item, id=uuid.uuid4().hex) for item in scores)
+        self.queue['games'].extend(dict(item, id=uuid.uuid4().hex) for item in games)
+        self._save_queue()
+        return self.flush()
+
+    def flush(self):
+        """Send everything queued as one batch; False if the service is offline"""
+        while self.queue['scores'] or self.queue['games']:
+            try:
+                self._request('POST', '/submit', self.queue)
+            except ConnectionError as e:
+                log.warning("%s; %d scores and %d games queued", e, len(self.queue['scores']), len(self.queue['games']))
+                return False
+            except LeaderboardRejected as e:
+                rejected = e.answer.get('rejected') or {}
+                kept = {kind: [item for i, item in enumerate(self.queue[kind]) if i not in set(rejected.get(kind, ()))]
+                        for kind in ('scores', 'games')}
+                dropped = {kind: len(self.queue[kind]) - len(kept[kind]) for kind in kept}
+                if any(dropped.values()):
+                    # Resending a rejected entry can't help; the others go out again
+                    log.error("%s; dropping %d scores and %d games", e, dropped['scores'], dropped['games'])
+                    self.queue = kept
+                    self._save_queue()
+                    continue
+                # Not about any one entry (e.g. the body as a whole), so resending can't help either
+                log.error("%s; dropping %d scores and %d games", e, len(self.queue['scores']), len(self.queue['games']))
+            else:
+                log.debug("Submitted %d scores and %d games", len(self.queue['scores']), len(self.queue['games']))
+            self.queue = {'scores': [], 'games': []}
+            self._save_queue()
+        return True
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class RemoteScoreStore:
+    """Store interface backed by the leaderboard service"""
+    def __init__(self, client):
+        self.client = client
+        self.path = client.url
+        # Last rankings received, served while the service is offline
+        self._cache = {}
+
+    def add(self, key, entry):
+        self.add_many([(key, entry)])
+
+    def add_many(self, items):
+        self.client.submit(scores=[{'config': key, 'entry': entry} for key, entry in items])
+
+    def top(self, key, metric, limit=TOP_N):
+        self.client.flush()
+        try:
+            scores = self.client.get('/top', config=key, metric=metric, limit=limit)['scores']
+        except ConnectionError:
+            return self._cache.get((key, metric, limit), [])
+        self._cache[key, metric, limit] = scores
+        return scores
+
+    def qualifies(self, key, metric, value, limit=TOP_N):
+        self.client.flush()
+        try:
+            return self.client.get('/qualifies', config=key, metric=metric, value=value, limit=limit)['qualifies']
+        except ConnectionError:
+            return True
+
+    def close(self):
+        self.client.close()
+
+
+class RemoteDistributions:
+    """TimeDistributions interface backed by the leaderboard service"""
+    def __init__(self, client):
+        self.client = client
+
+    def record(self, key, time, won):
+        self.record_many([(key, time, won)])
+
+    def record_many(self, games):
+        self.client.submit(games=[{'config': key, 'time': time, 'won': won} for key, time, won in games])
+
+    def get(self, key, outcome='won'):
+        self.client.flush()
+        try:
+            sketch = self.client.get('/sketch', config=key, outcome=outcome)['sketch']
+        except ConnectionError:
+            return None
+        return KLLSketch.from_dict(sketch) if sketch else None
@@ -0,0 +1,178 @@
+# minesweeper/data/sketch.py
+"""
+Streaming quantiles of game times.
+
+KLLSketch summarises any number of values in O(k log(n/k)) memory and
+answers rank and quantile queries with a rank error of about 1.7/k (under
+1% for the default k). Level h holds items that each stand for 2**h
+values: when a level fills up it is sorted and every other item (from a
+random offset) moves up a level. Sketches merge by concatenating levels
+and compacting, so sketches kept apart (e.g. by two game instances) add up
+to the sketch of all their values.
+
+TimeDistributions keeps one sketch per configuration and outcome (won or
+lost) in a JSON file. Each instance saves only the times it recorded since
+its last save, merged into what is on disk, so concurrent instances don't
+overwrite each other's games.
+"""
+import json
+import math
+import os
+import random
+import time
+
+from minesweeper.data.stores import FileLock
+from minesweeper.log import get_logger
+
+log = get_logger('highscores.sketch')
+
+# Size of the top level; the rank error is about 1.7/k
+DEFAULT_K = 200
+# Each level below the top has this fraction of the capacity of the one above
+DECAY = 2 / 3
+MIN_CAPACITY = 2
+
+
+class KLLSketch:
+    def __init__(self, k=DEFAULT_K, rng=None):
+        self.k = k
+        self.levels = [[]]
+        self.n = 0
+        self._rng = rng or random.Random()
+
+    def __len__(self):
+        return self.n
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(MIN_CAPACITY, int(math.ceil(self.k * DECAY ** depth)))
+
+    def _size(self):
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def add(self, value):
+        self.levels[0].append(float(value))
+        self.n += 1
+        if self._size() >= self._max_size():
+            self._compress()
+
+    def _compress(self):
+        """Compact the lowest full level into the one above"""
+        for level, items in enumerate(self.levels):
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # With an odd count the largest item stays behind, keeping the total weight exact
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[level + 1].extend(items[self._rng.randrange(2)::2])
+                self.levels[level] = keep
+                return
+
+    def merge(self, other):
+        """Add the values summarised by another sketch to this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        while self._size() >= self._max_size():
+            self._compress()
+        return self
+
+    def _weighted(self):
+        return sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+
+    def rank(self, value):
+        """Estimated fraction of values <= value"""
+        if not self.n:
+            return 0.0
+        weight = sum(sum(v <= value for v in items) << level for level, items in enumerate(self.levels))
+        return weight / self.n
+
+    def quantiles(self, fractions):
+        """Estimated values at each fraction (0..1) of the sorted values; [] if empty"""
+        if not self.n:
+            return []
+        weighted = self._weighted()
+        results = []
+        for q in fractions:
+            target = q * self.n
+            total = 0
+            for value, weight in weighted:
+                total += weight
+                if total >= target:
+                    break
+            results.append(value)
+        return results
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'levels': self.levels}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['k'])
+        sketch.n = data['n']
+        sketch.levels = [list(items) for items in data['levels']] or [[]]
+        return sketch
+
+
+class TimeDistributions:
+    """Game-time sketches per configuration key and outcome, persisted as JSON"""
+    def __init__(self, path):
+        self.path = path
+        self.sketches = self._load()
+        # Times recorded here since the last save
+        self._pending = {}
+
+    def _load(self):
+        """Sketches in the file; one that can't be read is moved aside, so the next save can't overwrite it"""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return {key: {outcome: KLLSketch.from_dict(sketch) for outcome, sketch in outcomes.items()}
+                    for key, outcomes in data.items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            aside = f"{self.path}.corrupt-{int(time.time())}"
+            log.error("Error loading time distributions from %s: %s; moved to %s", self.path, e, aside)
+            os.replace(self.path, aside)
+            return {}
+
+    def record(self, key, time, won):
+        self.record_many([(key, time, won)])
+
+    def record_many(self, games):
+        """Add (key, time, won) games and save once"""
+        for key, time, won in games:
+            outcome = 'won' if won else 'lost'
+            for table in (self.sketches, self._pending):
+                table.setdefault(key, {}).setdefault(outcome, KLLSketch()).add(time)
+        self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with FileLock(self.path + '.lock'):
+            sketches = self._load()
+            for key, outcomes in self._pending.items():
+                for outcome, sketch in outcomes.items():
+                    sketches.setdefault(key, {}).setdefault(outcome, KLLSketch()).merge(sketch)
+            temp_path = self.path + '.tmp'
+            try:
+                with open(temp_path, 'w') as f:
+                    json.dump({key: {outcome: sketch.to_dict() for outcome, sketch in outcomes.items()}
+                               for key, outcomes in sketches.items()}, f)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                log.error("Error saving time distributions to %s: %s", self.path, e)
+                return
+        self.sketches = sketches
+        self._pending = {}
+
+    def get(self, key, outcome='won'):
+        """Sketch of the times of one outcome for a configuration, or None"""
+        return self.sketches.get(key, {}).get(outcome)
@@ -0,0 +1,429 @@
+# minesweeper/data/stores.py
+"""
+Storage backends for highscores.
+
+A store keeps score entries (dicts with name, time, date and optionally
+board, bbbv, clicks and bbbv_per_second) per configuration key and answers
+ranking queries for the metrics in RANK_METRICS:
+
+    add(key, entry), add_many([(key, entry), ...])
+    top(key, metric, limit)           -> best `limit` entries, best first
+    qualifies(key, metric, value, n)  -> would `value` enter the top n?
+    close()
+
+JSONScoreStore keeps a JSON snapshot plus an append-only journal of score
+events, with a sorted in-memory index per configuration and metric, and
+only the top TOP_N of any metric. SQLiteScoreStore keeps the full history
+in an indexed SQLite database (WAL mode) and answers rankings with
+ORDER BY ... LIMIT on those indexes.
+"""
+import bisect
+import json
+import os
+import sqlite3
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from minesweeper.log import get_logger
+
+log = get_logger('highscores.stores')
+
+# Ranking metrics: entry field and whether higher is better
+RANK_METRICS = {
+    'time': ('time', False),
+    'efficiency': ('bbbv_per_second', True),
+}
+
+# Entries per ranking shown and, in the JSON store, kept
+TOP_N = 10
+
+ENTRY_FIELDS = ('name', 'time', 'date', 'board', 'bbbv', 'clicks', 'bbbv_per_second')
+
+# JSON store: journal events per fsync, and per compaction into the snapshot
+FSYNC_EVERY = 8
+COMPACT_EVERY = 200
+
+# Version of the JSON snapshot layout {"format", "seq", "scores"}; older files are bare score dicts
+SNAPSHOT_FORMAT = 2
+
+
+def sort_key(entry, metric):
+    """Ascending sort key of an entry for a metric, or None if the entry lacks it"""
+    field, higher_is_better = RANK_METRICS[metric]
+    value = entry.get(field)
+    if value is None:
+        return None
+    return -value if higher_is_better else value
+
+
+def _file_id(path):
+    """Identity of a file's current version (changes when it is replaced), or None if missing"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _fsync_dir(path):
+    """Make a rename in this directory durable (not possible on Windows)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class FileLock:
+    """Exclusive advisory lock on a file, held across processes while in a with-block"""
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def read_snapshot(path):
+    """Scores and last journal sequence number of a JSON snapshot (either layout)
+
+    A snapshot that can't be parsed is moved aside rather than treated as
+    empty, so the next compaction can't overwrite the scores in it.
+    """
+    if not os.path.exists(path):
+        return {}, 0
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        aside = f"{path}.corrupt-{int(time.time())}"
+        log.error("Error loading highscores from %s: %s; moved to %s", path, e, aside)
+        os.replace(path, aside)
+        return {}, 0
+    if data.get('format') == SNAPSHOT_FORMAT:
+        return data['scores'], data['seq']
+    return data, 0
+
+
+def read_journal(path, offset=0):
+    """Events of a journal from a byte offset; returns (events, offset after the last whole line)
+
+    A line without its newline is a write cut short by a crash and is left
+    for the next writer to truncate; a garbled whole line is skipped.
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+    events = []
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break
+        offset += len(line)
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            log.warning("Skipping unreadable highscore journal line at byte %d of %s", offset - len(line), path)
+    return events, offset
+
+
+def read_json_scores(path):
+    """Every score of a JSON store: its snapshot with its journal replayed"""
+    scores, seq = read_snapshot(path)
+    events, _ = read_journal(path + '.journal')
+    for event in events:
+        if event['seq'] > seq:
+            scores.setdefault(event['key'], []).append(event['entry'])
+    return scores
+
+
+class JSONScoreStore:
+    """
+    Highscores per configuration as a JSON snapshot plus an append-only journal.
+
+    A new score is one line appended to `<path>.journal` (flushed at once,
+    fsynced every `fsync_every` lines and on close), so a write costs the
+    same whatever the number of scores, and a crash mid-write can only cut
+    off the line being written. Every `compact_every` events the snapshot is
+    rewritten to a temporary file and renamed over `path`, so the snapshot is
+    always either the old or the new version; journal events carry sequence
+    numbers and replay skips those already in the snapshot.
+
+    Several game instances may share the files: every operation takes a
+    lock file and first reads what the others appended (or reloads if
+    another one compacted).
+
+    For each configuration and metric a sorted index of (sort key, entry) is
+    kept in memory and updated with a binary-search insert, so reading a
+    ranking never sorts. An entry is kept while it is in the top TOP_N of
+    any metric.
+    """
+    def __init__(self, path, fsync_every=FSYNC_EVERY, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.fsync_every = fsync_every
+        self.compact_every = compact_every
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._journal = open(self.journal_path, 'ab')
+        self._unsynced = 0
+        with FileLock(path + '.lock'):
+            self._load()
+        log.debug("Loaded %d highscore configurations", len(self.scores))
+
+    def _load(self):
+        log.debug("Loading highscores from: %s", self.path)
+        self.scores, self.seq = read_snapshot(self.path)
+        self._snapshot_id = _file_id(self.path)
+        self._indexes = {key: self._build_indexes(entries) for key, entries in self.scores.items()}
+        self._journal_offset = 0
+        self._journal_events = 0
+        self._replay()
+
+    def _replay(self):
+        events, self._journal_offset = read_journal(self.journal_path, self._journal_offset)
+        self._journal_events += len(events)
+        for event in events:
+            if event['seq'] > self.seq:
+                self._apply(event)
+
+    def _refresh(self):
+        """Catch up with other instances (call with the lock held)"""
+        if _file_id(self.path) != self._snapshot_id or os.path.getsize(self.journal_path) < self._journal_offset:
+            self._load()
+        else:
+            self._replay()
+
+    def _apply(self, event):
+        key, entry = event['key'], event['entry']
+        entries = self.scores.setdefault(key, [])
+        indexes = self._indexes.setdefault(key, {metric: [] for metric in RANK_METRICS})
+        entries.append(entry)
+        for metric, index in indexes.items():
+            rank_key = sort_key(entry, metric)
+            if rank_key is not None:
+                bisect.insort(index, (rank_key, len(entries) - 1))
+        self._prune(key)
+        self.seq = event['seq']
+
+    def _build_indexes(self, entries):
+        indexes = {}
+        for metric in RANK_METRICS:
+            keyed = [(sort_key(entry, metric), i) for i, entry in enumerate(entries)]
+            indexes[metric] = sorted((key, i) for key, i in keyed if key is not None)
+        return indexes
+
+    def add(self, key, entry):
+        self.add_many([(key, entry)])
+
+    def add_many(self, items):
+        """Add (key, entry) pairs under one lock, with one flush for the whole batch"""
+        with FileLock(self.path + '.lock'):
+            self._refresh()
+            # Drop the tail of a write cut short by a crash, so the batch starts on a line of its own
+            if os.path.getsize(self.journal_path) > self._journal_offset:
+                self._journal.truncate(self._journal_offset)
+            events = [{'seq': self.seq + i, 'key': key, 'entry': entry} for i, (key, entry) in enumerate(items, 1)]
+            data = b''.join((json.dumps(event) + '\n').encode() for event in events)
+            self._journal.write(data)
+            self._journal.flush()
+            self._journal_offset += len(data)
+            self._journal_events += len(events)
+            self._unsynced += len(events)
+            for event in events:
+                self._apply(event)
+            if self._unsynced >= self.fsync_every:
+                self._sync()
+            if self._journal_events >= self.compact_every:
+                self._compact()
+        log.debug("Saved %d highscores to: %s", len(items), self.journal_path)
+
+    def _sync(self):
+        os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def _compact(self):
+        """Write the snapshot atomically, then empty the journal (call with the lock held)"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'format': SNAPSHOT_FORMAT, 'seq': self.seq, 'scores': self.scores}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        _fsync_dir(os.path.dirname(os.path.abspath(self.path)))
+        # A crash before this point only leaves events the snapshot already holds
+        self._journal.truncate(0)
+        os.fsync(self._journal.fileno())
+        self._snapshot_id = _file_id(self.path)
+        self._journal_offset = 0
+        self._journal_events = 0
+        self._unsynced = 0
+        log.debug("Compacted highscores into: %s", self.path)
+
+    def _prune(self, key):
+        """Drop entries that are in no metric's top TOP_N (only when there are some)"""
+        indexes = self._indexes[key]
+        keep = {i for index in indexes.values() for _, i in index[:TOP_N]}
+        if len(keep) == len(self.scores[key]):
+            return
+        # Saved in time order, as before rankings were selectable
+        self.scores[key] = [self.scores[key][i] for _, i in indexes['time'] if i in keep]
+        self._indexes[key] = self._build_indexes(self.scores[key])
+
+    def top(self, key, metric, limit=TOP_N):
+        with FileLock(self.path + '.lock'):
+            self._refresh()
+        entries = self.scores.get(key, [])
+        index = self._indexes.get(key, {}).get(metric, [])
+        return [entries[i] for _, i in index[:limit]]
+
+    def qualifies(self, key, metric, value, limit=TOP_N):
+        with FileLock(self.path + '.lock'):
+            self._refresh()
+        index = self._indexes.get(key, {}).get(metric, [])
+        return len(index) < limit or sort_key({RANK_METRICS[metric][0]: value}, metric) < index[limit - 1][0]
+
+    def configs(self):
+        return list(self.scores)
+
+    def close(self):
+        if self._journal.closed:
+            return
+        with FileLock(self.path + '.lock'):
+            self._refresh()
+            if self._journal_events:
+                self._compact()
+            else:
+                self._sync()
+        self._journal.close()
+
+
+class SQLiteScoreStore:
+    """
+    Full highscore history in SQLite.
+
+    Rankings use one index per metric, led by the configuration key, so a
+    top-N query reads N index entries whatever the history size. The
+    database runs in WAL mode: readers (another window, a report) don't block
+    the writer, and a win appends one row instead of rewriting a file.
+
+    If the database is new and `migrate_from` names an existing JSON
+    highscores file, its entries are imported once; a marker in the meta
+    table keeps later starts from importing again.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY,
+            config TEXT NOT NULL,
+            name TEXT NOT NULL,
+            time REAL NOT NULL,
+            date TEXT NOT NULL,
+            board TEXT,
+            bbbv INTEGER,
+            clicks INTEGER,
+            bbbv_per_second REAL
+        );
+        CREATE INDEX IF NOT EXISTS scores_by_time ON scores (config, time);
+        CREATE INDEX IF NOT EXISTS scores_by_efficiency ON scores (config, bbbv_per_second DESC)
+            WHERE bbbv_per_second IS NOT NULL;
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    # SQL ordering per metric, matching the indexes above
+    ORDER = {
+        'time': ('time', 'ASC'),
+        'efficiency': ('bbbv_per_second', 'DESC'),
+    }
+
+    def __init__(self, path, migrate_from=None):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Callers may move the store to another thread (the leaderboard service's store thread)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL: a crash can lose the last commits but never corrupts the database
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.executescript(self.SCHEMA)
+        if migrate_from is not None:
+            self._migrate(migrate_from)
+
+    def _migrate(self, json_path):
+        """Import a JSON highscores file once"""
+        if self.connection.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return
+        imported = 0
+        if os.path.exists(json_path) or os.path.exists(json_path + '.journal'):
+            data = read_json_scores(json_path)
+            rows = [(key,) + tuple(entry.get(field) for field in ENTRY_FIELDS)
+                    for key, entries in data.items() for entry in entries]
+            with self.connection:
+                self.connection.executemany(
+                    f"INSERT INTO scores (config, {', '.join(ENTRY_FIELDS)}) "
+                    f"VALUES (?, {', '.join('?' * len(ENTRY_FIELDS))})", rows)
+            imported = len(rows)
+        with self.connection:
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('migrated_json', ?)",
+                                    (f"{json_path} ({imported} entries)",))
+        log.info("Migrated %d highscores from %s", imported, json_path)
+
+    def add(self, key, entry):
+        self.add_many([(key, entry)])
+
+    def add_many(self, items):
+        """Insert (key, entry) pairs in one transaction"""
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO scores (config, {', '.join(ENTRY_FIELDS)}) "
+                f"VALUES (?, {', '.join('?' * len(ENTRY_FIELDS))})",
+                [(key,) + tuple(entry.get(field) for field in ENTRY_FIELDS) for key, entry in items])
+
+    def top(self, key, metric, limit=TOP_N):
+        column, direction = self.ORDER[metric]
+        rows = self.connection.execute(
+            f"SELECT {', '.join(ENTRY_FIELDS)} FROM scores "
+            f"WHERE config = ? AND {column} IS NOT NULL ORDER BY {column} {direction} LIMIT ?",
+            (key, limit)).fetchall()
+        return [{field: row[field] for field in ENTRY_FIELDS if row[field] is not None} for row in rows]
+
+    def qualifies(self, key, metric, value, limit=TOP_N):
+        column, direction = self.ORDER[metric]
+        row = self.connection.execute(
+            f"SELECT {column} FROM scores WHERE config = ? AND {column} IS NOT NULL "
+            f"ORDER BY {column} {direction} LIMIT 1 OFFSET ?", (key, limit - 1)).fetchone()
+        if row is None:
+            return True
+        return value < row[0] if direction == 'ASC' else value > row[0]
+
+    def configs(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT config FROM scores")]
+
+    def close(self):
+        self.connection.close()
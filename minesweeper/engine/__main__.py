@@ -0,0 +1,135 @@
+# minesweeper/engine/__main__.py
+"""
+Headless game engine.
+
+    python -m minesweeper.engine                      # JSON lines on stdin/stdout
+    python -m minesweeper.engine --listen 127.0.0.1:8766
+    python -m minesweeper.engine --unix /tmp/minesweeper.sock
+    python -m minesweeper.engine --listen 8766 --sessions --spill sessions.db
+    python -m minesweeper.engine --listen 8766 --spectate 8767
+
+The protocol is described in minesweeper.engine.protocol. On a socket, any
+number of clients connect at once; they are served by one asyncio loop and
+share the process's games, so a game created on one connection can be
+played or watched from another. A no_guess game's first click generates
+its board on a worker thread, so it never stalls the other clients. With --sessions, games are kept compactly
+and idle ones spilled to disk (see minesweeper.engine.sessions), for
+hosting many thousands at once. With --spectate, every game is streamed
+live to spectators on a second port (see minesweeper.engine.spectate).
+Never imports tkinter.
+"""
+import argparse
+import asyncio
+import sys
+
+from minesweeper import log
+from minesweeper.engine.protocol import MAX_GAMES, Engine
+from minesweeper.engine.sessions import IDLE_SECONDS, MAX_RESIDENT, CompactEngine, SessionHost
+from minesweeper.engine.spectate import Broadcaster
+
+# Longest request line accepted (a batch of requests is one line)
+MAX_LINE = 1 << 20
+
+logger = log.get_logger('engine')
+
+
+def serve_stdio(engine, stdin=sys.stdin, stdout=sys.stdout):
+    for line in stdin:
+        if not line.strip():
+            continue
+        stdout.write(engine.handle_line(line))
+        stdout.write('\n')
+        stdout.flush()
+
+
+async def serve_socket(engine, host=None, port=None, path=None):
+    async def handle(reader, writer):
+        peer = writer.get_extra_info('peername') or path
+        logger.debug("Client connected: %s", peer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    writer.write((await engine.handle_line_async(line)).encode() + b'\n')
+                    await writer.drain()
+        except (ConnectionError, ValueError) as e:
+            # ValueError: a line over MAX_LINE
+            logger.warning("Dropping client %s: %s", peer, e)
+        finally:
+            writer.close()
+            logger.debug("Client disconnected: %s", peer)
+
+    if path is not None:
+        server = await asyncio.start_unix_server(handle, path, limit=MAX_LINE)
+    else:
+        server = await asyncio.start_server(handle, host, port, limit=MAX_LINE)
+    logger.info("Engine listening on %s", path or f"{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+async def serve_all(engine, broadcaster=None, spectate=None, **where):
+    servers = [serve_socket(engine, **where)]
+    if broadcaster is not None:
+        servers.append(broadcaster.serve(*spectate))
+    await asyncio.gather(*servers)
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(':')
+    try:
+        return host or '127.0.0.1', int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected HOST:PORT or PORT")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m minesweeper.engine",
+        description="Play Minesweeper games over a JSON-lines protocol.")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument('--listen', type=parse_address, metavar='HOST:PORT', help="serve on a TCP socket")
+    where.add_argument('--unix', metavar='PATH', help="serve on a Unix domain socket")
+    parser.add_argument('--max-games', type=int, default=MAX_GAMES)
+    parser.add_argument('--sessions', action='store_true',
+                        help="keep games compactly and spill idle ones to disk (no no_guess boards)")
+    parser.add_argument('--spill', metavar='PATH', help="file for spilled sessions (default: a temporary file)")
+    parser.add_argument('--max-resident', type=int, default=MAX_RESIDENT,
+                        help="sessions kept in memory at most (default: %(default)s)")
+    parser.add_argument('--idle', type=float, default=IDLE_SECONDS,
+                        help="seconds before an unused session is spilled (default: %(default)s)")
+    parser.add_argument('--spectate', type=parse_address, metavar='HOST:PORT',
+                        help="stream every game to spectators on this TCP socket")
+    log.add_arguments(parser)
+    args = parser.parse_args(argv)
+    log.configure(args.log_level, args.log_format)
+    if args.spectate and args.sessions:
+        parser.error("--spectate needs the full engine (run without --sessions)")
+
+    broadcaster = Broadcaster() if args.spectate else None
+    if args.sessions:
+        host = SessionHost(args.spill, max_resident=args.max_resident, idle_seconds=args.idle)
+        engine = CompactEngine(max_games=args.max_games, host=host)
+    else:
+        engine = Engine(max_games=args.max_games, broadcaster=broadcaster)
+    try:
+        if args.listen:
+            host, port = args.listen
+            asyncio.run(serve_all(engine, broadcaster, args.spectate, host=host, port=port))
+        elif args.unix:
+            asyncio.run(serve_all(engine, broadcaster, args.spectate, path=args.unix))
+        else:
+            if broadcaster is not None:
+                broadcaster.serve_in_thread(*args.spectate)
+            serve_stdio(engine)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        engine.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
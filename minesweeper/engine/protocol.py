@@ -0,0 +1,338 @@
+# minesweeper/engine/protocol.py
+"""
+JSON-lines protocol for driving games without the UI.
+
+Every request is one JSON object on one line; the answer is one line too,
+echoing the request's "id". A line may also hold a JSON array of requests,
+answered by an array in the same order, to save round trips.
+
+    {"id": 1, "op": "new", "preset": "hard", "seed": 7}
+    -> {"id": 1, "ok": true, "game": 1, "rows": 16, "cols": 30, "mines": 99, "seq": 0}
+    {"id": 2, "op": "click", "game": 1, "r": 8, "c": 15}
+    -> {"id": 2, "ok": true, "seq": 1, "status": "playing", "open": [[8, 15, 0], [7, 14, 1], ...]}
+
+Operations:
+
+    new    rows, cols, mines | preset; optional seed, no_guess, board (a Board.encode code)
+    click  game, r, c        reveal a cell (the first click places the mines)
+    flag   game, r, c        toggle a flag
+    chord  game, r, c        reveal around a number whose mines are all flagged
+    state  game              the whole board as strings, one per row
+    diff   game, since       deltas with every change after move `since`
+    close  game
+    list
+
+Moves answer with deltas, never the board: "open" lists the revealed cells
+as [r, c, value] (-1 for the mine that was hit), "flag" is [r, c, flagged],
+and a lost game adds "mines". "seq" counts a game's moves that changed the
+board (a click on a revealed cell is answered but not counted), so a client
+that missed answers can ask for "diff" since the last seq it saw. In "state"
+rows, '.' is hidden, 'F' flagged, '*' a mine and a digit a revealed number.
+"""
+import asyncio
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from minesweeper import log
+from minesweeper.core.board import Board
+from minesweeper.core.game import DIFFICULTIES, Game
+from minesweeper.core.no_guess import NoGuessGenerator
+
+# Games one engine keeps at a time
+MAX_GAMES = 10000
+# Largest board side accepted
+MAX_SIDE = 100
+
+logger = log.get_logger('engine')
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class EngineGame:
+    """
+    A Game as the engine plays it: moves return deltas, which are logged
+    (one per move that changed the board, numbered by the Game's seq, as
+    spectators see them) for diff requests.
+
+    This is the interface the Engine relies on; engine.sessions.CompactGame
+    implements it without a Game behind it.
+    """
+    def __init__(self, game):
+        self.game = game
+        self.deltas = []
+
+    @property
+    def status(self):
+        return self.game.status
+
+    @property
+    def seq(self):
+        return self.game.seq
+
+    @property
+    def clicks(self):
+        return self.game.clicks
+
+    def elapsed(self):
+        return self.game.get_elapsed_time()
+
+    def in_bounds(self, r, c):
+        return self.game.board.in_bounds(r, c)
+
+    def generates_board(self):
+        """True if the next click generates a no-guess board, which can take seconds"""
+        game = self.game
+        return game.no_guess and game.first_click and game.layout is None
+
+    def click(self, r, c):
+        return self._reveal_delta(self.game.click(r, c))
+
+    def chord(self, r, c):
+        return self._reveal_delta(self.game.chord(r, c))
+
+    def flag(self, r, c):
+        seq = self.game.seq
+        self.game.mark(r, c)
+        if self.game.seq == seq:
+            # A revealed cell can't be flagged
+            return self._unchanged({})
+        return self._record({'flag': [r, c, self.game.board.is_marked(r, c)]})
+
+    def diff(self, since):
+        return self.deltas[since:]
+
+    def _record(self, delta):
+        """Log the delta of a move that changed the board; its seq is the Game's"""
+        self.deltas.append(delta)
+        return self._unchanged(delta)
+
+    def _unchanged(self, answer):
+        """The answer to a move, without logging it (for moves that changed nothing)"""
+        answer['seq'] = self.seq
+        answer['status'] = self.status
+        if self.game.lost:
+            answer['mines'] = sorted(map(list, self.game.board.mine_positions))
+        return answer
+
+    def _reveal_delta(self, cells):
+        if not cells:
+            return self._unchanged({'open': []})
+        board = self.game.board
+        return self._record({'open': [[r, c, -1 if board.is_mine(r, c) else board.get_value(r, c)]
+                                      for r, c in cells]})
+
+    def lines(self):
+        return self.game.board.render()
+
+
+class Engine:
+    """Games by id, driven by protocol requests (dicts)
+
+    `games` maps ids to games; by default a dict, or e.g. an
+    engine.sessions.SessionHost. With an engine.spectate.Broadcaster,
+    every game is streamed to spectators under its id until it is closed.
+    """
+    def __init__(self, max_games=MAX_GAMES, games=None, broadcaster=None):
+        self.max_games = max_games
+        self.games = games if games is not None else {}
+        self.broadcaster = broadcaster
+        self._next_id = 1
+        self._generator = None
+        # For handle_async: the thread generating no-guess boards, and the
+        # requests running there by game id
+        self._executor = None
+        self._pending = {}
+
+    def handle_line(self, line):
+        """Answer one protocol line (a request or an array of them) with one line"""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps({'ok': False, 'error': f"invalid JSON: {e}"}, separators=(',', ':'))
+        if isinstance(request, list):
+            return json.dumps([self.handle(item) for item in request], separators=(',', ':'))
+        return json.dumps(self.handle(request), separators=(',', ':'))
+
+    async def handle_line_async(self, line):
+        """handle_line for an event loop serving many clients (see handle_async)"""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps({'ok': False, 'error': f"invalid JSON: {e}"}, separators=(',', ':'))
+        if isinstance(request, list):
+            return json.dumps([await self.handle_async(item) for item in request], separators=(',', ':'))
+        return json.dumps(await self.handle_async(request), separators=(',', ':'))
+
+    async def handle_async(self, request):
+        """handle() without blocking the event loop
+
+        The first click of a no_guess game generates its board, which can
+        take seconds, so it is answered on a worker thread. Requests for
+        that game wait for it; every other request is answered at once.
+        """
+        game_id = request.get('game') if isinstance(request, dict) else None
+        if not isinstance(game_id, int):
+            return self.handle(request)
+        while game_id in self._pending:
+            await self._pending[game_id]
+        entry = self.games.get(game_id) if request.get('op') == 'click' else None
+        if entry is None or not entry.generates_board():
+            return self.handle(request)
+        if self._executor is None:
+            # One thread: the NoGuessGenerator isn't shared between threads
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix='engine-boards')
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self.handle, request)
+        self._pending[game_id] = future
+        try:
+            return await future
+        finally:
+            del self._pending[game_id]
+
+    def handle(self, request):
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "a request must be a JSON object"}
+        op = request.get('op')
+        handler = self.OPERATIONS.get(op)
+        try:
+            if handler is None:
+                raise ProtocolError(f"unknown op {op!r}; expected one of {sorted(self.OPERATIONS)}")
+            response = handler(self, request)
+        except ProtocolError as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # A request the checks above missed fails on its own; the engine keeps serving
+            logger.exception("Request %r failed", request)
+            response = {'ok': False, 'error': f"internal error: {e!r}"}
+        else:
+            response = dict(response, ok=True)
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    # -- Operations ---------------------------------------------------------
+
+    def new(self, request):
+        if len(self.games) >= self.max_games:
+            raise ProtocolError(f"too many games (limit {self.max_games}); close some first")
+        layout = None
+        if 'board' in request:
+            # Sized from the code's prefix before decoding, which builds the whole grid
+            rows, cols = _board_code_size(request['board'])
+            if not (1 <= rows <= MAX_SIDE and 1 <= cols <= MAX_SIDE):
+                raise ProtocolError(f"need 1 <= rows, cols <= {MAX_SIDE}")
+            try:
+                board = Board.decode(request['board'])
+            except (ValueError, TypeError) as e:
+                raise ProtocolError(f"bad board code: {e}")
+            rows, cols, mines = board.rows, board.cols, board.mines
+            layout = board.mine_positions
+        elif 'preset' in request:
+            if request['preset'] not in DIFFICULTIES:
+                raise ProtocolError(f"preset must be one of {sorted(DIFFICULTIES)}")
+            rows, cols, mines = DIFFICULTIES[request['preset']]
+        else:
+            rows, cols, mines = (_int(request, key) for key in ('rows', 'cols', 'mines'))
+        if not (1 <= rows <= MAX_SIDE and 1 <= cols <= MAX_SIDE and 1 <= mines <= rows * cols - 9):
+            raise ProtocolError(f"need 1 <= rows, cols <= {MAX_SIDE} and 1 <= mines <= rows * cols - 9")
+
+        seed = request.get('seed')
+        if seed is not None and (not isinstance(seed, (int, str)) or isinstance(seed, bool)):
+            raise ProtocolError("seed must be an integer or a string")
+        game = self.create_game(rows, cols, mines, seed, layout, bool(request.get('no_guess')))
+        game_id = self._next_id
+        self._next_id += 1
+        self.games[game_id] = game
+        if self.broadcaster is not None:
+            self.broadcaster.watch(game_id, game.game)
+        return {'game': game_id, 'rows': rows, 'cols': cols, 'mines': mines, 'seq': 0}
+
+    def create_game(self, rows, cols, mines, seed=None, layout=None, no_guess=False):
+        if no_guess and self._generator is None:
+            self._generator = NoGuessGenerator()
+        rng = random.Random(seed) if seed is not None else None
+        return EngineGame(Game(rows, cols, mines, no_guess=no_guess, generator=self._generator,
+                               rng=rng, layout=layout))
+
+    def click(self, request):
+        entry, r, c = self._move(request)
+        return entry.click(r, c)
+
+    def chord(self, request):
+        entry, r, c = self._move(request)
+        return entry.chord(r, c)
+
+    def flag(self, request):
+        entry, r, c = self._move(request)
+        return entry.flag(r, c)
+
+    def state(self, request):
+        entry = self._game(request)
+        return {'game': request['game'], 'seq': entry.seq, 'status': entry.status,
+                'rows': entry.lines(), 'clicks': entry.clicks, 'elapsed': entry.elapsed()}
+
+    def diff(self, request):
+        entry = self._game(request)
+        since = _int(request, 'since')
+        if not 0 <= since <= entry.seq:
+            raise ProtocolError(f"since must be between 0 and {entry.seq}")
+        return {'game': request['game'], 'seq': entry.seq, 'status': entry.status,
+                'deltas': entry.diff(since)}
+
+    def close(self, request):
+        self._game(request)
+        del self.games[request['game']]
+        if self.broadcaster is not None:
+            self.broadcaster.unwatch(request['game'])
+        return {'game': request['game']}
+
+    def list_games(self, request):
+        return {'games': [{'game': game_id, 'status': entry.status, 'seq': entry.seq}
+                          for game_id, entry in self.games.items()]}
+
+    OPERATIONS = {'new': new, 'click': click, 'flag': flag, 'chord': chord,
+                  'state': state, 'diff': diff, 'close': close, 'list': list_games}
+
+    def _game(self, request):
+        entry = self.games.get(_int(request, 'game'))
+        if entry is None:
+            raise ProtocolError(f"no game {request['game']!r}")
+        return entry
+
+    def _move(self, request):
+        entry = self._game(request)
+        r, c = _int(request, 'r'), _int(request, 'c')
+        if not entry.in_bounds(r, c):
+            raise ProtocolError(f"cell ({r}, {c}) is off the board")
+        if entry.status != 'playing':
+            raise ProtocolError(f"game {request['game']} is over ({entry.status})")
+        return entry, r, c
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._generator is not None:
+            self._generator.close()
+            self._generator = None
+
+
+def _board_code_size(code):
+    """(rows, cols) of a board code, read from its prefix"""
+    if not isinstance(code, str):
+        raise ProtocolError("a board code must be a string")
+    try:
+        size, _ = code.split('-', 1)
+        rows, cols = map(int, size.split('x'))
+    except ValueError as e:
+        raise ProtocolError(f"bad board code: {e}")
+    return rows, cols
+
+
+def _int(request, key):
+    value = request.get(key)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ProtocolError(f"{key} must be an integer")
+    return value
@@ -0,0 +1,397 @@
+# minesweeper/engine/sessions.py
+"""
+Compact game sessions for hosting thousands of games in one process.
+
+A Game holds a Board of Cell objects (plus frontier bookkeeping for the
+solvers), several hundred bytes per cell. CompactGame keeps one byte per
+cell instead:
+
+    bits 0-3  number of adjacent mines
+    bit 4     mine
+    bit 5     revealed
+    bit 6     flagged
+
+plus the move number at which each cell last changed (for diffs), a few
+counters, and the seed its mines are placed from. Neighbour lookups go
+through a flat table shared by every game of the same size.
+
+SessionHost keeps the most recently used sessions in memory and spills
+the rest to an SQLite file: sessions idle for longer than `idle_seconds`
+and, beyond `max_resident`, the least recently used. A spilled session is
+a zlib-compressed byte string, loaded back on its next request. Idle
+sessions are checked for at most every few seconds, from the requests
+themselves, so no timer thread is needed.
+
+CompactEngine is the protocol engine (engine.protocol) on a SessionHost:
+
+    python -m minesweeper.engine --sessions --spill sessions.db
+"""
+import os
+import random
+import sqlite3
+import struct
+import tempfile
+import time
+import zlib
+from array import array
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from minesweeper.engine.protocol import MAX_GAMES, Engine, ProtocolError
+from minesweeper.log import get_logger
+
+log = get_logger('engine.sessions')
+
+VALUE = 0x0F
+MINE = 0x10
+REVEALED = 0x20
+FLAGGED = 0x40
+
+# state
+WAITING, PLAYING, WON, LOST = range(4)
+STATUS = ('playing', 'playing', 'won', 'lost')
+
+# Sessions kept in memory at most, and seconds of inactivity before one is spilled
+MAX_RESIDENT = 5000
+IDLE_SECONDS = 300.0
+# Seconds between checks for idle sessions
+IDLE_CHECK_SECONDS = 5.0
+
+# rows, cols, mines, state, placed, seq, clicks, safe_remaining, seed, start, end
+_HEADER = struct.Struct('<HHHBBIIIQdd')
+
+# Stand-in for a spilled session in SessionHost.items()
+SessionSummary = namedtuple('SessionSummary', 'status seq')
+
+
+@lru_cache(maxsize=16)
+def flat_neighbours(rows, cols):
+    """Neighbours of every cell by flat index (r * cols + c)"""
+    return tuple(
+        tuple((r + dr) * cols + c + dc for dr in (-1, 0, 1) for dc in (-1, 0, 1)
+              if (dr or dc) and 0 <= r + dr < rows and 0 <= c + dc < cols)
+        for r in range(rows) for c in range(cols))
+
+
+class CompactGame:
+    """One game in a byte per cell, with the EngineGame interface (see engine.protocol)"""
+    __slots__ = ('rows', 'cols', 'mines', 'cells', 'changed', 'state', 'placed', 'seq', 'clicks',
+                 'safe_remaining', 'seed', 'start_time', 'end_time', 'last_used')
+
+    def __init__(self, rows, cols, mines, seed=None, layout=None):
+        self.rows, self.cols, self.mines = rows, cols, mines
+        self.cells = bytearray(rows * cols)
+        # Move number of each cell's last change
+        self.changed = array('I', bytes(4 * rows * cols))
+        self.state = WAITING
+        self.placed = False
+        self.seq = 0
+        self.clicks = 0
+        self.safe_remaining = rows * cols - mines
+        if seed is None:
+            seed = random.getrandbits(63)
+        elif not isinstance(seed, int) or not 0 <= seed < 1 << 63:
+            # Saved in 8 bytes: derive one from anything else
+            seed = random.Random(seed).getrandbits(63)
+        self.seed = seed
+        self.start_time = None
+        self.end_time = None
+        self.last_used = 0.0
+        if layout is not None:
+            self._set_mines(r * cols + c for r, c in layout)
+
+    @property
+    def status(self):
+        return STATUS[self.state]
+
+    def elapsed(self):
+        if self.start_time is None:
+            return 0
+        return (self.end_time or time.time()) - self.start_time
+
+    def in_bounds(self, r, c):
+        return 0 <= r < self.rows and 0 <= c < self.cols
+
+    def generates_board(self):
+        return False
+
+    def _set_mines(self, indices):
+        cells = self.cells
+        neighbours = flat_neighbours(self.rows, self.cols)
+        for i in indices:
+            cells[i] |= MINE
+            for j in neighbours[i]:
+                cells[j] += 1
+        self.placed = True
+
+    def _place_mines(self, first):
+        """Mines anywhere but the first click and its neighbours, from the session's seed"""
+        safe = set(flat_neighbours(self.rows, self.cols)[first]) | {first}
+        candidates = [i for i in range(self.rows * self.cols) if i not in safe]
+        self._set_mines(random.Random(self.seed).sample(candidates, self.mines))
+
+    def click(self, r, c):
+        return self._reveal_delta(self._click(r * self.cols + c))
+
+    def _click(self, i):
+        cells = self.cells
+        if cells[i] & (REVEALED | FLAGGED):
+            return []
+        if not self.placed:
+            self._place_mines(i)
+        if self.state == WAITING:
+            self.state = PLAYING
+            self.start_time = time.time()
+        self.clicks += 1
+        if cells[i] & MINE:
+            self.state = LOST
+            self.end_time = time.time()
+            # As Board.reveal_all: the lost board is shown in full
+            for j in range(len(cells)):
+                cells[j] |= REVEALED
+            return [i]
+
+        neighbours = flat_neighbours(self.rows, self.cols)
+        opened = []
+        stack = [i]
+        while stack:
+            j = stack.pop()
+            cell = cells[j]
+            if cell & (REVEALED | FLAGGED):
+                continue
+            cells[j] = cell | REVEALED
+            opened.append(j)
+            if not cell & VALUE:
+                stack.extend(k for k in neighbours[j] if not cells[k] & REVEALED)
+        self.safe_remaining -= len(opened)
+        if self.safe_remaining == 0:
+            self.state = WON
+            self.end_time = time.time()
+        return opened
+
+    def chord(self, r, c):
+        i = r * self.cols + c
+        cell = self.cells[i]
+        if not cell & REVEALED or not cell & VALUE or cell & MINE:
+            return self._reveal_delta([])
+        neighbours = flat_neighbours(self.rows, self.cols)[i]
+        if sum(1 for j in neighbours if self.cells[j] & FLAGGED) != cell & VALUE:
+            return self._reveal_delta([])
+        opened = []
+        for j in neighbours:
+            opened += self._click(j)
+            if self.state == LOST:
+                break
+        return self._reveal_delta(opened)
+
+    def flag(self, r, c):
+        i = r * self.cols + c
+        if self.cells[i] & REVEALED:
+            # Changes nothing, so isn't a move (as EngineGame.flag)
+            return self._finish({})
+        self.cells[i] ^= FLAGGED
+        self._advance([i])
+        return self._finish({'flag': [r, c, bool(self.cells[i] & FLAGGED)]})
+
+    def _advance(self, indices):
+        self.seq += 1
+        changed, seq = self.changed, self.seq
+        if self.state == LOST:
+            indices = range(len(self.cells))
+        for i in indices:
+            changed[i] = seq
+
+    def _finish(self, delta):
+        delta['seq'] = self.seq
+        delta['status'] = self.status
+        if self.state == LOST:
+            delta['mines'] = self._mine_cells()
+        return delta
+
+    def _mine_cells(self):
+        cols = self.cols
+        return [list(divmod(i, cols)) for i, cell in enumerate(self.cells) if cell & MINE]
+
+    def _cell_value(self, i):
+        cell = self.cells[i]
+        return -1 if cell & MINE else cell & VALUE
+
+    def _reveal_delta(self, opened):
+        if not opened:
+            return self._finish({'open': []})
+        self._advance(opened)
+        cols = self.cols
+        return self._finish({'open': [[i // cols, i % cols, self._cell_value(i)] for i in opened]})
+
+    def diff(self, since):
+        """One delta merging every change after move `since` ([] if there is none)"""
+        if since >= self.seq:
+            return []
+        cols = self.cols
+        opened, flags = [], []
+        for i, seq in enumerate(self.changed):
+            if seq > since:
+                if self.cells[i] & REVEALED:
+                    opened.append([i // cols, i % cols, self._cell_value(i)])
+                else:
+                    flags.append([i // cols, i % cols, bool(self.cells[i] & FLAGGED)])
+        return [self._finish({'open': opened, 'flags': flags})]
+
+    def lines(self):
+        cols, cells = self.cols, self.cells
+        lines = []
+        for r in range(self.rows):
+            lines.append(''.join(
+                ('*' if cell & MINE else str(cell & VALUE)) if cell & REVEALED else ('F' if cell & FLAGGED else '.')
+                for cell in cells[r * cols:(r + 1) * cols]))
+        return lines
+
+    def to_bytes(self):
+        header = _HEADER.pack(self.rows, self.cols, self.mines, self.state, self.placed, self.seq, self.clicks,
+                              self.safe_remaining, self.seed, self.start_time or 0.0, self.end_time or 0.0)
+        return zlib.compress(header + bytes(self.cells) + self.changed.tobytes(), 1)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = zlib.decompress(data)
+        (rows, cols, mines, state, placed, seq, clicks, safe_remaining,
+         seed, start_time, end_time) = _HEADER.unpack_from(data)
+        game = cls.__new__(cls)
+        game.rows, game.cols, game.mines = rows, cols, mines
+        size = rows * cols
+        offset = _HEADER.size
+        game.cells = bytearray(data[offset:offset + size])
+        game.changed = array('I')
+        game.changed.frombytes(data[offset + size:offset + 5 * size])
+        game.state, game.placed, game.seq, game.clicks = state, bool(placed), seq, clicks
+        game.safe_remaining, game.seed = safe_remaining, seed
+        game.start_time, game.end_time = start_time or None, end_time or None
+        game.last_used = 0.0
+        return game
+
+
+class SessionHost:
+    """Sessions by id: recently used ones in memory, the others spilled to an SQLite file"""
+    def __init__(self, spill_path=None, max_resident=MAX_RESIDENT, idle_seconds=IDLE_SECONDS):
+        self.max_resident = max_resident
+        self.idle_seconds = idle_seconds
+        # Least recently used first
+        self.resident = OrderedDict()
+        self._spilled = set()
+        self._temporary = spill_path is None
+        if spill_path is None:
+            fd, spill_path = tempfile.mkstemp(prefix='minesweeper-sessions-', suffix='.db')
+            os.close(fd)
+        self.spill_path = spill_path
+        self.spill = sqlite3.connect(spill_path)
+        # The file only backs live sessions: losing it in a crash loses nothing else
+        self.spill.execute("PRAGMA journal_mode=OFF")
+        self.spill.execute("PRAGMA synchronous=OFF")
+        self.spill.execute("DROP TABLE IF EXISTS sessions")
+        self.spill.execute("CREATE TABLE sessions (id INTEGER PRIMARY KEY, status TEXT, seq INTEGER, data BLOB)")
+        self._next_idle_check = time.monotonic() + IDLE_CHECK_SECONDS
+        self.spilled_total = 0
+        self.loaded_total = 0
+
+    def __len__(self):
+        return len(self.resident) + len(self._spilled)
+
+    def __contains__(self, session_id):
+        return session_id in self.resident or session_id in self._spilled
+
+    def get(self, session_id, default=None):
+        now = time.monotonic()
+        game = self.resident.get(session_id)
+        if game is not None:
+            self.resident.move_to_end(session_id)
+        elif session_id in self._spilled:
+            game = self._load(session_id)
+        else:
+            return default
+        game.last_used = now
+        self._check_idle(now)
+        return game
+
+    def __setitem__(self, session_id, game):
+        game.last_used = time.monotonic()
+        self.resident[session_id] = game
+        self.resident.move_to_end(session_id)
+        self._trim()
+
+    def __delitem__(self, session_id):
+        if self.resident.pop(session_id, None) is None:
+            if session_id not in self._spilled:
+                raise KeyError(session_id)
+            self._spilled.discard(session_id)
+            with self.spill:
+                self.spill.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def items(self):
+        """(id, game) for resident sessions, then (id, SessionSummary) for spilled ones"""
+        yield from list(self.resident.items())
+        for session_id, status, seq in self.spill.execute("SELECT id, status, seq FROM sessions"):
+            yield session_id, SessionSummary(status, seq)
+
+    def _load(self, session_id):
+        with self.spill:
+            (data,) = self.spill.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            self.spill.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+        self._spilled.discard(session_id)
+        game = CompactGame.from_bytes(data)
+        self.resident[session_id] = game
+        self.loaded_total += 1
+        self._trim()
+        return game
+
+    def _spill(self, victims):
+        with self.spill:
+            self.spill.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+                                   [(session_id, game.status, game.seq, game.to_bytes())
+                                    for session_id, game in victims])
+        for session_id, _ in victims:
+            del self.resident[session_id]
+            self._spilled.add(session_id)
+        self.spilled_total += len(victims)
+
+    def _trim(self):
+        excess = len(self.resident) - self.max_resident
+        if excess > 0:
+            self._spill([item for item, _ in zip(self.resident.items(), range(excess))])
+
+    def _check_idle(self, now):
+        if now >= self._next_idle_check:
+            self._next_idle_check = now + IDLE_CHECK_SECONDS
+            self.evict_idle(now)
+
+    def evict_idle(self, now=None):
+        """Spill every session unused for idle_seconds; returns how many"""
+        cutoff = (now if now is not None else time.monotonic()) - self.idle_seconds
+        victims = []
+        for session_id, game in self.resident.items():
+            if game.last_used > cutoff:
+                break
+            victims.append((session_id, game))
+        if victims:
+            self._spill(victims)
+            log.debug("Spilled %d idle sessions", len(victims))
+        return len(victims)
+
+    def close(self):
+        self.spill.close()
+        if self._temporary:
+            os.remove(self.spill_path)
+
+
+class CompactEngine(Engine):
+    """The protocol engine with CompactGames on a SessionHost"""
+    def __init__(self, max_games=MAX_GAMES, host=None):
+        super().__init__(max_games, games=host if host is not None else SessionHost())
+
+    def create_game(self, rows, cols, mines, seed=None, layout=None, no_guess=False):
+        if no_guess:
+            raise ProtocolError("no_guess boards need the full engine (run without --sessions)")
+        return CompactGame(rows, cols, mines, seed=seed, layout=layout)
+
+    def shutdown(self):
+        super().shutdown()
+        self.games.close()
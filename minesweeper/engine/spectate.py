@@ -0,0 +1,295 @@
+# minesweeper/engine/spectate.py
+"""
+Live games for spectators.
+
+Broadcaster.watch(name, game) follows a Game through its observer API
+(Game.add_observer) and streams its deltas, one JSON line each, to every
+spectator of that game. A spectator connects over TCP and sends one line:
+
+    {"op": "list"}
+    -> {"games": [1, 2, 3]}
+    {"op": "watch", "game": 3}
+    -> {"game": 3, "keyframe": true, "seq": 40, "rows": 16, "cols": 30, ..., "board": ["..F1", ...]}
+    -> {"game": 3, "seq": 41, "open": [[4, 7, 2]]}
+    -> ...
+    -> {"game": 3, "closed": true}
+
+Every KEYFRAME_EVERY moves a keyframe of the whole board is taken; the
+one taken when the game ends is also sent to every spectator. A spectator that joins gets the latest keyframe and
+the deltas after it, so it never replays more than KEYFRAME_EVERY moves.
+A client replaces its board with a keyframe, then applies the deltas with
+a higher "seq" than it has seen (it may get some twice; see SpectatorView).
+
+Every spectator has its own queue of at most QUEUE_SIZE lines, written as
+fast as its connection takes them. One that falls a full queue behind
+doesn't hold up the game or the other spectators: its queue is replaced
+by the latest keyframe (marked "resync") and the deltas after it, so it
+skips ahead.
+
+Games may be played on another thread than the broadcaster's event loop
+(the engine reading stdin does): deltas are encoded on the game's thread
+and handed to the loop with call_soon_threadsafe.
+
+    python -m minesweeper.engine --spectate 127.0.0.1:8767
+    python -m minesweeper.engine.spectate 127.0.0.1:8767 3    # print game 3 as it is played
+"""
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import threading
+from collections import deque
+
+from minesweeper import log
+
+# Moves between keyframes
+KEYFRAME_EVERY = 64
+# Lines queued per spectator before it is skipped ahead to a keyframe
+QUEUE_SIZE = 256
+SPECTATE_PORT = 8767
+
+logger = log.get_logger('engine.spectate')
+
+
+def _encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+async def _until_closed(reader):
+    while await reader.read(4096):
+        pass
+
+
+class Channel:
+    """A watched game: its latest keyframe and the deltas since, and its spectators"""
+    def __init__(self, name, game):
+        self.name = name
+        self.game = game
+        self.keyframe = None
+        self.backlog = []
+        self.spectators = set()
+        self.observer = None
+
+
+class Spectator:
+    def __init__(self, writer):
+        self.writer = writer
+        self.lines = deque()
+        self.ready = asyncio.Event()
+        self.resyncs = 0
+
+
+class Broadcaster:
+    def __init__(self, keyframe_every=KEYFRAME_EVERY, queue_size=QUEUE_SIZE):
+        self.keyframe_every = keyframe_every
+        self.queue_size = queue_size
+        self.channels = {}
+        # Guards the channels' keyframes and backlogs, written on the games' thread
+        self._lock = threading.Lock()
+        self._loop = None
+
+    # -- Game side (any thread) ---------------------------------------------
+
+    def watch(self, name, game):
+        channel = Channel(name, game)
+        channel.observer = lambda delta: self._on_delta(channel, delta)
+        with self._lock:
+            self._take_keyframe(channel)
+            self.channels[name] = channel
+        game.add_observer(channel.observer)
+
+    def unwatch(self, name):
+        with self._lock:
+            channel = self.channels.pop(name, None)
+        if channel is not None:
+            channel.game.remove_observer(channel.observer)
+            self._post(self._close_channel, channel)
+
+    def _take_keyframe(self, channel):
+        channel.keyframe = dict(channel.game.keyframe(), game=channel.name)
+        channel.backlog = []
+
+    def _on_delta(self, channel, delta):
+        line = _encode(dict(delta, game=channel.name))
+        with self._lock:
+            channel.backlog.append(line)
+            if len(channel.backlog) >= self.keyframe_every or 'status' in delta:
+                self._take_keyframe(channel)
+        self._post(self._fan_out, channel, line)
+        if 'status' in delta:
+            # The end state (a lost board is shown in full) goes to everyone
+            self._post(self._fan_out, channel, _encode(channel.keyframe))
+
+    def _post(self, callback, *args):
+        # No loop yet means nobody is connected to tell
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    # -- Spectator side (the event loop) --------------------------------------
+
+    def _catch_up(self, channel, resync=False):
+        """The channel's latest keyframe and the deltas after it, as lines"""
+        with self._lock:
+            keyframe = dict(channel.keyframe, resync=True) if resync else channel.keyframe
+            return [_encode(keyframe)] + channel.backlog
+
+    def _fan_out(self, channel, line):
+        for spectator in channel.spectators:
+            if len(spectator.lines) >= self.queue_size:
+                spectator.lines.clear()
+                spectator.lines.extend(self._catch_up(channel, resync=True))
+                spectator.resyncs += 1
+                logger.debug("Spectator of game %s fell behind; skipped to the keyframe", channel.name)
+            else:
+                spectator.lines.append(line)
+            spectator.ready.set()
+
+    def _close_channel(self, channel):
+        for spectator in channel.spectators:
+            spectator.lines.append(_encode({'game': channel.name, 'closed': True}))
+            spectator.lines.append(None)
+            spectator.ready.set()
+        channel.spectators.clear()
+
+    async def _pump(self, spectator):
+        """Write the spectator's queue out until the channel closes"""
+        writer = spectator.writer
+        while True:
+            await spectator.ready.wait()
+            spectator.ready.clear()
+            while spectator.lines:
+                line = spectator.lines.popleft()
+                if line is None:
+                    return
+                writer.write(line)
+            # Waits while the connection's buffer is full; meanwhile lines queue up (to QUEUE_SIZE)
+            await writer.drain()
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            try:
+                request = json.loads(await reader.readline())
+                if not isinstance(request, dict):
+                    raise ValueError("a request must be a JSON object")
+                game = request.get('game')
+                if game is not None and (not isinstance(game, (int, str)) or isinstance(game, bool)):
+                    raise TypeError("game must be an integer or a string")
+            except (ValueError, TypeError) as e:
+                writer.write(_encode({'ok': False, 'error': f"invalid request: {e}"}))
+                return
+            if request.get('op') == 'list':
+                with self._lock:
+                    names = list(self.channels)
+                writer.write(_encode({'games': names}))
+                return
+            channel = self.channels.get(game) if request.get('op') == 'watch' else None
+            if channel is None:
+                writer.write(_encode({'ok': False, 'error': "expected op 'list', or op 'watch' and a watched game"}))
+                return
+            await self._serve_spectator(channel, reader, writer, peer)
+        except ConnectionError as e:
+            logger.debug("Spectator %s dropped: %s", peer, e)
+        finally:
+            writer.close()
+
+    async def _serve_spectator(self, channel, reader, writer, peer):
+        spectator = Spectator(writer)
+        spectator.lines.extend(self._catch_up(channel))
+        spectator.ready.set()
+        channel.spectators.add(spectator)
+        logger.debug("Spectator %s watching game %s", peer, channel.name)
+        pump = asyncio.ensure_future(self._pump(spectator))
+        # Anything the spectator sends from now on is ignored; reading notices it leaving
+        hangup = asyncio.ensure_future(_until_closed(reader))
+        try:
+            await asyncio.wait([pump, hangup], return_when=asyncio.FIRST_COMPLETED)
+            if pump.done():
+                # The channel closed: let the last lines out
+                pump.result()
+                await writer.drain()
+        finally:
+            channel.spectators.discard(spectator)
+            for task in (pump, hangup):
+                task.cancel()
+            logger.debug("Spectator %s left game %s (%d resyncs)", peer, channel.name, spectator.resyncs)
+
+    async def serve(self, host='127.0.0.1', port=SPECTATE_PORT):
+        self._loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._handle, host, port)
+        logger.info("Spectators served on %s:%s", host, port)
+        async with server:
+            await server.serve_forever()
+
+    def serve_in_thread(self, host='127.0.0.1', port=SPECTATE_PORT):
+        """Serve from a daemon thread, for games played on a thread without an event loop"""
+        thread = threading.Thread(target=asyncio.run, args=(self.serve(host, port),), daemon=True,
+                                  name='spectate')
+        thread.start()
+        return thread
+
+
+class SpectatorView:
+    """A spectator's copy of a game, built from keyframes and deltas"""
+    def __init__(self):
+        self.seq = -1
+        self.board = None
+        self.status = None
+
+    def apply(self, message):
+        """Apply one message; False if it was stale (already covered by a keyframe or delta)"""
+        if message.get('keyframe'):
+            self.board = [list(row) for row in message['board']]
+            self.seq = message['seq']
+            self.status = message['status']
+            return True
+        if self.board is None or message.get('seq', -1) <= self.seq:
+            return False
+        for r, c, value in message.get('open', ()):
+            self.board[r][c] = '*' if value < 0 else str(value)
+        if 'flag' in message:
+            r, c, flagged = message['flag']
+            self.board[r][c] = 'F' if flagged else '.'
+        for r, c in message.get('mines', ()):
+            self.board[r][c] = '*'
+        self.status = message.get('status', self.status)
+        self.seq = message['seq']
+        return True
+
+    def lines(self):
+        return [''.join(row) for row in self.board or ()]
+
+
+def main(argv=None):
+    from minesweeper.engine.__main__ import parse_address
+
+    parser = argparse.ArgumentParser(
+        prog="python -m minesweeper.engine.spectate",
+        description="Watch a game served by an engine started with --spectate.")
+    parser.add_argument('address', type=parse_address, metavar='HOST:PORT')
+    parser.add_argument('game', type=int, nargs='?', help="game to watch; lists the games if omitted")
+    log.add_arguments(parser)
+    args = parser.parse_args(argv)
+    log.configure(args.log_level, args.log_format)
+
+    request = {'op': 'watch', 'game': args.game} if args.game is not None else {'op': 'list'}
+    with socket.create_connection(args.address) as connection:
+        connection.sendall(_encode(request))
+        view = SpectatorView()
+        for line in connection.makefile('rb'):
+            message = json.loads(line)
+            if 'games' in message or 'error' in message:
+                print(message.get('games', message.get('error')))
+                break
+            if message.get('closed'):
+                break
+            if view.apply(message):
+                print(f"seq {view.seq}  {view.status}")
+                print('\n'.join(view.lines()))
+                print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
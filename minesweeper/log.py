@@ -0,0 +1,78 @@
+# minesweeper/log.py
+"""
+Logging for the minesweeper package.
+
+Modules log through per-subsystem loggers under "minesweeper", e.g.
+get_logger('highscores') is "minesweeper.highscores". The package itself
+only attaches a NullHandler; entry points call configure(), which reads
+MINESWEEPER_LOG_LEVEL (default WARNING) and MINESWEEPER_LOG_FORMAT ('text'
+or 'json': one JSON object per line, for log pipelines) unless given
+explicitly.
+
+Messages take %-style arguments, so nothing is formatted for a record that
+is not emitted; work done only to build a message is guarded with
+logger.isEnabledFor(...).
+"""
+import json
+import logging
+import os
+import sys
+
+ROOT = 'minesweeper'
+LOG_FORMATS = ('text', 'json')
+TEXT_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+logging.getLogger(ROOT).addHandler(logging.NullHandler())
+
+# Handler installed by configure(), replaced when it is called again
+_handler = None
+
+
+def get_logger(subsystem):
+    return logging.getLogger(f"{ROOT}.{subsystem}")
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any `extra` fields"""
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def add_arguments(parser):
+    """Add --log-level and --log-format to a command-line parser (see configure)"""
+    parser.add_argument('--log-level', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'), type=str.upper,
+                        help="log to stderr from this level; default: $MINESWEEPER_LOG_LEVEL or WARNING")
+    parser.add_argument('--log-format', choices=LOG_FORMATS,
+                        help="text, or json (one object per line); default: $MINESWEEPER_LOG_FORMAT or text")
+
+
+def configure(level=None, fmt=None, stream=None):
+    """Send the package's logs to a stream (default stderr) as text or JSON lines"""
+    global _handler
+    level = level or os.environ.get('MINESWEEPER_LOG_LEVEL', 'WARNING')
+    fmt = fmt or os.environ.get('MINESWEEPER_LOG_FORMAT', 'text')
+    if fmt not in LOG_FORMATS:
+        raise ValueError(f"log format must be one of {LOG_FORMATS}")
+
+    root = logging.getLogger(ROOT)
+    if _handler is not None:
+        root.removeHandler(_handler)
+    _handler = logging.StreamHandler(stream or sys.stderr)
+    _handler.setFormatter(JSONFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    root.addHandler(_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    return root
@@ -1,11 +1,7 @@
 # minesweeper/ui/components/control_panel.py
 import tkinter as tk
+from minesweeper.core.game import DIFFICULTIES
 
-DIFFICULTIES = {
-    'easy': (9, 9, 10),
-    'medium': (16, 16, 40), 
-    'hard': (16, 30, 99)
-}
 
 class ControlPanel:
     def __init__(self, parent, on_difficulty_change):
@@ -30,4 +26,14 @@ class ControlPanel:
                 relief='raised',
                 bd=2
             )
-            btn.pack(side='left', padx=3)
\ No newline at end of file
+            btn.pack(side='left', padx=3)
+
+        # Boards solvable without guessing (applies from the next game)
+        self.no_guess = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            self.mode_frame,
+            text='No guess',
+            variable=self.no_guess,
+            font=('Arial', 8, 'bold'),
+            bg='lightgray'
+        ).pack(side='left', padx=3)
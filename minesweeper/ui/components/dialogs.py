@@ -7,19 +7,19 @@ class DialogManager:
     def __init__(self, parent):
         self.parent = parent
 
-    def show_highscores(self, highscores, config):
-        """Show highscores dialog"""
+    def show_highscores(self, highscores, config, run):
+        """Show highscores dialog
+
+        run(work, done) calls work() off the Tk thread (it may wait on the
+        leaderboard service) and done(result) back on it.
+        """
         rows, board_cols, mines = config  # CHANGED: renamed to board_cols
         
         win = tk.Toplevel(self.parent)
         win.title("Highscores")
-        win.geometry("420x320")
+        win.geometry("560x380")
         win.grab_set()
 
-        # Get scores with debugging
-        scores = highscores.get_top_scores(rows, board_cols, mines)  # CHANGED: use board_cols
-        print(f"Dialog: Showing {len(scores)} scores for {rows}x{board_cols}_{mines}")  # CHANGED
-
         header = tk.Label(
             win,
             text=f"Top 10 - {rows}x{board_cols}, {mines} mines",  # CHANGED
@@ -27,25 +27,62 @@ class DialogManager:
         )
         header.pack(padx=10, pady=10)
 
+        # Ranking selector: the store keeps an index per metric, so switching is instant
+        metric = tk.StringVar(value='time')
+        selector = tk.Frame(win)
+        selector.pack()
+        tk.Label(selector, text="Rank by:").pack(side='left')
+        for text, value in (("Time", 'time'), ("Efficiency (3BV/s)", 'efficiency')):
+            tk.Radiobutton(selector, text=text, variable=metric, value=value,
+                           command=lambda: fill(metric.get())).pack(side='left', padx=5)
+
         # CHANGED: Use different variable names for Treeview columns
-        tree_columns = ("rank", "name", "time")  # CHANGED: renamed to tree_columns
+        tree_columns = ("rank", "name", "time", "bbbv", "clicks", "efficiency")
         tree = ttk.Treeview(win, columns=tree_columns, show="headings", height=10)  # CHANGED
-        tree.heading("rank", text="Rank")
-        tree.heading("name", text="Name")
-        tree.heading("time", text="Time (s)")
-
-        tree.column("rank", width=60, anchor="center")
-        tree.column("name", width=220, anchor="center")
-        tree.column("time", width=100, anchor="center")
+        headings = {"rank": ("Rank", 50), "name": ("Name", 180), "time": ("Time (s)", 80),
+                    "bbbv": ("3BV", 60), "clicks": ("Clicks", 60), "efficiency": ("3BV/s", 70)}
+        for column, (text, width) in headings.items():
+            tree.heading(column, text=text)
+            tree.column(column, width=width, anchor="center")
+        tree.heading("time", text="Time (s)", command=lambda: (metric.set('time'), fill('time')))
+        tree.heading("efficiency", text="3BV/s", command=lambda: (metric.set('efficiency'), fill('efficiency')))
 
         tree.pack(fill="both", expand=True, padx=10, pady=10)
 
-        if not scores:
-            # Show empty message
-            tree.insert("", "end", values=("No", "scores", "yet!"))
-        else:
+        def fill(ranking):
+            run(lambda: highscores.get_top_scores(rows, board_cols, mines, ranking), show_scores)
+
+        def show_scores(scores):
+            # The dialog may have been closed meanwhile
+            if not tree.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            if not scores:
+                # Show empty message
+                tree.insert("", "end", values=("No", "scores", "yet!"))
+                return
             for i, score in enumerate(scores, 1):
-                tree.insert("", "end", values=(i, score['name'], f"{score['time']:.2f}"))
+                efficiency = score.get('bbbv_per_second')
+                tree.insert("", "end", values=(
+                    i, score['name'], f"{score['time']:.2f}", score.get('bbbv', '-'),
+                    score.get('clicks', '-'), f"{efficiency:.2f}" if efficiency is not None else '-'))
+
+        fill(metric.get())
+
+        # Percentile bands of all winning times, not just the top 10
+        summary = tk.Label(win, text="Loading...", font=('Arial', 9))
+        summary.pack()
+
+        def show_bands(times):
+            if not summary.winfo_exists():
+                return
+            if times['bands']:
+                bands = "   ".join(f"p{round(q * 100)}: {t:.1f}s" for q, t in times['bands'].items())
+                summary.config(text=f"{times['won']} of {times['won'] + times['lost']} games won\nWinning times  {bands}")
+            else:
+                summary.config(text=f"{times['lost']} games played, none won yet")
+
+        run(lambda: highscores.time_bands(rows, board_cols, mines), show_bands)
 
         close_btn = tk.Button(win, text="Close", command=win.destroy, width=8)
         close_btn.pack(pady=6, anchor="center")
@@ -338,6 +375,7 @@ E - Easy difficulty
 M - Medium difficulty  
 H - Hard difficulty
 C - Custom game
+? - Hint (safe cell, or lowest mine risk)
 F1 - Show this help
 
 🎛️ INTERFACE ELEMENTS
@@ -375,6 +413,7 @@ Esc   - Exit keyboard mode
 ACTIONS:
 Space/Enter - Reveal selected cell
 F           - Flag/unflag selected cell
+?           - Hint: highlight a safe (or least risky) cell
 
 GAME CONTROL:
 N/R         - New game
@@ -424,9 +463,14 @@ Press any key to close...
         """Show game over message"""
         messagebox.showinfo("Game Over", "You hit a mine!")
 
-    def show_victory(self, elapsed_time):
+    def show_victory(self, elapsed_time, bbbv=None, bbbv_per_second=None, percentile=None):
         """Show victory message"""
-        messagebox.showinfo("Victory", f"You won in {elapsed_time:.1f} seconds!")
+        message = f"You won in {elapsed_time:.1f} seconds!"
+        if bbbv is not None and bbbv_per_second is not None:
+            message += f"\n\n3BV: {bbbv}   3BV/s: {bbbv_per_second:.2f}"
+        if percentile is not None:
+            message += f"\n\nFaster than {percentile:.0f}% of winning games"
+        messagebox.showinfo("Victory", message)
 
     def show_analytics_complete(self, config, sample_size, pdf_path):
         """Show analytics completion message with file location"""
@@ -13,6 +13,7 @@ class GameBoard:
         self.selected_row = 0
         self.selected_col = 0
         self.keyboard_mode = False
+        self.hint_cell = None
         
         self.setup_board_frame()
 
@@ -20,6 +21,10 @@ class GameBoard:
         """Create the main board frame"""
         self.board_frame = tk.Frame(self.parent, bg='gray')
         self.board_frame.pack(pady=3)
+        
+        # Hint text under the board
+        self.hint_label = tk.Label(self.parent, text='', font=('Arial', 8), bg='lightgray')
+        self.hint_label.pack()
 
     def create_board(self, rows, cols):
         """Create or recreate the game board with given dimensions"""
@@ -30,6 +35,8 @@ class GameBoard:
         self.buttons = []
         self.rows = rows
         self.cols = cols
+        self.hint_cell = None
+        self.hint_label.config(text='')
         
         # Create button grid
         for r in range(rows):
@@ -113,6 +120,28 @@ class GameBoard:
         else:
             btn.config(bg=CELL_COLORS['default'], relief='raised')
 
+    def show_hint(self, r, c, probability):
+        """Highlight a hinted cell: safe, or the lowest-risk cell with its mine probability"""
+        self.clear_hint()
+        self.hint_cell = (r, c)
+        if probability == 0:
+            self.buttons[r][c].config(bg=CELL_COLORS['hint_safe'])
+            self.hint_label.config(text=f'Hint: row {r + 1}, column {c + 1} is safe', fg='darkgreen')
+        else:
+            self.buttons[r][c].config(bg=CELL_COLORS['hint_risky'])
+            self.hint_label.config(text=f'Hint: no safe cell - row {r + 1}, column {c + 1} '
+                                        f'has the lowest risk ({probability:.0%} mine)', fg='darkred')
+
+    def clear_hint(self):
+        """Remove the hint highlight and text"""
+        if self.hint_cell is not None:
+            r, c = self.hint_cell
+            self.hint_cell = None
+            btn = self.buttons[r][c]
+            if btn.cget('bg') in (CELL_COLORS['hint_safe'], CELL_COLORS['hint_risky']):
+                btn.config(bg=CELL_COLORS['default'])
+        self.hint_label.config(text='')
+
     def move_selection(self, row_delta, col_delta):
         """Move keyboard selection with arrow keys"""
         if not self.keyboard_mode:
@@ -1,7 +1,11 @@
 # minesweeper/ui/main_app.py - UPDATED
 import os
 import tkinter as tk
-from minesweeper.core.game import Game
+from concurrent.futures import ThreadPoolExecutor
+from minesweeper.core.game import Game, DIFFICULTIES
+from minesweeper.core.board_pool import BoardPool
+from minesweeper.core.hints import HintEngine
+from minesweeper.core.no_guess import NoGuessGenerator
 from minesweeper.data.highscores import HighScoreManager
 from minesweeper.analytics.analyzer import AnalyticsRunner
 from minesweeper.ui.components.control_panel import ControlPanel
@@ -9,11 +13,6 @@ from minesweeper.ui.components.status_panel import StatusPanel
 from minesweeper.ui.components.game_board import GameBoard
 from minesweeper.ui.components.dialogs import DialogManager
 
-DIFFICULTIES = {
-    'easy': (9, 9, 10),
-    'medium': (16, 16, 40), 
-    'hard': (16, 30, 99)
-}
 
 class MinesweeperApp:
     def __init__(self):
@@ -22,14 +21,21 @@ class MinesweeperApp:
         self.root.configure(bg='lightgray')
         
         # Initialize managers
-        self.highscores = HighScoreManager()
+        # A shared leaderboard service, if configured, replaces the local highscore store
+        self.highscores = HighScoreManager(server=os.environ.get('MINESWEEPER_LEADERBOARD'))
+        # Highscore calls may wait on the leaderboard service, so they run here instead of on the Tk thread
+        self.highscore_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="highscores")
         self.analytics = AnalyticsRunner()
         self.dialogs = DialogManager(self.root)
+        # One worker: on the presets, more workers cost more in overhead than they save
+        self.no_guess_generator = NoGuessGenerator(workers=1)
+        self.board_pool = BoardPool()
         
         # Game state
         self.difficulty = 'easy'
         self.rows, self.cols, self.mines = DIFFICULTIES[self.difficulty]
         self.game = None
+        self.hint_engine = None
         
         # Setup UI with new layout structure
         self.setup_ui()
@@ -158,7 +164,7 @@ class MinesweeperApp:
         self.root.bind('<Return>', lambda e: self.handle_cell_click(*self.game_board.get_selected_cell()))
         self.root.bind('f', lambda e: self.handle_cell_right_click(*self.game_board.get_selected_cell()))
         self.root.bind('F', lambda e: self.handle_cell_right_click(*self.game_board.get_selected_cell()))
-        
+        self.root.bind('?', lambda e: self.request_hint())
         
         # Game control
         self.root.bind('n', lambda e: self.reset_game())
@@ -190,7 +196,16 @@ class MinesweeperApp:
 
     def start_game(self):
         """Start a new game"""
-        self.game = Game(self.rows, self.cols, self.mines)
+        no_guess = self.control_panel.no_guess.get()
+        self.game = Game(self.rows, self.cols, self.mines,
+                         no_guess=no_guess,
+                         generator=self.no_guess_generator,
+                         pool=self.board_pool)
+        if self.hint_engine is not None:
+            self.hint_engine.close()
+        self.hint_engine = HintEngine(self.game.board)
+        # Have a board ready by the time the first click comes
+        self.board_pool.register(self.rows, self.cols, self.mines, 'no_guess' if no_guess else 'random')
         self.game_board.create_board(self.rows, self.cols)
         self.status_panel.update_face_button('playing')
         self.update_mines_display()
@@ -202,6 +217,8 @@ class MinesweeperApp:
             return
         
         revealed_cells = self.game.click(r, c)
+        self.hint_engine.notify(revealed_cells)
+        self.game_board.clear_hint()
         self.update_display()
         self.check_game_end()
 
@@ -210,9 +227,46 @@ class MinesweeperApp:
         if self.game.lost or self.game.won:
             return
         self.game.mark(r, c)
+        self.hint_engine.notify([(r, c)])
+        self.game_board.clear_hint()
         self.game_board.update_cell(r, c, self.game.board.grid[r][c])
         self.update_mines_display()
 
+    def request_hint(self):
+        """Ask the hint engine for a hint and show it once it is ready"""
+        if self.game.lost or self.game.won:
+            return
+        self.poll_hint(self.hint_engine, self.hint_engine.request())
+
+    def poll_hint(self, engine, future):
+        """Check for a finished hint without blocking the Tk loop"""
+        if not future.done():
+            self.root.after(10, self.poll_hint, engine, future)
+            return
+        # A new game closed the engine, cancelling its pending hint
+        if future.cancelled() or engine is not self.hint_engine:
+            return
+        hint = future.result()
+        # Drop hints for a finished game or a board that changed since the request
+        if hint is None or hint.version != engine.version:
+            return
+        if self.game.lost or self.game.won:
+            return
+        self.game_board.show_hint(*hint.cell, hint.probability)
+
+    def in_background(self, work, done=None):
+        """Run work() on the highscore thread, then done(result) on the Tk thread"""
+        self.poll_background(self.highscore_worker.submit(work), done)
+
+    def poll_background(self, future, done):
+        """Check for finished highscore work without blocking the Tk loop"""
+        if not future.done():
+            self.root.after(20, self.poll_background, future, done)
+            return
+        result = future.result()
+        if done is not None:
+            done(result)
+
     def handle_cell_hover(self, r, c, is_enter):
         """Handle cell hover"""
         if self.game_board.keyboard_mode and (r == self.game_board.selected_row and c == self.game_board.selected_col):
@@ -244,17 +298,34 @@ class MinesweeperApp:
 
     def check_game_end(self):
         """Check if game has ended"""
+        # The game may be replaced before the highscore work is done, so take what it needs now
+        rows, cols, mines = self.rows, self.cols, self.mines
+        elapsed = self.game.get_elapsed_time()
         if self.game.lost:
             self.status_panel.update_face_button('lost')
+            self.in_background(lambda: self.highscores.record_game(rows, cols, mines, elapsed, won=False))
             self.dialogs.show_game_over()
         elif self.game.won:
             self.status_panel.update_face_button('won')
-            elapsed = self.game.get_elapsed_time()
-            if self.highscores.is_highscore(self.rows, self.cols, self.mines, elapsed):
-                name = self.dialogs.ask_player_name()
-                if name:
-                    self.highscores.add_score(self.rows, self.cols, self.mines, name, elapsed)
-            self.dialogs.show_victory(elapsed)
+            bbbv, clicks = self.game.bbbv, self.game.clicks
+            bbbv_per_second = self.game.get_3bv_per_second()
+            board_code = self.game.board.encode()
+
+            def check():
+                self.highscores.record_game(rows, cols, mines, elapsed, won=True)
+                return (self.highscores.percentile(rows, cols, mines, elapsed),
+                        self.highscores.is_highscore(rows, cols, mines, elapsed, bbbv_per_second))
+
+            def finish(result):
+                percentile, is_highscore = result
+                if is_highscore:
+                    name = self.dialogs.ask_player_name()
+                    if name:
+                        self.in_background(lambda: self.highscores.add_score(
+                            rows, cols, mines, name, elapsed, board_code=board_code, bbbv=bbbv, clicks=clicks))
+                self.dialogs.show_victory(elapsed, bbbv, bbbv_per_second, percentile)
+
+            self.in_background(check, finish)
 
     def reset_game(self):
         """Reset the current game"""
@@ -263,7 +334,7 @@ class MinesweeperApp:
 
     def show_highscores(self):
         """Show highscores dialog"""
-        self.dialogs.show_highscores(self.highscores, (self.rows, self.cols, self.mines))
+        self.dialogs.show_highscores(self.highscores, (self.rows, self.cols, self.mines), self.in_background)
 
     def run_analytics(self):
         """Run analytics and generate PDF report"""
@@ -295,4 +366,10 @@ class MinesweeperApp:
 
     def run(self):
         """Start the application"""
-        self.root.mainloop()
\ No newline at end of file
+        self.root.mainloop()
+        self.hint_engine.close()
+        self.board_pool.close()
+        self.no_guess_generator.close()
+        # Let queued submissions finish first
+        self.highscore_worker.shutdown()
+        self.highscores.close()
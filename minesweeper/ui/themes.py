@@ -8,7 +8,9 @@ CELL_COLORS = {
     'hover': '#B3B3B3', 
     'revealed': 'white',
     'selected': 'yellow',
-    'mine': 'red'
+    'mine': 'red',
+    'hint_safe': 'palegreen',
+    'hint_risky': 'khaki'
 }
 
 NUMBER_COLORS = {
@@ -0,0 +1,111 @@
+# tests/test_leaderboard.py
+import asyncio
+import json
+
+import pytest
+
+from minesweeper.data.leaderboard import MAX_BODY, LeaderboardService
+from minesweeper.data.sketch import TimeDistributions
+from minesweeper.data.stores import TOP_N, SQLiteScoreStore
+
+SCORE = {'id': 'a1', 'config': '9x9_10', 'entry': {'name': 'ann', 'time': 12.5}}
+
+
+def serve(tmp_path, scenario):
+    """Run scenario(port) against a service on a free port; returns its result"""
+    store = SQLiteScoreStore(str(tmp_path / 'scores.db'))
+    service = LeaderboardService(store, TimeDistributions(str(tmp_path / 'times.json')))
+
+    async def main():
+        _, port = await service.start('127.0.0.1', 0)
+        try:
+            return await scenario(port)
+        finally:
+            await service.stop()
+    try:
+        return asyncio.run(main())
+    finally:
+        store.close()
+
+
+async def send(port, data):
+    """(status, payload) of the answer to raw request bytes"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(data)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode().partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return status, json.loads(await reader.readexactly(length))
+    finally:
+        writer.close()
+
+
+def request(method, target, body=b'', headers=None):
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+    headers = dict({'Content-Length': str(len(body)), 'Connection': 'close'}, **(headers or {}))
+    head = ''.join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return f"{method} {target} HTTP/1.1\r\n{head}\r\n".encode() + body
+
+
+def answer(tmp_path, data):
+    return serve(tmp_path, lambda port: send(port, data))
+
+
+@pytest.mark.parametrize('data, status', [
+    (b'NONSENSE\r\n\r\n', 400),
+    (request('POST', '/submit', headers={'Content-Length': 'lots'}), 400),
+    (request('POST', '/submit', headers={'Content-Length': '-5'}), 400),
+    (request('POST', '/submit', headers={'Content-Length': str(MAX_BODY + 1)}), 413),
+    (request('POST', '/submit', b'{"scores": ['), 400),
+    (request('POST', '/submit', [SCORE]), 400),
+    (request('POST', '/submit', {'scores': SCORE}), 400),
+    (request('GET', '/top'), 400),
+    (request('GET', '/top?config=9x9_10&metric=speed'), 400),
+    (request('GET', '/top?config=9x9_10&limit=ten'), 400),
+    (request('GET', '/top?config=9x9_10&limit=0'), 400),
+    (request('GET', f'/top?config=9x9_10&limit={TOP_N + 1}'), 400),
+    (request('GET', '/qualifies?config=9x9_10'), 400),
+    (request('GET', '/percentile?config=9x9_10&time=fast'), 400),
+    (request('GET', '/nowhere'), 404),
+    (request('GET', '/submit'), 405),
+])
+def test_malformed_requests_get_error_answers(tmp_path, data, status):
+    got, payload = answer(tmp_path, data)
+    assert got == status
+    assert payload['error']
+
+
+def test_rejected_entries_are_listed_and_nothing_is_stored(tmp_path):
+    batch = {'scores': [SCORE, {'config': '9x9_10', 'entry': {'name': 'bob'}},
+                        dict(SCORE, id=7)],
+             'games': [{'config': '9x9_10', 'time': 'slow', 'won': True},
+                       {'config': '9x9_10', 'time': 3, 'won': True}]}
+
+    async def scenario(port):
+        rejected = await send(port, request('POST', '/submit', batch))
+        top = await send(port, request('GET', '/top?config=9x9_10'))
+        return rejected, top
+    (status, payload), (_, top) = serve(tmp_path, scenario)
+    assert status == 400
+    assert payload['rejected'] == {'scores': [1, 2], 'games': [0]}
+    assert top == {'scores': []}
+
+
+def test_resent_entries_are_stored_once(tmp_path):
+    async def scenario(port):
+        first = await send(port, request('POST', '/submit', {'scores': [SCORE]}))
+        again = await send(port, request('POST', '/submit', {'scores': [SCORE]}))
+        top = await send(port, request('GET', '/top?config=9x9_10'))
+        return first, again, top
+    first, again, (_, top) = serve(tmp_path, scenario)
+    assert first == again == (200, {'accepted': {'scores': 1, 'games': 0}})
+    assert [entry['name'] for entry in top['scores']] == ['ann']
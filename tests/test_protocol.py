@@ -0,0 +1,150 @@
+# tests/test_protocol.py
+import asyncio
+import json
+import random
+
+import pytest
+
+from minesweeper.core.board import Board
+from minesweeper.engine.protocol import MAX_SIDE, Engine
+from minesweeper.engine.sessions import CompactEngine
+
+# Mines walling off the top left corner: (8, 8) opens the rest of the board and (2, 2) loses
+WALL = [(0, 2), (1, 2), (2, 0), (2, 1), (2, 2)]
+CORNER = Board(9, 9, len(WALL))
+CORNER.set_mines(WALL)
+CORNER_CODE = CORNER.encode()
+
+
+def new_game(engine, **request):
+    answer = engine.handle(dict({'op': 'new', 'board': CORNER_CODE}, **request))
+    assert answer['ok'], answer
+    return answer['game']
+
+
+@pytest.fixture(params=[Engine, CompactEngine])
+def engine(request):
+    engine = request.param()
+    yield engine
+    engine.shutdown()
+
+
+@pytest.mark.parametrize('request_', [
+    [],
+    'click',
+    {'op': 'explode'},
+    {'op': 'new'},
+    {'op': 'new', 'rows': 9, 'cols': 9, 'mines': 80},
+    {'op': 'new', 'rows': MAX_SIDE + 1, 'cols': 9, 'mines': 10},
+    {'op': 'new', 'rows': '9', 'cols': 9, 'mines': 10},
+    {'op': 'new', 'preset': 'impossible'},
+    {'op': 'new', 'preset': 'easy', 'seed': [1]},
+    {'op': 'new', 'preset': 'easy', 'seed': True},
+    {'op': 'new', 'board': 42},
+    {'op': 'new', 'board': 'garbage'},
+    {'op': 'new', 'board': f'{MAX_SIDE + 1}x{MAX_SIDE + 1}-AAAA'},
+    {'op': 'click', 'r': 0, 'c': 0},
+    {'op': 'click', 'game': 99, 'r': 0, 'c': 0},
+    {'op': 'click', 'game': [1], 'r': 0, 'c': 0},
+    {'op': 'click', 'game': True, 'r': 0, 'c': 0},
+    {'op': 'click', 'game': 1, 'r': 9, 'c': 0},
+    {'op': 'flag', 'game': 1, 'r': -1, 'c': 0},
+    {'op': 'chord', 'game': 1, 'r': 0.5, 'c': 0},
+    {'op': 'diff', 'game': 1},
+    {'op': 'diff', 'game': 1, 'since': 5},
+    {'op': 'diff', 'game': 1, 'since': -1},
+    {'op': 'state', 'game': '1'},
+    {'op': 'close', 'game': 2},
+])
+def test_malformed_requests_get_error_answers(engine, request_):
+    new_game(engine)
+    answer = engine.handle(request_)
+    assert answer['ok'] is False
+    assert answer['error']
+    # The engine keeps serving
+    assert engine.handle({'op': 'state', 'game': 1})['ok']
+
+
+def test_lines_and_batches(engine):
+    answer = json.loads(engine.handle_line('{"op": "new",'))
+    assert answer['ok'] is False and answer['error'].startswith('invalid JSON')
+    game = new_game(engine)
+    answers = json.loads(engine.handle_line(json.dumps([
+        {'id': 'a', 'op': 'click', 'game': game, 'r': 8, 'c': 8},
+        {'id': 'b', 'op': 'click', 'game': game, 'r': 99, 'c': 8},
+        {'id': 'c', 'op': 'list'},
+    ])))
+    assert [a['id'] for a in answers] == ['a', 'b', 'c']
+    assert [a['ok'] for a in answers] == [True, False, True]
+
+
+def test_moves_after_the_end_are_rejected(engine):
+    game = new_game(engine)
+    assert engine.handle({'op': 'click', 'game': game, 'r': 8, 'c': 8})['ok']
+    lost = engine.handle({'op': 'click', 'game': game, 'r': 2, 'c': 2})
+    assert lost['status'] == 'lost'
+    assert sorted(map(tuple, lost['mines'])) == WALL
+    answer = engine.handle({'op': 'flag', 'game': game, 'r': 0, 'c': 1})
+    assert answer['ok'] is False and 'over' in answer['error']
+
+
+def test_moves_that_change_nothing_keep_seq(engine):
+    game = new_game(engine)
+    move = {'game': game, 'r': 8, 'c': 8}
+    assert engine.handle(dict(move, op='click'))['seq'] == 1
+    for op in ('click', 'flag', 'chord'):
+        answer = engine.handle(dict(move, op=op))
+        assert answer['ok'] and answer['seq'] == 1
+    assert engine.handle({'op': 'flag', 'game': game, 'r': 0, 'c': 0})['seq'] == 2
+    assert len(engine.handle({'op': 'diff', 'game': game, 'since': 0})['deltas']) >= 1
+
+
+def test_compact_engine_answers_as_the_full_one():
+    for seed in range(30):
+        rng = random.Random(seed)
+        board = Board(9, 9, 10)
+        board.place_mines((4, 4), random.Random(seed))
+        engines = Engine(), CompactEngine()
+        for engine in engines:
+            new_game(engine, board=board.encode())
+        for _ in range(60):
+            move = {'op': rng.choice(('click', 'click', 'flag', 'chord')), 'game': 1,
+                    'r': rng.randrange(9), 'c': rng.randrange(9)}
+            full, compact = (engine.handle(move) for engine in engines)
+            assert full == compact
+            if not full['ok']:
+                break
+        for engine in engines:
+            engine.shutdown()
+
+
+def test_spectators_count_moves_as_the_protocol_does():
+    engine = Engine()
+    game = new_game(engine)
+    seqs = []
+    engine.games[game].game.add_observer(lambda delta: seqs.append(delta['seq']))
+    for op, r, c in (('flag', 0, 0), ('click', 8, 8), ('click', 8, 8), ('flag', 8, 8),
+                     ('flag', 0, 0), ('flag', 0, 1), ('chord', 1, 1)):
+        engine.handle({'op': op, 'game': game, 'r': r, 'c': c})
+    state = engine.handle({'op': 'state', 'game': game})
+    assert seqs == list(range(1, state['seq'] + 1))
+
+
+def test_no_guess_boards_are_generated_off_the_event_loop():
+    engine = Engine()
+
+    async def main():
+        answer = json.loads(await engine.handle_line_async(
+            '{"op": "new", "rows": 16, "cols": 16, "mines": 40, "no_guess": true}'))
+        click = asyncio.create_task(engine.handle_async({'op': 'click', 'game': answer['game'], 'r': 8, 'c': 8}))
+        await asyncio.sleep(0)
+        # Another game is answered while the board is generated; the same game waits for it
+        other = engine.handle({'op': 'new', 'preset': 'easy'})
+        assert other['ok'] and answer['game'] in engine._pending
+        state = await engine.handle_async({'op': 'state', 'game': answer['game']})
+        assert click.done() and state['seq'] == 1
+        return (await click)['status']
+    try:
+        assert asyncio.run(main()) in ('playing', 'won')
+    finally:
+        engine.shutdown()
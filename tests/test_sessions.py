@@ -0,0 +1,72 @@
+# tests/test_sessions.py
+import random
+
+import pytest
+
+from minesweeper.engine.sessions import CompactGame, SessionHost
+
+FIELDS = ('rows', 'cols', 'mines', 'cells', 'changed', 'state', 'placed', 'seq', 'clicks',
+          'safe_remaining', 'seed', 'start_time', 'end_time')
+
+
+def play(game, moves, rng):
+    for _ in range(moves):
+        if game.status != 'playing':
+            break
+        r, c = rng.randrange(game.rows), rng.randrange(game.cols)
+        getattr(game, rng.choice(('click', 'click', 'flag', 'chord')))(r, c)
+
+
+def assert_same(a, b, fields=FIELDS):
+    for field in fields:
+        assert getattr(a, field) == getattr(b, field), field
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_round_trip(seed):
+    rng = random.Random(seed)
+    game = CompactGame(16, 30, 99, seed=seed)
+    play(game, rng.randrange(40), rng)
+    copy = CompactGame.from_bytes(game.to_bytes())
+    assert_same(copy, game)
+    assert copy.lines() == game.lines()
+    assert copy.diff(0) == game.diff(0)
+    # The copy plays on exactly as the original would
+    play(game, 30, random.Random(seed + 1000))
+    play(copy, 30, random.Random(seed + 1000))
+    # ...except for the clock, if the game ended since
+    assert_same(copy, game, [field for field in FIELDS if field != 'end_time'])
+
+
+def test_round_trip_before_first_click():
+    game = CompactGame(9, 9, 10, seed='named seed')
+    copy = CompactGame.from_bytes(game.to_bytes())
+    assert_same(copy, game)
+    assert copy.start_time is None and not copy.placed
+    assert copy.click(4, 4) == game.click(4, 4)
+
+
+def test_round_trip_with_layout():
+    layout = [(0, 0), (0, 1), (8, 8)]
+    game = CompactGame(9, 9, 3, layout=layout)
+    game.click(4, 4)
+    copy = CompactGame.from_bytes(game.to_bytes())
+    assert_same(copy, game)
+    assert sorted(map(tuple, copy.click(0, 0)['mines'])) == layout
+
+
+def test_spilled_sessions_come_back_unchanged(tmp_path):
+    host = SessionHost(str(tmp_path / 'spill.db'), max_resident=2)
+    rng = random.Random(7)
+    games = {}
+    for session_id in range(1, 6):
+        game = CompactGame(16, 16, 40, seed=session_id)
+        play(game, 15, rng)
+        games[session_id] = CompactGame.from_bytes(game.to_bytes())
+        host[session_id] = game
+    try:
+        assert len(host.resident) <= 2
+        for session_id, expected in games.items():
+            assert_same(host.get(session_id), expected)
+    finally:
+        host.close()
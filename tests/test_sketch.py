@@ -0,0 +1,87 @@
+# tests/test_sketch.py
+import bisect
+import glob
+import json
+import random
+
+import pytest
+
+from minesweeper.data.sketch import DEFAULT_K, KLLSketch, TimeDistributions
+
+# Documented as about 1.7/k; a little slack for the random compactions
+MAX_RANK_ERROR = 2.5 / DEFAULT_K
+
+
+def sketch_of(values, seed):
+    sketch = KLLSketch(rng=random.Random(seed))
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def max_rank_error(sketch, values):
+    values = sorted(values)
+    probes = [values[int(q * (len(values) - 1))] for q in [i / 100 for i in range(101)]]
+    return max(abs(sketch.rank(v) - bisect.bisect_right(values, v) / len(values)) for v in probes)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_rank_error_after_merge(seed):
+    rng = random.Random(seed)
+    fast = [rng.lognormvariate(3, 0.4) for _ in range(30000)]
+    slow = [rng.lognormvariate(4, 0.6) for _ in range(20000)]
+    merged = sketch_of(fast, seed).merge(sketch_of(slow, seed + 100))
+    assert len(merged) == len(fast) + len(slow)
+    assert max_rank_error(merged, fast + slow) <= MAX_RANK_ERROR
+
+
+def test_rank_error_after_merging_many_small_sketches():
+    rng = random.Random(1)
+    parts = [[rng.uniform(10, 300) for _ in range(rng.randrange(1, 2000))] for _ in range(40)]
+    merged = KLLSketch(rng=random.Random(0))
+    for i, part in enumerate(parts):
+        merged.merge(sketch_of(part, i))
+    values = [v for part in parts for v in part]
+    assert len(merged) == len(values)
+    assert max_rank_error(merged, values) <= MAX_RANK_ERROR
+
+
+def test_merge_keeps_the_weight_exact():
+    merged = sketch_of(range(1001), 0).merge(sketch_of(range(777), 1))
+    weight = sum(len(items) << level for level, items in enumerate(merged.levels))
+    assert weight == merged.n == 1778
+    assert merged.rank(-1) == 0 and merged.rank(10 ** 6) == 1
+
+
+def test_quantiles_are_ordered():
+    rng = random.Random(2)
+    sketch = sketch_of([rng.expovariate(0.05) for _ in range(10000)], 2)
+    quantiles = sketch.quantiles([i / 20 for i in range(21)])
+    assert quantiles == sorted(quantiles)
+    assert KLLSketch().quantiles([0.5]) == []
+
+
+def test_dict_round_trip():
+    sketch = sketch_of(range(5000), 3)
+    copy = KLLSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert copy.n == sketch.n and copy.levels == sketch.levels
+    assert copy.rank(2500) == sketch.rank(2500)
+
+
+def test_instances_add_up_on_disk(tmp_path):
+    path = str(tmp_path / 'times.json')
+    first, second = TimeDistributions(path), TimeDistributions(path)
+    first.record_many([('9x9_10', t, True) for t in range(100)])
+    second.record_many([('9x9_10', t, True) for t in range(100, 250)] + [('9x9_10', 5, False)])
+    latest = TimeDistributions(path)
+    assert len(latest.get('9x9_10')) == 250
+    assert len(latest.get('9x9_10', 'lost')) == 1
+
+
+def test_unreadable_file_is_moved_aside(tmp_path):
+    path = str(tmp_path / 'times.json')
+    with open(path, 'w') as f:
+        f.write('{"9x9_10": {"won": {"k": 200}}}')
+    distributions = TimeDistributions(path)
+    assert distributions.get('9x9_10') is None
+    assert len(glob.glob(path + '.corrupt-*')) == 1
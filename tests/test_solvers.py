@@ -0,0 +1,102 @@
+# tests/test_solvers.py
+import random
+
+import pytest
+
+from minesweeper.core.bitsolver import BitsetSolver
+from minesweeper.core.game import Game
+from minesweeper.core.pattern_cache import PatternCache
+from minesweeper.core.solver import Solver
+
+SIZES = [(9, 9, 10), (16, 16, 40), (16, 30, 99), (12, 20, 60)]
+
+
+def random_position(seed, wrong_flags=True):
+    """A game part played with random safe clicks and flags (some of them wrong, unless wrong_flags is False)"""
+    rng = random.Random(seed)
+    rows, cols, mines = SIZES[seed % len(SIZES)]
+    game = Game(rows, cols, mines, rng=rng)
+    game.click(rng.randrange(rows), rng.randrange(cols))
+    board = game.board
+    for _ in range(rng.randrange(12)):
+        hidden = [(r, c) for r in range(rows) for c in range(cols)
+                  if not board.is_revealed(r, c) and not board.is_marked(r, c)]
+        r, c = rng.choice(hidden)
+        if board.is_mine(r, c) or (wrong_flags and rng.random() < 0.2):
+            game.mark(r, c)
+        else:
+            game.click(r, c)
+        if game.won:
+            break
+    return game
+
+
+def brute_force(board):
+    """(frontier, active numbers, flagged cells) recomputed from the grid"""
+    cells = [(r, c) for r in range(board.rows) for c in range(board.cols)]
+
+    def hidden(r, c):
+        return not board.is_revealed(r, c) and not board.is_marked(r, c)
+
+    def number(r, c):
+        return board.is_revealed(r, c) and not board.is_mine(r, c) and board.get_value(r, c) > 0
+
+    frontier = {cell for cell in cells if hidden(*cell) and any(number(*n) for n in board.neighbours(*cell))}
+    active = {cell for cell in cells if number(*cell) and any(hidden(*n) for n in board.neighbours(*cell))}
+    marked = {cell for cell in cells if board.is_marked(*cell) and not board.is_revealed(*cell)}
+    return frontier, active, marked
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_incremental_frontier_matches_the_grid(seed):
+    board = random_position(seed).board
+    frontier, active, marked = brute_force(board)
+    assert set(board.iter_frontier()) == frontier
+    assert set(board.iter_active_numbers()) == active
+    assert set(board.iter_marked()) == marked
+    assert board.frontier_size() == len(frontier)
+    for r, c in frontier:
+        assert board.hidden_neighbours(r, c) == sum(
+            not board.is_revealed(*n) and not board.is_marked(*n) for n in board.neighbours(r, c))
+
+
+@pytest.mark.parametrize('trust_flags', [True, False])
+@pytest.mark.parametrize('seed', range(60))
+def test_solvers_agree_on_random_positions(seed, trust_flags):
+    # Trusted wrong flags make the constraints inconsistent, and what follows from them depends on the order
+    board = random_position(seed, wrong_flags=not trust_flags).board
+    sets, bits = Solver(board, trust_flags), BitsetSolver(board, trust_flags)
+    assert sets.deduce() == bits.deduce()
+    assert sets.frontier() == bits.frontier()
+    assert sets.contradictions == bits.contradictions
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_solvers_agree_move_by_move(seed):
+    """Both solvers kept up to date with update() through a game played by deduction"""
+    rng = random.Random(seed)
+    rows, cols, mines = SIZES[seed % len(SIZES)]
+    game = Game(rows, cols, mines, rng=rng)
+    changed = game.click(rows // 2, cols // 2)
+    cache = PatternCache()
+    solvers = Solver(game.board, pattern_cache=cache), BitsetSolver(game.board, pattern_cache=cache)
+    while not game.won and not game.lost:
+        results = []
+        for solver in solvers:
+            solver.update(changed)
+            results.append(solver.deduce())
+        assert results[0] == results[1]
+        safe, mines_found = results[0]
+        assert not any(game.board.is_mine(*cell) for cell in safe)
+        assert all(game.board.is_mine(*cell) for cell in mines_found)
+        changed = []
+        if safe:
+            for cell in sorted(safe):
+                changed += game.click(*cell)
+        elif mines_found - set(game.board.iter_marked()):
+            cell = min(mines_found - set(game.board.iter_marked()))
+            game.mark(*cell)
+            changed = [cell]
+        else:
+            break
+    assert not game.lost
@@ -0,0 +1,107 @@
+# tests/test_stores.py
+import json
+import os
+import shutil
+
+from minesweeper.data.stores import JSONScoreStore, read_json_scores
+
+KEY = '9x9_10'
+
+
+def entry(time):
+    return {'name': f"player {time}", 'time': time, 'date': '2026-01-01'}
+
+
+def crash(store):
+    """Drop the store without close(), as a killed process would"""
+    store._journal.close()
+
+
+def times(store):
+    return [e['time'] for e in store.top(KEY, 'time')]
+
+
+def test_journal_is_replayed_after_a_crash(tmp_path):
+    path = str(tmp_path / 'scores.json')
+    store = JSONScoreStore(path, compact_every=100)
+    store.add_many([(KEY, entry(t)) for t in (30, 10, 20)])
+    crash(store)
+    assert not os.path.exists(path)
+
+    store = JSONScoreStore(path)
+    assert times(store) == [10, 20, 30]
+    store.close()
+
+
+def test_write_cut_short_is_dropped_and_truncated(tmp_path):
+    path = str(tmp_path / 'scores.json')
+    store = JSONScoreStore(path, compact_every=100)
+    store.add(KEY, entry(10))
+    crash(store)
+    with open(path + '.journal', 'ab') as f:
+        f.write(b'{"seq": 2, "key": "9x9_10", "entry": {"na')
+
+    store = JSONScoreStore(path, compact_every=100)
+    assert times(store) == [10]
+    store.add(KEY, entry(5))
+    crash(store)
+    # The half line is gone and the new event starts a line of its own
+    with open(path + '.journal') as f:
+        events = [json.loads(line) for line in f]
+    assert [event['seq'] for event in events] == [1, 2]
+    assert read_json_scores(path)[KEY] == [entry(10), entry(5)]
+
+
+def test_garbled_line_is_skipped(tmp_path):
+    path = str(tmp_path / 'scores.json')
+    store = JSONScoreStore(path, compact_every=100)
+    store.add(KEY, entry(10))
+    crash(store)
+    with open(path + '.journal', 'ab') as f:
+        f.write(b'not json\n')
+
+    store = JSONScoreStore(path, compact_every=100)
+    store.add(KEY, entry(20))
+    assert times(store) == [10, 20]
+    store.close()
+
+
+def test_compaction_empties_the_journal(tmp_path):
+    path = str(tmp_path / 'scores.json')
+    store = JSONScoreStore(path, compact_every=3)
+    for t in (40, 30, 20, 10):
+        store.add(KEY, entry(t))
+    crash(store)
+    with open(path) as f:
+        snapshot = json.load(f)
+    assert snapshot['seq'] == 3
+    assert sorted(e['time'] for e in snapshot['scores'][KEY]) == [20, 30, 40]
+    with open(path + '.journal') as f:
+        assert [json.loads(line)['seq'] for line in f] == [4]
+
+    store = JSONScoreStore(path)
+    assert times(store) == [10, 20, 30, 40]
+    store.close()
+    assert os.path.getsize(path + '.journal') == 0
+    assert sorted(e['time'] for e in read_json_scores(path)[KEY]) == [10, 20, 30, 40]
+
+
+def test_crash_between_snapshot_and_journal_truncation(tmp_path):
+    path = str(tmp_path / 'scores.json')
+    store = JSONScoreStore(path, compact_every=100)
+    store.add_many([(KEY, entry(t)) for t in (30, 10, 20)])
+    crash(store)
+    journal = path + '.journal'
+    shutil.copy(journal, str(tmp_path / 'journal.bak'))
+
+    store = JSONScoreStore(path)
+    store.close()
+    # The snapshot was renamed in but the journal never emptied: its events are already in the snapshot
+    shutil.copy(str(tmp_path / 'journal.bak'), journal)
+
+    store = JSONScoreStore(path)
+    assert times(store) == [10, 20, 30]
+    store.add(KEY, entry(15))
+    assert times(store) == [10, 15, 20, 30]
+    store.close()
+    assert len(read_json_scores(path)[KEY]) == 4